@@ -19,6 +19,7 @@ from __future__ import division, absolute_import, print_function
 from collections import namedtuple
 from functools import total_ordering
 import re
+import types
 
 from beets import logging
 from beets import plugins
@@ -205,6 +206,120 @@ SD_REPLACE = [
     (r'&', 'and'),
 ]
 
+# Characters dropped by the basic distance comparison.
+SD_NONALNUM = re.compile(r'[^a-z0-9]')
+
+# Normalized strings are cached so that each distinct string is only
+# transliterated and pattern-stripped once, no matter how many times it
+# appears in a cost matrix. The cache is bounded and is emptied at the
+# start of each matching task by `clear_string_dist_cache`.
+_SD_CACHE_SIZE = 10000
+_sd_cache = {}
+_sd_regexes = {}
+
+
+def clear_string_dist_cache():
+    """Forget all strings normalized by `string_dist` so far.
+    """
+    _sd_cache.clear()
+
+
+def _sd_memoize(kind, func, value):
+    """Return `func(value)`, memoized in the normalization cache under
+    `(kind, value)`.
+    """
+    key = (kind, value)
+    try:
+        return _sd_cache[key]
+    except KeyError:
+        pass
+    if len(_sd_cache) >= _SD_CACHE_SIZE:
+        _sd_cache.clear()
+    result = _sd_cache[key] = func(value)
+    return result
+
+
+def _sd_regex(pattern):
+    """Get a compiled version of one of the string distance patterns.
+    """
+    try:
+        return _sd_regexes[pattern]
+    except KeyError:
+        regex = _sd_regexes[pattern] = re.compile(pattern)
+        return regex
+
+
+def _levenshtein_bitparallel(str1, str2):
+    """Compute the Levenshtein distance between two strings using the
+    bit-vector algorithm by Myers and Hyyrö, with Python integers as
+    arbitrary-length bit vectors. Used when jellyfish lacks its C
+    extension.
+    """
+    if len(str1) < len(str2):
+        str1, str2 = str2, str1
+    length = len(str2)
+    if not length:
+        return len(str1)
+
+    # Bit masks of the positions at which each character appears in
+    # the (shorter) pattern string.
+    peq = {}
+    for i, char in enumerate(str2):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    full = (1 << length) - 1
+    high = 1 << (length - 1)
+    pv, mv = full, 0
+    score = length
+    for char in str1:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+    return score
+
+
+# Prefer jellyfish's edit distance when it is backed by its C extension.
+if isinstance(levenshtein_distance, types.BuiltinFunctionType):
+    _levenshtein = levenshtein_distance
+else:
+    _levenshtein = _levenshtein_bitparallel
+
+
+def _sd_alnum(value):
+    """Transliterate a string to lowercase ASCII and drop everything
+    but letters and digits.
+    """
+    return SD_NONALNUM.sub('', as_string(unidecode(value)).lower())
+
+
+def _sd_prepare(value):
+    """Apply the normalizations in `string_dist` that happen before
+    the weighted patterns are considered.
+    """
+    value = value.lower()
+
+    # Don't penalize strings that move certain words to the end. For
+    # example, "the something" should be considered equal to
+    # "something, the".
+    for word in SD_END_WORDS:
+        if value.endswith(', %s' % word):
+            value = '%s %s' % (word, value[:-len(word) - 2])
+
+    # Perform a couple of basic normalizing substitutions.
+    for pat, repl in SD_REPLACE:
+        value = _sd_regex(pat).sub(repl, value)
+    return value
+
 
 def _string_dist_basic(str1, str2):
     """Basic edit distance between two strings, ignoring
@@ -214,13 +329,13 @@ def _string_dist_basic(str1, str2):
     """
     assert isinstance(str1, six.text_type)
     assert isinstance(str2, six.text_type)
-    str1 = as_string(unidecode(str1))
-    str2 = as_string(unidecode(str2))
-    str1 = re.sub(r'[^a-z0-9]', '', str1.lower())
-    str2 = re.sub(r'[^a-z0-9]', '', str2.lower())
+    str1 = _sd_memoize('alnum', _sd_alnum, str1)
+    str2 = _sd_memoize('alnum', _sd_alnum, str2)
     if not str1 and not str2:
         return 0.0
-    return levenshtein_distance(str1, str2) / float(max(len(str1), len(str2)))
+    if str1 == str2:
+        return 0.0
+    return _levenshtein(str1, str2) / float(max(len(str1), len(str2)))
 
 
 def string_dist(str1, str2):
@@ -233,22 +348,8 @@ def string_dist(str1, str2):
     if str1 is None or str2 is None:
         return 1.0
 
-    str1 = str1.lower()
-    str2 = str2.lower()
-
-    # Don't penalize strings that move certain words to the end. For
-    # example, "the something" should be considered equal to
-    # "something, the".
-    for word in SD_END_WORDS:
-        if str1.endswith(', %s' % word):
-            str1 = '%s %s' % (word, str1[:-len(word) - 2])
-        if str2.endswith(', %s' % word):
-            str2 = '%s %s' % (word, str2[:-len(word) - 2])
-
-    # Perform a couple of basic normalizing substitutions.
-    for pat, repl in SD_REPLACE:
-        str1 = re.sub(pat, repl, str1)
-        str2 = re.sub(pat, repl, str2)
+    str1 = _sd_memoize('prepare', _sd_prepare, str1)
+    str2 = _sd_memoize('prepare', _sd_prepare, str2)
 
     # Change the weight for certain string portions matched by a set
     # of regular expressions. We gradually change the strings and build
@@ -258,8 +359,9 @@ def string_dist(str1, str2):
     penalty = 0.0
     for pat, weight in SD_PATTERNS:
         # Get strings that drop the pattern.
-        case_str1 = re.sub(pat, '', str1)
-        case_str2 = re.sub(pat, '', str2)
+        strip = _sd_regex(pat).sub
+        case_str1 = _sd_memoize(pat, lambda s: strip('', s), str1)
+        case_str2 = _sd_memoize(pat, lambda s: strip('', s), str2)
 
         if case_str1 != str1 or case_str2 != str2:
             # If the pattern was present (i.e., it is deleted in the
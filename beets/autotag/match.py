@@ -23,6 +23,7 @@ import datetime
 import re
 from munkres import Munkres
 from collections import namedtuple
+import six
 
 from beets import logging
 from beets import plugins
@@ -31,6 +32,11 @@ from beets.util import plurality
 from beets.autotag import hooks
 from beets.util.enumeration import OrderedEnum
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Artist signals that indicate "various artists". These are used at the
 # album level to determine whether a given release is likely a VA
 # release and also on the track level to to remove the penalty for
@@ -87,23 +93,171 @@ def current_metadata(items):
     return likelies, consensus
 
 
-def assign_items(items, tracks):
-    """Given a list of Items and a list of TrackInfo objects, find the
-    best mapping between them. Returns a mapping from Items to TrackInfo
-    objects, a set of extra Items, and a set of extra TrackInfo
-    objects. These "extra" objects occur when there is an unequal number
-    of objects of the two types.
+def track_costs(items, tracks):
+    """Construct the cost matrix for `assign_items` as a list of lists
+    of `track_distance` Distance objects, one row per item.
     """
-    # Construct the cost matrix.
     costs = []
     for item in items:
         row = []
         for i, track in enumerate(tracks):
             row.append(track_distance(item, track))
         costs.append(row)
+    return costs
+
+
+def _plugins_implement(method):
+    """Return True if any loaded plugin overrides the `BeetsPlugin`
+    method named `method`.
+    """
+    base = six.get_unbound_function(getattr(plugins.BeetsPlugin, method))
+    for plugin in plugins.find_plugins():
+        func = six.get_unbound_function(getattr(type(plugin), method))
+        if func is not base:
+            return True
+    return False
+
+
+def track_cost_matrix(items, tracks):
+    """Compute the same costs as `track_costs` as a NumPy matrix of
+    floats. The distance components are computed for all item/track
+    pairs at once and then combined with the configured weights.
+    Requires NumPy.
+    """
+    weights = hooks.Distance._weights
+    shape = (len(items), len(tracks))
+    raw = numpy.zeros(shape)
+    dist_max = numpy.zeros(shape)
+
+    # Length.
+    grace = config['match']['track_length_grace'].as_number()
+    length_max = config['match']['track_length_max'].as_number()
+    has_length = numpy.array([bool(t.length) for t in tracks])
+    if has_length.any():
+        item_lengths = numpy.array([i.length for i in items], dtype=float)
+        track_lengths = numpy.array([t.length or 0.0 for t in tracks],
+                                    dtype=float)
+        diff = numpy.abs(item_lengths[:, None] - track_lengths) - grace
+        if length_max:
+            ratio = numpy.maximum(numpy.minimum(diff, length_max), 0) / \
+                float(length_max)
+        else:
+            ratio = numpy.zeros(shape)
+        raw += numpy.where(has_length, ratio, 0.0) * weights['track_length']
+        dist_max += has_length * weights['track_length']
+
+    # Title.
+    titles = numpy.array([[hooks.string_dist(i.title, t.title)
+                           for t in tracks] for i in items])
+    raw += titles * weights['track_title']
+    dist_max += weights['track_title']
+
+    # Track index. Missing indices are replaced with -1, which never
+    # matches a (non-zero) item track number.
+    item_tracks = numpy.array([i.track or 0 for i in items])
+    indices = numpy.array([t.index or 0 for t in tracks])
+    medium_indices = numpy.array([-1 if t.medium_index is None
+                                  else t.medium_index for t in tracks])
+    has_index = (item_tracks > 0)[:, None] & (indices > 0)
+    index_changed = (item_tracks[:, None] != medium_indices) & \
+        (item_tracks[:, None] != indices)
+    raw += (has_index & index_changed) * weights['track_index']
+    dist_max += has_index * weights['track_index']
+
+    # Track ID.
+    has_id = numpy.array([bool(i.mb_trackid) for i in items])
+    if has_id.any():
+        item_ids = numpy.array([i.mb_trackid for i in items], dtype=object)
+        track_ids = numpy.array([t.track_id for t in tracks], dtype=object)
+        id_changed = item_ids[:, None] != track_ids
+        raw += (has_id[:, None] & id_changed) * weights['track_id']
+        dist_max += has_id[:, None] * weights['track_id']
 
-    # Find a minimum-cost bipartite matching.
-    matching = Munkres().compute(costs)
+    # Plugins.
+    if _plugins_implement('track_distance'):
+        for i, item in enumerate(items):
+            for j, track in enumerate(tracks):
+                dist = plugins.track_distance(item, track)
+                raw[i, j] += dist.raw_distance
+                dist_max[i, j] += dist.max_distance
+
+    costs = numpy.zeros(shape)
+    numpy.divide(raw, dist_max, out=costs, where=dist_max > 0)
+    return costs
+
+
+def linear_sum_assignment(costs):
+    """Find a minimum-cost assignment for a (possibly rectangular) cost
+    matrix given as a NumPy array. Returns a list of (row, column)
+    pairs, sorted by row, like `Munkres.compute`.
+
+    This is the O(n^3) shortest augmenting path formulation of the
+    Hungarian algorithm with row and column potentials; the inner scan
+    over columns is vectorized.
+    """
+    costs = numpy.asarray(costs, dtype=float)
+    transposed = costs.shape[0] > costs.shape[1]
+    if transposed:
+        costs = costs.T
+    rows, cols = costs.shape
+
+    # Potentials, and the (1-based) row assigned to each column, with
+    # an extra dummy column 0 used as the root of each search.
+    row_pot = numpy.zeros(rows + 1)
+    col_pot = numpy.zeros(cols + 1)
+    col_row = numpy.zeros(cols + 1, dtype=int)
+    way = numpy.zeros(cols + 1, dtype=int)
+
+    for row in range(1, rows + 1):
+        col_row[0] = row
+        col = 0
+        min_slack = numpy.full(cols + 1, numpy.inf)
+        used = numpy.zeros(cols + 1, dtype=bool)
+        while True:
+            used[col] = True
+            cur_row = col_row[col]
+            slack = costs[cur_row - 1] - row_pot[cur_row] - col_pot[1:]
+            better = ~used[1:] & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = col
+            candidates = numpy.where(used[1:], numpy.inf, min_slack[1:])
+            next_col = int(numpy.argmin(candidates)) + 1
+            delta = candidates[next_col - 1]
+
+            row_pot[col_row[used]] += delta
+            col_pot[used] -= delta
+            min_slack[~used] -= delta
+
+            col = next_col
+            if not col_row[col]:
+                break
+
+        # Flip the augmenting path.
+        while col:
+            prev = way[col]
+            col_row[col] = col_row[prev]
+            col = prev
+
+    matching = [(col_row[j] - 1, j - 1) for j in range(1, cols + 1)
+                if col_row[j]]
+    if transposed:
+        matching = [(j, i) for i, j in matching]
+    return sorted((int(i), int(j)) for i, j in matching)
+
+
+def assign_items(items, tracks):
+    """Given a list of Items and a list of TrackInfo objects, find the
+    best mapping between them. Returns a mapping from Items to TrackInfo
+    objects, a set of extra Items, and a set of extra TrackInfo
+    objects. These "extra" objects occur when there is an unequal number
+    of objects of the two types.
+    """
+    # Find a minimum-cost bipartite matching, using the vectorized cost
+    # matrix when NumPy is available.
+    if numpy is not None and items and tracks:
+        matching = linear_sum_assignment(track_cost_matrix(items, tracks))
+    else:
+        matching = Munkres().compute(track_costs(items, tracks))
 
     # Produce the output matching.
     mapping = dict((items[i], tracks[j]) for (i, j) in matching)
@@ -157,17 +311,12 @@ def track_distance(item, track_info, incl_artist=False):
     return dist
 
 
-def distance(items, album_info, mapping):
-    """Determines how "significant" an album metadata change would be.
-    Returns a Distance object. `album_info` is an AlbumInfo object
-    reflecting the album to be compared. `items` is a sequence of all
-    Item objects that will be matched (order is not important).
-    `mapping` is a dictionary mapping Items to TrackInfo objects; the
-    keys are a subset of `items` and the values are a subset of
-    `album_info.tracks`.
+def _album_info_distance(likelies, album_info):
+    """Compute the album-level components of `distance`: those that
+    only compare the current metadata `likelies` (see
+    `current_metadata`) with `album_info`, and not individual tracks.
+    Returns a Distance object.
     """
-    likelies, _ = current_metadata(items)
-
     dist = hooks.Distance()
 
     # Artist, if not various.
@@ -243,6 +392,21 @@ def distance(items, album_info, mapping):
         dist.add_equality('album_id', likelies['mb_albumid'],
                           album_info.album_id)
 
+    return dist
+
+
+def distance(items, album_info, mapping):
+    """Determines how "significant" an album metadata change would be.
+    Returns a Distance object. `album_info` is an AlbumInfo object
+    reflecting the album to be compared. `items` is a sequence of all
+    Item objects that will be matched (order is not important).
+    `mapping` is a dictionary mapping Items to TrackInfo objects; the
+    keys are a subset of `items` and the values are a subset of
+    `album_info.tracks`.
+    """
+    likelies, _ = current_metadata(items)
+    dist = _album_info_distance(likelies, album_info)
+
     # Tracks.
     dist.tracks = {}
     for item, track in mapping.items():
@@ -263,6 +427,31 @@ def distance(items, album_info, mapping):
     return dist
 
 
+def distance_lower_bound(items, album_info):
+    """Return a lower bound for the `distance` between `items` and
+    `album_info` under the mapping that `assign_items` would produce,
+    without matching any tracks.
+
+    The bound relies on the track assignment always pairing as many
+    items and tracks as possible, and on each per-track distance being
+    non-negative. Returns None when plugins contribute album-level
+    distances, which cannot be bounded.
+    """
+    if _plugins_implement('album_distance'):
+        return None
+    likelies, _ = current_metadata(items)
+    dist = _album_info_distance(likelies, album_info)
+
+    matched = min(len(items), len(album_info.tracks))
+    for i in range(matched):
+        dist.add('tracks', 0.0)
+    for i in range(len(album_info.tracks) - matched):
+        dist.add('missing_tracks', 1.0)
+    for i in range(len(items) - matched):
+        dist.add('unmatched_tracks', 1.0)
+    return dist.distance
+
+
 def match_by_id(items):
     """If the items are tagged with a MusicBrainz album ID, returns an
     AlbumInfo object for the corresponding album. Otherwise, returns
@@ -343,6 +532,18 @@ def _sort_candidates(candidates):
     return sorted(candidates, key=lambda match: match.distance)
 
 
+def _prune_threshold(results):
+    """Get the distance that a new album candidate must not exceed to be
+    among the best `match.prune_candidates` results found so far. Return
+    None if pruning is disabled or there are not enough results yet.
+    """
+    limit = config['match']['prune_candidates'].get(int)
+    if not limit or len(results) < limit:
+        return None
+    dists = sorted(match.distance.distance for match in results.values())
+    return dists[limit - 1]
+
+
 def _add_candidate(items, results, info):
     """Given a candidate AlbumInfo object, attempt to add the candidate
     to the output dictionary of AlbumMatch objects. This involves
@@ -367,6 +568,14 @@ def _add_candidate(items, results, info):
             log.debug(u'Ignored. Missing required tag: {0}', req_tag)
             return
 
+    # Skip candidates that cannot be among the best matches so far.
+    threshold = _prune_threshold(results)
+    if threshold is not None:
+        bound = distance_lower_bound(items, info)
+        if bound is not None and bound > threshold:
+            log.debug(u'Pruned. Distance is at least {0:.2f}.', bound)
+            return
+
     # Find mapping between the items and the track info.
     mapping, extra_items, extra_tracks = assign_items(items, info.tracks)
 
@@ -404,6 +613,8 @@ def tag_album(items, search_artist=None, search_album=None,
     The recommendation is calculated from the match quality of the
     candidates.
     """
+    hooks.clear_string_dist_cache()
+
     # Get current metadata.
     likelies, consensus = current_metadata(items)
     cur_artist = likelies['artist']
@@ -474,6 +685,8 @@ def tag_item(item, search_artist=None, search_title=None,
     title. `search_ids` may be used for restricting the search to a list
     of metadata backend IDs.
     """
+    hooks.clear_string_dist_cache()
+
     # Holds candidates found so far: keys are MBIDs; values are
     # (distance, TrackInfo) pairs.
     candidates = {}
@@ -26,7 +26,7 @@ import contextlib
 import collections
 
 import beets
-from beets.util.functemplate import Template
+from beets.util import functemplate
 from beets.util import py3_path
 from beets.dbcore import types
 from .query import MatchQuery, NullSort, TrueQuery
@@ -217,7 +217,46 @@ class Model(object):
         If the field has no explicit type, it is given the base `Type`,
         which does no conversion.
         """
-        return cls._fields.get(key) or cls._types.get(key) or types.DEFAULT
+        return cls._type_table().get(key, types.DEFAULT)
+
+    @classmethod
+    def _type_table(cls):
+        """Get a dictionary with the types of the fixed fields and of
+        the typed flexible fields.
+
+        The dictionary is kept until `_types` is replaced or
+        `_clear_type_cache` is called.
+        """
+        cached = cls.__dict__.get('_type_cache')
+        if cached is None or cached[0] is not cls._types:
+            table = dict(cls._types)
+            table.update(cls._fields)
+            cached = (cls._types, table)
+            cls._type_cache = cached
+        return cached[1]
+
+    @classmethod
+    def _clear_type_cache(cls):
+        """Forget the types of the fields of this class and its
+        subclasses. Must be called after changing `_types` in place
+        (e.g., to add the types provided by plugins).
+        """
+        classes = [cls]
+        while classes:
+            klass = classes.pop()
+            klass._type_cache = None
+            classes.extend(klass.__subclasses__())
+
+    @classmethod
+    def _fixed_keys(cls):
+        """Get the names of the fixed fields as a list, which is only
+        built once for each class. It must not be modified.
+        """
+        keys = cls.__dict__.get('_fixed_keys_list')
+        if keys is None:
+            keys = list(cls._fields)
+            cls._fixed_keys_list = keys
+        return keys
 
     def __getitem__(self, key):
         """Get the value for a field. Raise a KeyError if the field is
@@ -269,7 +308,7 @@ class Model(object):
         `computed` parameter controls whether computed (plugin-provided)
         fields are included in the key list.
         """
-        base_keys = list(self._fields) + list(self._values_flex.keys())
+        base_keys = self._fixed_keys() + list(self._values_flex.keys())
         if computed:
             return base_keys + list(self._getters().keys())
         else:
@@ -280,7 +319,7 @@ class Model(object):
         """Get a list of available keys for objects of this type.
         Includes fixed and computed fields.
         """
-        return list(cls._fields) + list(cls._getters().keys())
+        return cls._fixed_keys() + list(cls._getters().keys())
 
     # Act like a dictionary.
 
@@ -459,7 +498,7 @@ class Model(object):
         """
         # Perform substitution.
         if isinstance(template, six.string_types):
-            template = Template(template)
+            template = functemplate.template(template)
         return template.substitute(self.formatted(for_path),
                                    self._template_funcs())
 
@@ -486,6 +525,11 @@ class Results(object):
     """An item query result set. Iterating over the collection lazily
     constructs LibModel objects that reflect database rows.
     """
+    flex_chunk_size = 100
+    """The number of upcoming rows whose flexible attributes are fetched
+    together in one query.
+    """
+
     def __init__(self, model_class, rows, db, query=None, sort=None):
         """Create a result set that will construct objects of type
         `model_class`.
@@ -510,13 +554,16 @@ class Results(object):
         # We keep a queue of rows we haven't yet consumed for
         # materialization. We preserve the original total number of
         # rows.
-        self._rows = rows
+        self._rows = collections.deque(rows)
         self._row_count = len(rows)
 
         # The materialized objects corresponding to rows that have been
         # consumed.
         self._objects = []
 
+        # Flexible attributes fetched ahead for upcoming rows, by id.
+        self._flex_rows = {}
+
     def _get_objects(self):
         """Construct and generate Model objects for they query. The
         objects are returned in the order emitted from the database; no
@@ -538,7 +585,7 @@ class Results(object):
             # and produce it.
             else:
                 while self._rows:
-                    row = self._rows.pop(0)
+                    row = self._rows.popleft()
                     obj = self._make_model(row)
                     # If there is a slow-query predicate, ensurer that the
                     # object passes it.
@@ -561,15 +608,36 @@ class Results(object):
             # Objects are pre-sorted (i.e., by the database).
             return self._get_objects()
 
+    def _fetch_flex(self, entity_id):
+        """Get the flexible attribute rows for the object with the given
+        id. The attributes of the next few rows waiting to be
+        materialized are fetched in the same query.
+        """
+        if entity_id not in self._flex_rows:
+            ids = [entity_id]
+            for row in self._rows:
+                if len(ids) >= self.flex_chunk_size:
+                    break
+                ids.append(row['id'])
+            for i in ids:
+                self._flex_rows[i] = []
+
+            with self.db.transaction() as tx:
+                flex_rows = tx.query(
+                    'SELECT * FROM {0} WHERE entity_id IN ({1})'.format(
+                        self.model_class._flex_table,
+                        ','.join('?' * len(ids))
+                    ),
+                    ids
+                )
+            for flex_row in flex_rows:
+                self._flex_rows[flex_row['entity_id']].append(flex_row)
+
+        return self._flex_rows.pop(entity_id)
+
     def _make_model(self, row):
         # Get the flexible attributes for the object.
-        with self.db.transaction() as tx:
-            flex_rows = tx.query(
-                'SELECT * FROM {0} WHERE entity_id=?'.format(
-                    self.model_class._flex_table
-                ),
-                (row['id'],)
-            )
+        flex_rows = self._fetch_flex(row['id'])
 
         cols = dict(row)
         values = dict((k, v) for (k, v) in cols.items()
@@ -23,9 +23,10 @@ import os
 import re
 import pickle
 import itertools
+import sqlite3
+import threading
 from collections import defaultdict
 from tempfile import mkdtemp
-from bisect import insort, bisect_left
 from contextlib import contextmanager
 import shutil
 import time
@@ -66,7 +67,7 @@ class ImportAbort(Exception):
 # Utilities.
 
 def _open_state():
-    """Reads the state file, returning a dictionary."""
+    """Reads the legacy pickled state file, returning a dictionary."""
     try:
         with open(config['statefile'].as_filename(), 'rb') as f:
             return pickle.load(f)
@@ -79,71 +80,137 @@ def _open_state():
         return {}
 
 
-def _save_state(state):
-    """Writes the state dictionary out to disk."""
-    try:
-        with open(config['statefile'].as_filename(), 'wb') as f:
-            pickle.dump(state, f)
-    except IOError as exc:
-        log.error(u'state file could not be written: {0}', exc)
+# The import state (progress and history, below) is kept in a small
+# SQLite database so that lookups are indexed and each update only
+# appends rows. A single connection, guarded by a lock, is shared
+# between the importer's pipeline threads.
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress_roots (
+    toppath BLOB PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS progress (
+    toppath BLOB,
+    path BLOB,
+    PRIMARY KEY (toppath, path)
+);
+CREATE TABLE IF NOT EXISTS history (
+    paths BLOB PRIMARY KEY
+);
+"""
 
+_state_lock = threading.Lock()
+_state_conn = None  # A (path, connection) pair.
 
-# Utilities for reading and writing the beets progress file, which
-# allows long tagging tasks to be resumed when they pause (or crash).
 
-def progress_read():
+def _history_key(paths):
+    """Encode a sequence of bytestring paths as a single blob. Paths
+    cannot contain NUL bytes, so they are used as the separator.
+    """
+    return library.BLOB_TYPE(b'\0'.join(paths))
+
+
+def _migrate_state(conn):
+    """Copy the progress and history from the legacy pickled state
+    file, if there is one, into a new state database.
+    """
     state = _open_state()
-    return state.setdefault(PROGRESS_KEY, {})
+    for toppath, paths in state.get(PROGRESS_KEY, {}).items():
+        conn.execute('INSERT OR IGNORE INTO progress_roots VALUES (?)',
+                     (library.BLOB_TYPE(toppath),))
+        conn.executemany(
+            'INSERT OR IGNORE INTO progress VALUES (?, ?)',
+            [(library.BLOB_TYPE(toppath), library.BLOB_TYPE(path))
+             for path in paths],
+        )
+    conn.executemany('INSERT OR IGNORE INTO history VALUES (?)',
+                     [(_history_key(paths),)
+                      for paths in state.get(HISTORY_KEY, ())])
 
 
 @contextmanager
-def progress_write():
-    state = _open_state()
-    progress = state.setdefault(PROGRESS_KEY, {})
-    yield progress
-    _save_state(state)
+def _state_db():
+    """A context manager providing the connection to the import state
+    database. Changes are committed when the block exits. The database
+    is created, and the legacy state file migrated, on first use.
+    """
+    global _state_conn
+    path = config['statedb'].as_filename()
+    with _state_lock:
+        if _state_conn is None or _state_conn[0] != path:
+            if _state_conn is not None:
+                _state_conn[1].close()
+            conn = sqlite3.connect(path, check_same_thread=False)
+            existing = conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'history'"
+            ).fetchone()
+            with conn:
+                conn.executescript(STATE_SCHEMA)
+                if not existing:
+                    _migrate_state(conn)
+            _state_conn = path, conn
+
+        conn = _state_conn[1]
+        with conn:
+            yield conn
+
+
+def close_state_db():
+    """Close the connection to the import state database, if it is
+    open. It is reopened on next use.
+    """
+    global _state_conn
+    with _state_lock:
+        if _state_conn is not None:
+            _state_conn[1].close()
+            _state_conn = None
 
 
+# Utilities for reading and writing the beets progress file, which
+# allows long tagging tasks to be resumed when they pause (or crash).
+
 def progress_add(toppath, *paths):
     """Record that the files under all of the `paths` have been imported
     under `toppath`.
     """
-    with progress_write() as state:
-        imported = state.setdefault(toppath, [])
-        for path in paths:
-            # Normally `progress_add` will be called with the path
-            # argument increasing. This is because of the ordering in
-            # `albums_in_dir`. We take advantage of that to make the
-            # code faster
-            if imported and imported[len(imported) - 1] <= path:
-                imported.append(path)
-            else:
-                insort(imported, path)
+    toppath = library.BLOB_TYPE(toppath)
+    with _state_db() as conn:
+        conn.execute('INSERT OR IGNORE INTO progress_roots VALUES (?)',
+                     (toppath,))
+        conn.executemany('INSERT OR IGNORE INTO progress VALUES (?, ?)',
+                         [(toppath, library.BLOB_TYPE(path))
+                          for path in paths])
 
 
 def progress_element(toppath, path):
     """Return whether `path` has been imported in `toppath`.
     """
-    state = progress_read()
-    if toppath not in state:
-        return False
-    imported = state[toppath]
-    i = bisect_left(imported, path)
-    return i != len(imported) and imported[i] == path
+    with _state_db() as conn:
+        row = conn.execute(
+            'SELECT 1 FROM progress WHERE toppath = ? AND path = ?',
+            (library.BLOB_TYPE(toppath), library.BLOB_TYPE(path))
+        ).fetchone()
+    return row is not None
 
 
 def has_progress(toppath):
     """Return `True` if there exist paths that have already been
     imported under `toppath`.
     """
-    state = progress_read()
-    return toppath in state
+    with _state_db() as conn:
+        row = conn.execute(
+            'SELECT 1 FROM progress_roots WHERE toppath = ?',
+            (library.BLOB_TYPE(toppath),)
+        ).fetchone()
+    return row is not None
 
 
 def progress_reset(toppath):
-    with progress_write() as state:
-        if toppath in state:
-            del state[toppath]
+    toppath = library.BLOB_TYPE(toppath)
+    with _state_db() as conn:
+        conn.execute('DELETE FROM progress_roots WHERE toppath = ?',
+                     (toppath,))
+        conn.execute('DELETE FROM progress WHERE toppath = ?', (toppath,))
 
 
 # Similarly, utilities for manipulating the "incremental" import log.
@@ -154,22 +221,26 @@ def history_add(paths):
     """Indicate that the import of the album in `paths` is completed and
     should not be repeated in incremental imports.
     """
-    state = _open_state()
-    if HISTORY_KEY not in state:
-        state[HISTORY_KEY] = set()
+    with _state_db() as conn:
+        conn.execute('INSERT OR IGNORE INTO history VALUES (?)',
+                     (_history_key(paths),))
 
-    state[HISTORY_KEY].add(tuple(paths))
 
-    _save_state(state)
+def history_element(paths):
+    """Return whether the album in `paths` was imported before.
+    """
+    with _state_db() as conn:
+        row = conn.execute('SELECT 1 FROM history WHERE paths = ?',
+                           (_history_key(paths),)).fetchone()
+    return row is not None
 
 
 def history_get():
     """Get the set of completed path tuples in incremental imports.
     """
-    state = _open_state()
-    if HISTORY_KEY not in state:
-        return set()
-    return state[HISTORY_KEY]
+    with _state_db() as conn:
+        rows = conn.execute('SELECT paths FROM history').fetchall()
+    return set(tuple(bytes(row[0]).split(b'\0')) for row in rows)
 
 
 # Abstract session class.
@@ -322,6 +393,8 @@ class ImportSession(object):
         except ImportAbort:
             # User aborted operation. Silently stop.
             pass
+        finally:
+            close_state_db()
 
     # Incremental and resumed imports
 
@@ -330,20 +403,13 @@ class ImportSession(object):
         been imported in a previous session.
         """
         if self.is_resuming(toppath) \
-           and all([progress_element(toppath, p) for p in paths]):
+           and all(progress_element(toppath, p) for p in paths):
             return True
-        if self.config['incremental'] \
-           and tuple(paths) in self.history_dirs:
+        if self.config['incremental'] and history_element(paths):
             return True
 
         return False
 
-    @property
-    def history_dirs(self):
-        if not hasattr(self, '_history_dirs'):
-            self._history_dirs = history_get()
-        return self._history_dirs
-
     def is_resuming(self, toppath):
         """Return `True` if user wants to resume import of this path.
 
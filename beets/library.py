@@ -22,6 +22,7 @@ import sys
 import unicodedata
 import time
 import re
+import threading
 import six
 
 from beets import logging
@@ -29,7 +30,8 @@ from beets.mediafile import MediaFile, UnreadableFileError
 from beets import plugins
 from beets import util
 from beets.util import bytestring_path, syspath, normpath, samefile
-from beets.util.functemplate import Template
+from beets.util import fileplan
+from beets.util.functemplate import Template, template
 from beets import dbcore
 from beets.dbcore import types
 import beets
@@ -317,11 +319,45 @@ class LibModel(dbcore.Model):
     """Config key that specifies how an instance should be formatted.
     """
 
+    _funcs_table = None
+    """A `(plugin functions, function table)` pair caching the template
+    functions that do not need to be bound to a model instance.
+    """
+
+    _getters_table = None
+    """A `(plugin getters, getter table)` pair caching `_getters` for
+    each model class.
+    """
+
     def _template_funcs(self):
-        funcs = DefaultTemplateFunctions(self, self._db).functions()
-        funcs.update(plugins.template_funcs())
+        plugin_funcs = plugins.template_funcs()
+        cached = LibModel._funcs_table
+        if cached is None or cached[0] is not plugin_funcs:
+            table = dict(DefaultTemplateFunctions._static_funcs)
+            table.update(plugin_funcs)
+            LibModel._funcs_table = cached = (plugin_funcs, table)
+
+        # Only a handful of functions need the model being evaluated.
+        funcs = dict(cached[1])
+        bound = DefaultTemplateFunctions(self, self._db)
+        for name in DefaultTemplateFunctions._bound_names:
+            if name not in plugin_funcs:
+                funcs[name] = getattr(bound, bound._prefix + name)
         return funcs
 
+    @classmethod
+    def _cached_getters(cls, plugin_getters, builtin_getters):
+        """Merge the plugin-provided getters with the class's own,
+        reusing the previous table as long as the plugin getters stay
+        the same.
+        """
+        cached = cls.__dict__.get('_getters_table')
+        if cached is None or cached[0] is not plugin_getters:
+            getters = dict(plugin_getters)
+            getters.update(builtin_getters)
+            cls._getters_table = cached = (plugin_getters, getters)
+        return cached[1]
+
     def store(self, fields=None):
         super(LibModel, self).store(fields)
         plugins.send('database_change', lib=self._db, model=self)
@@ -498,12 +534,16 @@ class Item(LibModel):
 
     _format_config_key = 'format_item'
 
+    _cached_album = None
+    """The `Album` for this item prefetched by `Library.items`, if any.
+    """
+
     @classmethod
     def _getters(cls):
-        getters = plugins.item_field_getters()
-        getters['singleton'] = lambda i: i.album_id is None
-        getters['filesize'] = Item.try_filesize  # In bytes.
-        return getters
+        return cls._cached_getters(plugins.item_field_getters(), {
+            'singleton': lambda i: i.album_id is None,
+            'filesize': lambda i: i.try_filesize(),  # In bytes.
+        })
 
     @classmethod
     def from_path(cls, path):
@@ -525,7 +565,7 @@ class Item(LibModel):
             elif isinstance(value, BLOB_TYPE):
                 value = bytes(value)
 
-        if key in MediaFile.fields():
+        if key in MediaFile.field_names():
             self.mtime = 0  # Reset mtime on dirty.
 
         super(Item, self).__setitem__(key, value)
@@ -545,6 +585,9 @@ class Item(LibModel):
         """
         if not self._db:
             return None
+        album = self._cached_album
+        if album is not None and album.id == self.album_id:
+            return album
         return self._db.get_album(self)
 
     # Interaction with file metadata.
@@ -567,8 +610,7 @@ class Item(LibModel):
         except UnreadableFileError as exc:
             raise ReadError(read_path, exc)
 
-        for key in self._media_fields:
-            value = getattr(mediafile, key)
+        for key, value in mediafile.read_fields(self._media_fields).items():
             if isinstance(value, six.integer_types):
                 if value.bit_length() > 63:
                     value = 0
@@ -594,6 +636,14 @@ class Item(LibModel):
 
         Can raise either a `ReadError` or a `WriteError`.
         """
+        path, item_tags = self._prepare_write(path, tags)
+        self._save_tags(path, item_tags, beets.config['id3v23'].get(bool))
+        self._finish_write(path)
+
+    def _prepare_write(self, path=None, tags=None):
+        """Get the path and the tags that `write` should save and send
+        the `write` event.
+        """
         if path is None:
             path = self.path
         else:
@@ -606,21 +656,30 @@ class Item(LibModel):
         if tags is not None:
             item_tags.update(tags)
         plugins.send('write', item=self, path=path, tags=item_tags)
+        return path, item_tags
 
+    def _save_tags(self, path, tags, id3v23):
+        """Save `tags` into the media file at `path`. This is the part of
+        `write` that does the file I/O; it sends no events and does not
+        change the item, so it can run on a worker thread.
+        """
         # Open the file.
         try:
-            mediafile = MediaFile(syspath(path),
-                                  id3v23=beets.config['id3v23'].get(bool))
+            mediafile = MediaFile(syspath(path), id3v23=id3v23)
         except UnreadableFileError as exc:
             raise ReadError(self.path, exc)
 
         # Write the tags to the file.
-        mediafile.update(item_tags)
+        mediafile.update(tags)
         try:
             mediafile.save()
         except UnreadableFileError as exc:
             raise WriteError(self.path, exc)
 
+    def _finish_write(self, path):
+        """Update the item after its tags were saved to `path` and send
+        the `after_write` event.
+        """
         # The file has a new mtime.
         if path == self.path:
             self.mtime = self.current_mtime()
@@ -728,8 +787,6 @@ class Item(LibModel):
             util.remove(self.path)
             util.prune_dirs(os.path.dirname(self.path), self._db.directory)
 
-        self._db._memotable = {}
-
     def move(self, copy=False, link=False, basedir=None, with_album=True,
              store=True):
         """Move the item to its designated location within the library
@@ -789,70 +846,9 @@ class Item(LibModel):
         directory for the destination.
         """
         self._check_db()
-        platform = platform or sys.platform
-        basedir = basedir or self._db.directory
-        path_formats = path_formats or self._db.path_formats
-
-        # Use a path format based on a query, falling back on the
-        # default.
-        for query, path_format in path_formats:
-            if query == PF_KEY_DEFAULT:
-                continue
-            query, _ = parse_query_string(query, type(self))
-            if query.match(self):
-                # The query matches the item! Use the corresponding path
-                # format.
-                break
-        else:
-            # No query matched; fall back to default.
-            for query, path_format in path_formats:
-                if query == PF_KEY_DEFAULT:
-                    break
-            else:
-                assert False, u"no default path format"
-        if isinstance(path_format, Template):
-            subpath_tmpl = path_format
-        else:
-            subpath_tmpl = Template(path_format)
-
-        # Evaluate the selected template.
-        subpath = self.evaluate_template(subpath_tmpl, True)
-
-        # Prepare path for output: normalize Unicode characters.
-        if platform == 'darwin':
-            subpath = unicodedata.normalize('NFD', subpath)
-        else:
-            subpath = unicodedata.normalize('NFC', subpath)
-
-        if beets.config['asciify_paths']:
-            subpath = util.asciify_path(
-                subpath,
-                beets.config['path_sep_replace'].as_str()
-            )
-
-        maxlen = beets.config['max_filename_length'].get(int)
-        if not maxlen:
-            # When zero, try to determine from filesystem.
-            maxlen = util.max_filename_length(self._db.directory)
-
-        subpath, fellback = util.legalize_path(
-            subpath, self._db.replacements, maxlen,
-            os.path.splitext(self.path)[1], fragment
-        )
-        if fellback:
-            # Print an error message if legalization fell back to
-            # default replacements because of the maximum length.
-            log.warning(
-                u'Fell back to default replacements when naming '
-                u'file {}. Configure replacements to avoid lengthening '
-                u'the filename.',
-                subpath
-            )
-
-        if fragment:
-            return util.as_string(subpath)
-        else:
-            return normpath(os.path.join(basedir, subpath))
+        return _DestinationFormatter(
+            self._db, fragment, basedir, platform, path_formats
+        ).destination(self)
 
 
 class Album(LibModel):
@@ -948,16 +944,17 @@ class Album(LibModel):
     def _getters(cls):
         # In addition to plugin-provided computed fields, also expose
         # the album's directory as `path`.
-        getters = plugins.album_field_getters()
-        getters['path'] = Album.item_dir
-        getters['albumtotal'] = Album._albumtotal
-        return getters
+        return cls._cached_getters(plugins.album_field_getters(), {
+            'path': lambda a: a.item_dir(),
+            'albumtotal': lambda a: a._albumtotal(),
+        })
 
     def items(self):
         """Returns an iterable over the items associated with this
         album.
         """
-        return self._db.items(dbcore.MatchQuery('album_id', self.id))
+        return self._db.items(dbcore.MatchQuery('album_id', self.id),
+                              with_albums=True)
 
     def remove(self, delete=False, with_items=True):
         """Removes this album and all its associated items from the
@@ -967,6 +964,7 @@ class Album(LibModel):
         Set with_items to False to avoid removing the album's items.
         """
         super(Album, self).remove()
+        self._db._aunique_index.invalidate(self.id)
 
         # Delete art file.
         if delete:
@@ -1076,8 +1074,7 @@ class Album(LibModel):
         image = bytestring_path(image)
         item_dir = item_dir or self.item_dir()
 
-        filename_tmpl = Template(
-            beets.config['art_filename'].as_str())
+        filename_tmpl = template(beets.config['art_filename'].as_str())
         subpath = self.evaluate_template(filename_tmpl, True)
         if beets.config['asciify_paths']:
             subpath = util.asciify_path(
@@ -1138,6 +1135,7 @@ class Album(LibModel):
 
         with self._db.transaction():
             super(Album, self).store(fields)
+            self._db._aunique_index.invalidate(self.id)
             if track_updates:
                 for item in self.items():
                     for key, value in track_updates.items():
@@ -1209,6 +1207,304 @@ def parse_query_string(s, model_cls):
     return parse_query_parts(parts, model_cls)
 
 
+@util.lru_cache(maxsize=256)
+def path_format_query(s, model_cls):
+    """Parse the query string of a path format into a `Query`. Results
+    are cached, since the same few queries are matched against every
+    item whose destination is computed. The cache must be cleared (with
+    `path_format_query.cache_clear()`) when the model's field types
+    change.
+    """
+    query, _ = parse_query_string(s, model_cls)
+    return query
+
+
+class _DestinationFormatter(object):
+    """Computes item destinations (see `Item.destination`) for a
+    library. Everything that does not depend on the item -- the path
+    format templates and queries, the configuration, the filesystem's
+    maximum filename length and already legalized path components -- is
+    looked up once and shared by all the items formatted with one
+    instance.
+    """
+
+    def __init__(self, lib, fragment=False, basedir=None, platform=None,
+                 path_formats=None):
+        self.lib = lib
+        self.fragment = fragment
+        self.basedir = basedir or lib.directory
+        platform = platform or sys.platform
+        self.unicode_form = 'NFD' if platform == 'darwin' else 'NFC'
+
+        # Split the path formats into the query-selected ones and the
+        # default (the first one, if several are given).
+        self.formats = []
+        self.default_format = None
+        for query, path_format in path_formats or lib.path_formats:
+            if not isinstance(path_format, Template):
+                path_format = template(path_format)
+            if query == PF_KEY_DEFAULT:
+                if self.default_format is None:
+                    self.default_format = path_format
+            else:
+                self.formats.append((query, path_format))
+
+        if beets.config['asciify_paths']:
+            self.sep_replace = beets.config['path_sep_replace'].as_str()
+        else:
+            self.sep_replace = None
+
+        self.maxlen = beets.config['max_filename_length'].get(int)
+        if not self.maxlen:
+            # When zero, try to determine from filesystem.
+            self.maxlen = util.max_filename_length(lib.directory)
+
+        self.memo = {}
+
+    def path_format(self, item):
+        """Get the path format template to use for `item`.
+        """
+        # Use a path format based on a query, falling back on the
+        # default.
+        for query, path_format in self.formats:
+            if path_format_query(query, type(item)).match(item):
+                # The query matches the item! Use the corresponding path
+                # format.
+                return path_format
+        assert self.default_format is not None, u"no default path format"
+        return self.default_format
+
+    def destination(self, item):
+        """Get the destination of `item`.
+        """
+        # Evaluate the selected template.
+        subpath = item.evaluate_template(self.path_format(item), True)
+
+        # Prepare path for output: normalize Unicode characters.
+        subpath = unicodedata.normalize(self.unicode_form, subpath)
+
+        if self.sep_replace is not None:
+            subpath = util.asciify_path(subpath, self.sep_replace)
+
+        subpath, fellback = util.legalize_path(
+            subpath, self.lib.replacements, self.maxlen,
+            os.path.splitext(item.path)[1], self.fragment, self.memo
+        )
+        if fellback:
+            # Print an error message if legalization fell back to
+            # default replacements because of the maximum length.
+            log.warning(
+                u'Fell back to default replacements when naming '
+                u'file {}. Configure replacements to avoid lengthening '
+                u'the filename.',
+                subpath
+            )
+
+        if self.fragment:
+            return util.as_string(subpath)
+        else:
+            return normpath(os.path.join(self.basedir, subpath))
+
+
+class _AlbumIndex(object):
+    """An in-memory index of the albums in a library that answers
+    ``%aunique{}`` without querying the database for every album.
+
+    The field values of all albums are loaded in a single pass over the
+    album tables the first time they are needed. When an album is added,
+    stored or removed it is marked as stale and only that album is
+    reloaded before the next lookup. For each set of key fields, the
+    albums are grouped by their key values, so the albums that need to
+    be told apart are found with a dictionary lookup.
+
+    `invalidate` is called while a transaction is open, so no lock of
+    the index is ever held while the database is accessed. Every
+    invalidation gets a number from a counter so that rows loaded by
+    concurrent lookups are only merged if they are newer than what the
+    index already holds.
+    """
+
+    def __init__(self, lib):
+        self.lib = lib
+        self._lock = threading.Lock()
+        self._values = None  # Album id -> {field: value}.
+        self._merged = {}  # Album id -> invalidation its values reflect.
+        self._groups = {}  # Key fields -> {key values: set of ids}.
+        self._results = {}  # Memoized disambiguation strings.
+
+        # Protects only the two attributes below and is never held while
+        # taking another lock.
+        self._stale_lock = threading.Lock()
+        self._clock = 0
+        self._stale = {}  # Album id -> number of its last invalidation.
+
+    def invalidate(self, album_id):
+        """Mark the album with the given id as changed (or added or
+        removed).
+        """
+        with self._stale_lock:
+            self._clock += 1
+            self._stale[album_id] = self._clock
+
+    chunk_size = 200
+    """The number of albums reloaded by each query, which must stay
+    below SQLite's limit on the number of query parameters.
+    """
+
+    def _load(self, album_ids=None):
+        """Read the field values of the albums with the given ids (or
+        of all albums) from the database.
+        """
+        album_query = 'SELECT * FROM albums'
+        flex_query = 'SELECT entity_id, key, value FROM album_attributes'
+        if album_ids is None:
+            chunks = [()]
+        else:
+            album_ids = list(album_ids)
+            chunks = [tuple(album_ids[i:i + self.chunk_size])
+                      for i in range(0, len(album_ids), self.chunk_size)]
+
+        rows = []
+        flex_rows = []
+        with self.lib.transaction() as tx:
+            for chunk in chunks:
+                album_where = flex_where = ''
+                if album_ids is not None:
+                    placeholders = ','.join('?' * len(chunk))
+                    album_where = ' WHERE id IN ({0})'.format(placeholders)
+                    flex_where = ' WHERE entity_id IN ({0})'.format(
+                        placeholders
+                    )
+                rows.extend(tx.query(album_query + album_where, chunk))
+                flex_rows.extend(tx.query(flex_query + flex_where, chunk))
+
+        values = {}
+        for row in rows:
+            values[row['id']] = dict(
+                (key, Album._type(key).from_sql(row[key]))
+                for key in row.keys()
+            )
+        for row in flex_rows:
+            fields = values.get(row['entity_id'])
+            if fields is not None:
+                fields[row['key']] = \
+                    Album._type(row['key']).from_sql(row['value'])
+        return values
+
+    def _refresh(self):
+        """Make sure the index is loaded and up to date. Must be called
+        without holding `_lock`.
+        """
+        with self._stale_lock:
+            stale = dict(self._stale)
+            clock = self._clock
+
+        if self._values is None:
+            values = self._load()
+            with self._lock:
+                if self._values is not None:
+                    # Another thread loaded the index meanwhile.
+                    return
+                self._values = values
+                self._groups = {}
+                self._results.clear()
+                # The rows were read after these invalidations.
+                self._merged = dict.fromkeys(stale, clock)
+            self._forget_stale(stale)
+
+        elif stale:
+            fresh = self._load(list(stale))
+            with self._lock:
+                for album_id, version in stale.items():
+                    if self._merged.get(album_id, 0) >= version:
+                        # Newer rows were merged by another thread.
+                        continue
+                    self._merged[album_id] = version
+                    self._update(album_id, fresh.get(album_id))
+                self._results.clear()
+            self._forget_stale(stale)
+
+    def _forget_stale(self, stale):
+        """Unmark the albums that were not invalidated again since
+        `stale` was taken.
+        """
+        with self._stale_lock:
+            for album_id, version in stale.items():
+                if self._stale.get(album_id) == version:
+                    del self._stale[album_id]
+
+    def _update(self, album_id, new):
+        """Replace the values of an album with `new` (or remove it if
+        `new` is None) and move it to its new groups.
+        """
+        old = self._values.pop(album_id, None)
+        if new is not None:
+            self._values[album_id] = new
+        for keys, groups in self._groups.items():
+            if old is not None:
+                group = groups.get(self._key(old, keys))
+                if group is not None:
+                    group.discard(album_id)
+            if new is not None:
+                groups.setdefault(self._key(new, keys),
+                                  set()).add(album_id)
+
+    @staticmethod
+    def _key(fields, keys):
+        return tuple(fields.get(key, '') for key in keys)
+
+    def _group(self, album_id, keys):
+        """Get the ids of the albums sharing their `keys` values with
+        the given album.
+        """
+        groups = self._groups.get(keys)
+        if groups is None:
+            groups = {}
+            for other_id, fields in self._values.items():
+                groups.setdefault(self._key(fields, keys),
+                                  set()).add(other_id)
+            self._groups[keys] = groups
+        return groups[self._key(self._values[album_id], keys)]
+
+    def disambiguator(self, album_id, keys, disam):
+        """Find the field to disambiguate the given album with among all
+        albums that share the values of the fields in `keys`. `keys` and
+        `disam` are tuples of field names.
+
+        Return None if no disambiguation is needed (including when the
+        album does not exist), the first field in `disam` whose values
+        differ for all the albums or, if no such field exists, an empty
+        string.
+        """
+        self._refresh()
+
+        memokey = (album_id, keys, disam)
+        with self._lock:
+            if memokey in self._results:
+                return self._results[memokey]
+
+            if album_id not in self._values:
+                res = None
+            else:
+                group = self._group(album_id, keys)
+                if len(group) == 1:
+                    res = None
+                else:
+                    res = u''
+                    for field in disam:
+                        # If the set of unique values is equal to the
+                        # number of albums in the disambiguation set,
+                        # we're done -- this is sufficient
+                        # disambiguation.
+                        field_values = set(self._values[i].get(field, '')
+                                           for i in group)
+                        if len(field_values) == len(group):
+                            res = field
+                            break
+            self._results[memokey] = res
+            return res
+
+
 def _sqlite_bytelower(bytestring):
     """ A custom ``bytelower`` sqlite function so we can compare
         bytestrings in a semi case insensitive fashion.  This is to work
@@ -1222,6 +1518,46 @@ def _sqlite_bytelower(bytestring):
     return buffer(bytes(bytestring).lower())  # noqa: F821
 
 
+class AlbumPrefetchResults(dbcore.db.Results):
+    """A result set of Items that also fetches the items' albums. The
+    albums referenced by upcoming rows are queried together, in chunks,
+    and each Album object is shared by all of its items.
+    """
+    chunk_size = 200
+
+    def __init__(self, *args, **kwargs):
+        super(AlbumPrefetchResults, self).__init__(*args, **kwargs)
+        self._albums = {}
+
+    def _make_model(self, row):
+        item = super(AlbumPrefetchResults, self)._make_model(row)
+        if item.album_id is not None:
+            if item.album_id not in self._albums:
+                self._prefetch_albums(item.album_id)
+            item._cached_album = self._albums[item.album_id]
+        return item
+
+    def _prefetch_albums(self, album_id):
+        """Fetch the album with the given ID together with the unknown
+        albums of the next few rows waiting to be materialized.
+        """
+        album_ids = set([album_id])
+        for row in self._rows:
+            if len(album_ids) >= self.chunk_size:
+                break
+            if row['album_id'] is not None and \
+                    row['album_id'] not in self._albums:
+                album_ids.add(row['album_id'])
+
+        query = dbcore.OrQuery([dbcore.MatchQuery('id', i)
+                                for i in album_ids])
+        for album in self.db._fetch(Album, query):
+            self._albums[album.id] = album
+        for i in album_ids:
+            # Remember missing albums too, to avoid asking again.
+            self._albums.setdefault(i, None)
+
+
 # The Library: interface to the database.
 
 class Library(dbcore.Database):
@@ -1243,7 +1579,7 @@ class Library(dbcore.Database):
         self.path_formats = path_formats
         self.replacements = replacements
 
-        self._memotable = {}  # Used for template substitution performance.
+        self._aunique_index = _AlbumIndex(self)  # For `%aunique{}`.
 
     # Adding objects to the database.
 
@@ -1252,7 +1588,6 @@ class Library(dbcore.Database):
         database. Return the object's new id.
         """
         obj.add(self)
-        self._memotable = {}
         return obj.id
 
     def add_album(self, items):
@@ -1326,10 +1661,198 @@ class Library(dbcore.Database):
         """
         return self._fetch(Album, query, sort or self.get_default_album_sort())
 
-    def items(self, query=None, sort=None):
+    def items(self, query=None, sort=None, with_albums=False):
         """Get :class:`Item` objects matching the query.
+
+        If `with_albums` is set, the albums that the items belong to are
+        fetched in bulk as the items are produced, so that `get_album`
+        (and thus formatting and path generation) does not query the
+        database once per item.
+        """
+        results = self._fetch(Item, query,
+                              sort or self.get_default_item_sort())
+        if with_albums:
+            results = AlbumPrefetchResults(results.model_class,
+                                           results.rows, self,
+                                           results.query, results.sort)
+        return results
+
+    def destinations(self, items, fragment=False, basedir=None,
+                     platform=None, path_formats=None):
+        """Generate `(item, destination)` pairs for the given items.
+
+        The destinations are the same as those `Item.destination`
+        returns for the same arguments, but the path formats,
+        configuration and filesystem limits are looked up only once for
+        the whole batch.
         """
-        return self._fetch(Item, query, sort or self.get_default_item_sort())
+        formatter = _DestinationFormatter(self, fragment, basedir,
+                                          platform, path_formats)
+        for item in items:
+            yield item, formatter.destination(item)
+
+    def write_items(self, items, store=False, threads=None,
+                    chunk_size=256):
+        """Write the tags of many items to their files, like calling
+        `Item.try_write` on each of them. The files are saved on a pool
+        of `threads` worker threads, while the plugin events are sent
+        from the calling thread. Errors are logged.
+
+        If `store` is true, the items (and so their new mtimes) are
+        stored afterwards, one transaction for every `chunk_size`
+        items. Return the items that were written successfully.
+        """
+        id3v23 = beets.config['id3v23'].get(bool)
+
+        def save(job):
+            item, path, tags = job
+            try:
+                item._save_tags(path, tags, id3v23)
+            except FileOperationError as exc:
+                return job, exc
+            return job, None
+
+        written = []
+        items = list(items)
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            jobs = [(item,) + item._prepare_write() for item in chunk]
+            for (item, path, _), exc in util.par_map(save, jobs, threads,
+                                                     ordered=True):
+                if exc:
+                    log.error(u'{0}', exc)
+                else:
+                    item._finish_write(path)
+                    written.append(item)
+
+            if store:
+                with self.transaction():
+                    for item in chunk:
+                        item.store()
+        return written
+
+    def move_items(self, items, copy=False, link=False, basedir=None,
+                   dests=None, with_album=True, threads=None):
+        """Move, copy, or link the files of many items at once.
+
+        This is like calling `Item.move` on each item, but all the
+        destinations are chosen before any file is touched, the files
+        are moved on `threads` worker threads (by default, the
+        `move.threads` configuration option), and the new paths are
+        stored in a single transaction. `dests` may map item IDs to
+        precomputed destinations. The plan is journaled while the files
+        are being moved so that `resume_moves` can complete it if the
+        process is interrupted.
+
+        Errors are logged and leave the item in place. Return the items
+        whose files were moved.
+        """
+        items = list(items)
+        if dests is None:
+            dests = dict((item.id, dest) for item, dest
+                         in self.destinations(items, basedir=basedir))
+        if copy:
+            kind = fileplan.COPY
+        elif link:
+            kind = fileplan.LINK
+        else:
+            kind = fileplan.MOVE
+
+        plan = fileplan.FilePlan(self._move_journal(), self.path)
+        by_id = {}
+        for item in items:
+            if item.path != dests[item.id]:
+                by_id[item.id] = item
+                plan.add(item.id, item.path, dests[item.id], kind)
+        return self._run_moves(plan, by_id, kind, with_album, threads)
+
+    def resume_moves(self, threads=None):
+        """Complete the file operations of a `move_items` call that was
+        interrupted and store the new paths. Operations on items whose
+        path has changed since are dropped. Return the items whose
+        files were moved.
+        """
+        journal = self._move_journal()
+        plan = journal and fileplan.FilePlan.load(journal, self.path)
+        if not plan:
+            return []
+
+        by_id = {}
+        for op in plan.ops:
+            item = self.get_item(op.key)
+            if item and item.path in (op.src, op.dest):
+                by_id[op.key] = item
+        plan.ops = [op for op in plan.ops if op.key in by_id and
+                    (op.done or by_id[op.key].path == op.src)]
+
+        log.info(u'resuming {0} interrupted file operations',
+                 len(plan.pending()))
+        kind = plan.ops[0].kind if plan.ops else fileplan.MOVE
+        return self._run_moves(plan, by_id, kind, True, threads)
+
+    def _move_journal(self):
+        """Get the path of the journal for `move_items`, or None if it
+        is disabled.
+        """
+        journal = beets.config['move']['journal']
+        if journal.get() is None:
+            return None
+        return journal.as_filename()
+
+    def _run_moves(self, plan, items, kind, with_album, threads):
+        """Perform a `FilePlan` for `move_items` or `resume_moves`.
+        `items` maps the IDs in the plan to the items.
+        """
+        if threads is None:
+            threads = beets.config['move']['threads'].get(int)
+
+        pending = plan.pending()
+        for op in pending:
+            if op.kind == fileplan.MOVE:
+                plugins.send('before_item_moved', item=items[op.key],
+                             source=op.src, destination=op.dest)
+
+        events = {
+            fileplan.MOVE: 'item_moved',
+            fileplan.COPY: 'item_copied',
+            fileplan.LINK: 'item_linked',
+        }
+        for op, exc in plan.run(threads):
+            if exc:
+                log.error(u'{0}', exc)
+            else:
+                plugins.send(events[op.kind], item=items[op.key],
+                             source=op.src, destination=op.dest)
+
+        # Store all the new paths at once, including those of the
+        # operations that an interrupted run already performed.
+        moved = []
+        with self.transaction():
+            for op in plan.ops:
+                item = items[op.key]
+                if op.done and item.path != op.dest:
+                    item.path = op.dest
+                    item.store()
+                    moved.append(item)
+
+            if with_album:
+                album_ids = set(item.album_id for item in moved)
+                for album_id in album_ids:
+                    album = album_id and self.get_album(album_id)
+                    if album:
+                        album.move_art(kind == fileplan.COPY,
+                                       kind == fileplan.LINK)
+                        album.store()
+        plan.finish()
+
+        # Prune the vacated directories.
+        if kind == fileplan.MOVE:
+            for directory in sorted(set(os.path.dirname(op.src)
+                                        for op in plan.ops if op.done),
+                                    reverse=True):
+                util.prune_dirs(directory, self.directory)
+
+        return moved
 
     # Convenience accessors.
 
@@ -1452,62 +1975,31 @@ class DefaultTemplateFunctions(object):
         used. Both "keys" and "disam" should be given as
         whitespace-separated lists of field names.
         """
-        # Fast paths: no album, no item or library, or memoized value.
+        # Fast paths: no album, no item or library.
         if not self.item or not self.lib:
             return u''
         if self.item.album_id is None:
             return u''
-        memokey = ('aunique', keys, disam, self.item.album_id)
-        memoval = self.lib._memotable.get(memokey)
-        if memoval is not None:
-            return memoval
 
         keys = keys or 'albumartist album'
         disam = disam or 'albumtype year label catalognum albumdisambig'
-        keys = keys.split()
-        disam = disam.split()
-
-        album = self.lib.get_album(self.item)
-        if not album:
-            # Do nothing for singletons.
-            self.lib._memotable[memokey] = u''
-            return u''
-
-        # Find matching albums to disambiguate with.
-        subqueries = []
-        for key in keys:
-            value = album.get(key, '')
-            subqueries.append(dbcore.MatchQuery(key, value))
-        albums = self.lib.albums(dbcore.AndQuery(subqueries))
+        disambiguator = self.lib._aunique_index.disambiguator(
+            self.item.album_id, tuple(keys.split()), tuple(disam.split())
+        )
 
         # If there's only one album to matching these details, then do
         # nothing.
-        if len(albums) == 1:
-            self.lib._memotable[memokey] = u''
+        if disambiguator is None:
             return u''
 
-        # Find the first disambiguator that distinguishes the albums.
-        for disambiguator in disam:
-            # Get the value for each album for the current field.
-            disam_values = set([a.get(disambiguator, '') for a in albums])
-
-            # If the set of unique values is equal to the number of
-            # albums in the disambiguation set, we're done -- this is
-            # sufficient disambiguation.
-            if len(disam_values) == len(albums):
-                break
-
-        else:
-            # No disambiguator distinguished all fields.
-            res = u' {0}'.format(album.id)
-            self.lib._memotable[memokey] = res
-            return res
+        # No disambiguator distinguished all fields.
+        if not disambiguator:
+            return u' {0}'.format(self.item.album_id)
 
         # Flatten disambiguation value into a string.
+        album = self.item.get_album()
         disam_value = album.formatted(True).get(disambiguator)
-        res = u' [{0}]'.format(disam_value)
-        self.lib._memotable[memokey] = res
-        return res
+        return u' [{0}]'.format(disam_value)
 
     @staticmethod
     def tmpl_first(s, count=1, skip=0, sep=u'; ', join_str=u'; '):
@@ -1543,3 +2035,17 @@ class DefaultTemplateFunctions(object):
 DefaultTemplateFunctions._func_names = \
     [s for s in dir(DefaultTemplateFunctions)
      if s.startswith(DefaultTemplateFunctions._prefix)]
+
+# Split them into static functions, which can be shared by all models,
+# and the methods that need to be bound to the model being evaluated.
+DefaultTemplateFunctions._static_funcs = {}
+DefaultTemplateFunctions._bound_names = []
+for _name in DefaultTemplateFunctions._func_names:
+    _short = _name[len(DefaultTemplateFunctions._prefix):]
+    if isinstance(DefaultTemplateFunctions.__dict__.get(_name),
+                  staticmethod):
+        DefaultTemplateFunctions._static_funcs[_short] = \
+            getattr(DefaultTemplateFunctions, _name)
+    else:
+        DefaultTemplateFunctions._bound_names.append(_short)
+del _name, _short
@@ -60,7 +60,7 @@ import logging
 import six
 
 
-__all__ = ['UnreadableFileError', 'FileTypeError', 'MediaFile']
+__all__ = ['UnreadableFileError', 'FileTypeError', 'MediaFile', 'probe']
 
 log = logging.getLogger(__name__)
 
@@ -81,6 +81,11 @@ TYPES = {
 
 PREFERRED_IMAGE_EXTENSIONS = {'jpeg': 'jpg'}
 
+# The properties of the audio stream (rather than the tags) that
+# MediaFile can read.
+AUDIO_PROPERTIES = ('length', 'samplerate', 'bitdepth', 'bitrate',
+                    'channels', 'format')
+
 
 # Exceptions.
 
@@ -729,6 +734,18 @@ class MP4ImageStorageStyle(MP4ListStorageStyle):
         return mutagen.mp4.MP4Cover(image.data, kind)
 
 
+def _id3_frames(mutagen_file, frame_id):
+    """Get all the ID3 frames in the file with the ID `frame_id`.
+
+    Uses the file's frame index when `MediaFile.read_fields` has built
+    one. Otherwise, Mutagen looks for the frames through all the tags.
+    """
+    index = getattr(mutagen_file, '_frame_index', None)
+    if index is None:
+        return mutagen_file.tags.getall(frame_id)
+    return list(index.get(frame_id, ()))
+
+
 class MP3StorageStyle(StorageStyle):
     """Store data in ID3 frames.
     """
@@ -780,7 +797,7 @@ class MP3PeopleStorageStyle(MP3StorageStyle):
             mutagen_file.tags.add(frame)
 
     def fetch(self, mutagen_file):
-        for frame in mutagen_file.tags.getall(self.key):
+        for frame in _id3_frames(mutagen_file, self.key):
             for pair in frame.people:
                 if pair[0].lower() == self.involvement.lower():
                     try:
@@ -866,7 +883,7 @@ class MP3DescStorageStyle(MP3StorageStyle):
             mutagen_file.tags.add(frame)
 
     def fetch(self, mutagen_file):
-        for frame in mutagen_file.tags.getall(self.key):
+        for frame in _id3_frames(mutagen_file, self.key):
             if frame.desc.lower() == self.description.lower():
                 if self.key == 'USLT':
                     return frame.text
@@ -938,7 +955,7 @@ class MP3ImageStorageStyle(ListStorageStyle, MP3StorageStyle):
                      type=apic_frame.type)
 
     def fetch(self, mutagen_file):
-        return mutagen_file.tags.getall(self.key)
+        return _id3_frames(mutagen_file, self.key)
 
     def store(self, mutagen_file, frames):
         mutagen_file.tags.setall(self.key, frames)
@@ -1181,14 +1198,20 @@ class MediaField(object):
         """
         self.out_type = kwargs.get('out_type', six.text_type)
         self._styles = styles
+        self._format_styles = {}
 
     def styles(self, mutagen_file):
-        """Yields the list of storage styles of this field that can
+        """Get the list of storage styles of this field that can
         handle the MediaFile's format.
         """
-        for style in self._styles:
-            if mutagen_file.__class__.__name__ in style.formats:
-                yield style
+        name = mutagen_file.__class__.__name__
+        try:
+            return self._format_styles[name]
+        except KeyError:
+            styles = [style for style in self._styles
+                      if name in style.formats]
+            self._format_styles[name] = styles
+            return styles
 
     def __get__(self, mediafile, owner=None):
         out = None
@@ -1528,6 +1551,18 @@ class MediaFile(object):
                 else:
                     yield property
 
+    @classmethod
+    def field_names(cls):
+        """Get the names of the :meth:`fields` as a frozen set, which is
+        only computed once for each class (and again when
+        :meth:`add_field` adds a field).
+        """
+        names = cls.__dict__.get('_field_names')
+        if names is None:
+            names = frozenset(cls.fields())
+            cls._field_names = names
+        return names
+
     @classmethod
     def _field_sort_name(cls, name):
         """Get a sort key for a field name that determines the order
@@ -1563,10 +1598,32 @@ class MediaFile(object):
         """
         for property in cls.fields():
             yield property
-        for property in ('length', 'samplerate', 'bitdepth', 'bitrate',
-                         'channels', 'format'):
+        for property in AUDIO_PROPERTIES:
             yield property
 
+    def read_fields(self, fields=None):
+        """Get a dictionary with the values of the metadata fields and
+        audio properties named in `fields` (by default, all the
+        :meth:`readable_fields`).
+
+        This is faster than getting the fields one by one: ID3 tags are
+        indexed by frame once instead of being searched for every
+        field. Only the requested fields are decoded, so leave out
+        ``art`` and ``images`` unless the images are needed.
+        """
+        if fields is None:
+            fields = self.readable_fields()
+        if self.type in ('mp3', 'aiff'):
+            frames = {}
+            for frame in self.mgfile.tags.values():
+                frames.setdefault(frame.FrameID, []).append(frame)
+            self.mgfile._frame_index = frames
+        try:
+            return dict((field, getattr(self, field)) for field in fields)
+        finally:
+            # Writing to the tags would make the index stale.
+            self.mgfile._frame_index = None
+
     @classmethod
     def add_field(cls, name, descriptor):
         """Add a field to store custom tags.
@@ -1584,6 +1641,13 @@ class MediaFile(object):
                 u'property "{0}" already exists on MediaField'.format(name))
         setattr(cls, name, descriptor)
 
+        # Forget the field names of this class and of its subclasses.
+        classes = [cls]
+        while classes:
+            klass = classes.pop()
+            klass._field_names = None
+            classes.extend(klass.__subclasses__())
+
     def update(self, dict):
         """Set all field values from a dictionary.
 
@@ -2064,3 +2128,82 @@ class MediaFile(object):
     def format(self):
         """A string describing the file format/codec."""
         return TYPES[self.type]
+
+
+# Reading audio properties without the tags.
+
+def _read_stream_info(f, path):
+    """Read the stream information of an MP3 or FLAC file, open as `f`,
+    without parsing its tags. Return a `(type, info)` pair where `info`
+    is a Mutagen stream information object, or None if the file is
+    neither.
+    """
+    # Skip an ID3v2 tag in front of FLAC data, like Mutagen does.
+    offset = 0
+    header = f.read(10)
+    if header[:3] == b'ID3' and len(header) == 10:
+        offset = 10 + mutagen.id3.BitPaddedInt(header[6:10])
+    f.seek(offset)
+
+    if f.read(4) == b'fLaC':
+        # Walk the metadata block headers to the start of the audio,
+        # which Mutagen uses to compute the bitrate.
+        info = None
+        code = 0
+        while not code & 0x80:
+            block = f.read(4)
+            if len(block) < 4:
+                return None
+            code = ord(block[0:1])
+            size = struct.unpack('>I', b'\x00' + block[1:])[0]
+            if code & 0x7f == 0:
+                info = mutagen.flac.StreamInfo(f.read(size))
+            else:
+                f.seek(size, os.SEEK_CUR)
+        if info is None:
+            return None
+
+        if info.length:
+            start = f.tell()
+            f.seek(0, os.SEEK_END)
+            info.bitrate = int(float(f.tell() - start) * 8 / info.length)
+        return 'flac', info
+
+    if os.path.splitext(path)[1].lower() in (b'.mp3', u'.mp3'):
+        # Without an offset, the ID3 tag is skipped without being
+        # parsed.
+        return 'mp3', mutagen.mp3.MPEGInfo(f)
+    return None
+
+
+def probe(path):
+    """Get the audio properties of the file at `path` as a dictionary
+    with the keys in `AUDIO_PROPERTIES`, like :meth:`MediaFile.read_fields`
+    would. May raise `UnreadableFileError`.
+
+    For MP3 and FLAC files, only the stream headers are read: the tags,
+    and the images embedded in them, are skipped. Other formats are
+    opened with :class:`MediaFile`.
+    """
+    try:
+        f = open(path, 'rb')
+    except (IOError, OSError) as exc:
+        raise UnreadableFileError(path, six.text_type(exc))
+    with f:
+        stream = mutagen_call('probe', path, _read_stream_info, f, path)
+    if stream is None:
+        return MediaFile(path).read_fields(AUDIO_PROPERTIES)
+
+    type, info = stream
+    bitrate = info.bitrate
+    if not bitrate and info.length:
+        # Estimate it from the file size, like `MediaFile.bitrate`.
+        bitrate = int(os.path.getsize(path) * 8 / info.length)
+    return {
+        'length': info.length,
+        'samplerate': info.sample_rate,
+        'bitdepth': getattr(info, 'bits_per_sample', 0),
+        'bitrate': bitrate,
+        'channels': info.channels,
+        'format': TYPES[type],
+    }
@@ -20,7 +20,7 @@ from __future__ import division, absolute_import, print_function
 import inspect
 import traceback
 import re
-from collections import defaultdict
+from collections import defaultdict, Counter
 from functools import wraps
 
 
@@ -382,15 +382,58 @@ def track_for_id(track_id):
             yield track
 
 
+# Cached plugin tables. Template functions and field getters are looked
+# up every time a model is formatted, so we gather them from the
+# plugins only once per set of loaded plugins.
+
+_tables = {}
+table_stats = Counter()
+"""Hit and miss counts for the cached plugin tables, keyed by
+``(table name, 'hits' or 'misses')``. Useful when profiling.
+"""
+
+
+def _plugin_state():
+    """Get a cheap token identifying the currently loaded plugins.
+    It changes whenever a plugin class is loaded or instantiated (or
+    the registries are reset).
+    """
+    return (id(_classes), len(_classes), id(_instances), len(_instances))
+
+
+def _cached_table(name, attr):
+    """Get a dictionary merging the `attr` dictionaries of all loaded
+    plugins. The result is shared between callers and must not be
+    modified.
+    """
+    state = _plugin_state()
+    cached = _tables.get(name)
+    if cached is not None and cached[0] == state:
+        table_stats[name, 'hits'] += 1
+        return cached[1]
+
+    table_stats[name, 'misses'] += 1
+    table = {}
+    for plugin in find_plugins():
+        if getattr(plugin, attr):
+            table.update(getattr(plugin, attr))
+    # `find_plugins` may have instantiated new plugins.
+    _tables[name] = (_plugin_state(), table)
+    return table
+
+
+def clear_table_cache():
+    """Forget the cached plugin tables so they are gathered again on
+    their next use.
+    """
+    _tables.clear()
+
+
 def template_funcs():
     """Get all the template functions declared by plugins as a
-    dictionary.
+    dictionary. The dictionary is cached and must not be modified.
     """
-    funcs = {}
-    for plugin in find_plugins():
-        if plugin.template_funcs:
-            funcs.update(plugin.template_funcs)
-    return funcs
+    return _cached_table('template_funcs', 'template_funcs')
 
 
 def import_stages():
@@ -405,23 +448,16 @@ def import_stages():
 
 def item_field_getters():
     """Get a dictionary mapping field names to unary functions that
-    compute the field's value.
+    compute the field's value. The dictionary is cached and must not be
+    modified.
     """
-    funcs = {}
-    for plugin in find_plugins():
-        if plugin.template_fields:
-            funcs.update(plugin.template_fields)
-    return funcs
+    return _cached_table('item_field_getters', 'template_fields')
 
 
 def album_field_getters():
     """As above, for album fields.
     """
-    funcs = {}
-    for plugin in find_plugins():
-        if plugin.album_template_fields:
-            funcs.update(plugin.album_template_fields)
-    return funcs
+    return _cached_table('album_field_getters', 'album_template_fields')
 
 
 # Event dispatch.
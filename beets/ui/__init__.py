@@ -36,7 +36,7 @@ from beets import logging
 from beets import library
 from beets import plugins
 from beets import util
-from beets.util.functemplate import Template
+from beets.util.functemplate import template
 from beets import config
 from beets.util import confit, as_string
 from beets.autotag import mb
@@ -143,6 +143,77 @@ def print_(*strings, **kwargs):
     sys.stdout.write(txt)
 
 
+class BufferedPrinter(object):
+    """A buffered replacement for calling `print_` once per line, for
+    commands that produce a lot of output. The output encoding is
+    looked up once and the text is written to standard output in large
+    chunks. Use it as a context manager to make sure that everything is
+    written in the end::
+
+        with BufferedPrinter() as out:
+            for item in items:
+                out.print_(format(item))
+    """
+
+    def __init__(self, chunk_size=1 << 16):
+        """Create a printer for the current standard output stream.
+        Text is written whenever more than `chunk_size` characters are
+        buffered.
+        """
+        self.chunk_size = chunk_size
+        self.stream = sys.stdout
+        self.encoding = _out_encoding()
+        self._chunks = []
+        self._size = 0
+
+        # On Python 3, write the encoded bytes to the underlying binary
+        # buffer when there is one.
+        self._binary = six.PY2 or hasattr(self.stream, 'buffer')
+
+    def print_(self, *strings, **kwargs):
+        """Buffer the strings like `print_` would print them.
+        """
+        if not strings:
+            strings = [u'']
+        assert isinstance(strings[0], six.text_type)
+
+        self.write(u' '.join(strings) + kwargs.get('end', u'\n'))
+
+    def write(self, text):
+        """Buffer a Unicode string.
+        """
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size > self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered text to the output stream.
+        """
+        if not self._chunks:
+            return
+        txt = u''.join(self._chunks)
+        self._chunks = []
+        self._size = 0
+
+        if six.PY2:
+            self.stream.write(txt.encode(self.encoding, 'replace'))
+        elif self._binary:
+            # Text written to the stream before must come out first.
+            self.stream.flush()
+            self.stream.buffer.write(txt.encode(self.encoding, 'replace'))
+        else:
+            self.stream.write(txt)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        if self._binary and not six.PY2:
+            self.stream.buffer.flush()
+
+
 # Configuration wrappers.
 
 def _bool_fallback(a, b):
@@ -598,7 +669,7 @@ def get_path_formats(subview=None):
     subview = subview or config['paths']
     for query, view in subview.items():
         query = PF_KEY_QUERIES.get(query, query)  # Expand common queries.
-        path_formats.append((query, Template(view.as_str())))
+        path_formats.append((query, template(view.as_str())))
     return path_formats
 
 
@@ -1099,6 +1170,9 @@ def _setup(options, lib=None):
         plugins.send("library_opened", lib=lib)
     library.Item._types.update(plugins.types(library.Item))
     library.Album._types.update(plugins.types(library.Album))
+    library.Item._clear_type_cache()
+    library.Album._clear_type_cache()
+    library.path_format_query.cache_clear()
 
     return subcommands, plugins, lib
 
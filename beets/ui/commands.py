@@ -36,6 +36,7 @@ from beets import importer
 from beets import util
 from beets.util import syspath, normpath, ancestry, displayable_path
 from beets import library
+from beets import dbcore
 from beets import config
 from beets import logging
 from beets.util.confit import _package_path
@@ -70,7 +71,7 @@ def _do_query(lib, query, album, also_items=True):
 
     else:
         albums = []
-        items = list(lib.items(query))
+        items = list(lib.items(query, with_albums=True))
 
     if album and not albums:
         raise ui.UserError(u'No matching albums found.')
@@ -1020,12 +1021,13 @@ def list_items(lib, query, album, fmt=u''):
     """Print out items in lib matching query. If album, then search for
     albums instead of single items.
     """
-    if album:
-        for album in lib.albums(query):
-            ui.print_(format(album, fmt))
-    else:
-        for item in lib.items(query):
-            ui.print_(format(item, fmt))
+    with ui.BufferedPrinter() as out:
+        if album:
+            for album in lib.albums(query):
+                out.print_(format(album, fmt))
+        else:
+            for item in lib.items(query, with_albums=True):
+                out.print_(format(item, fmt))
 
 
 def list_func(lib, opts, args):
@@ -1056,28 +1058,43 @@ def update_items(lib, query, album, move, pretend, fields):
             fields.append('path')
         items, _ = _do_query(lib, query, album)
 
-        # Walk through the items and pick up their changes.
+        # Look up the files' current mtimes all at once. Only the files
+        # that are missing or that changed since they were last checked
+        # need any further work.
+        mtimes = util.mtimes([item.path for item in items])
         affected_albums = set()
+        changed_items = []
         for item in items:
             # Item deleted?
-            if not os.path.exists(syspath(item.path)):
+            if mtimes[item.path] is None:
                 ui.print_(format(item))
                 ui.print_(ui.colorize('text_error', u'  deleted'))
                 if not pretend:
                     item.remove(True)
                 affected_albums.add(item.album_id)
-                continue
 
             # Did the item change since last checked?
-            if item.current_mtime() <= item.mtime:
+            elif mtimes[item.path] <= item.mtime:
                 log.debug(u'skipping {0} because mtime is up to date ({1})',
                           displayable_path(item.path), item.mtime)
-                continue
 
-            # Read new data.
+            else:
+                changed_items.append(item)
+
+        def read_item(item):
+            # Remember the old artists for the album artist special case
+            # below.
+            old = (item.artist, item.albumartist)
             try:
                 item.read()
             except library.ReadError as exc:
+                return item, old, exc
+            return item, old, None
+
+        # Read new data on a pool of threads, but apply it in order.
+        for item, (old_artist, old_albumartist), exc in \
+                util.par_map(read_item, changed_items, ordered=True):
+            if exc:
                 log.error(u'error reading {0}: {1}',
                           displayable_path(item.path), exc)
                 continue
@@ -1086,9 +1103,8 @@ def update_items(lib, query, album, move, pretend, fields):
             # but necessary for preserving album-level metadata for non-
             # autotagged imports.)
             if not item.albumartist:
-                old_item = lib.get_item(item.id)
-                if old_item.albumartist == old_item.artist == item.artist:
-                    item.albumartist = old_item.albumartist
+                if old_albumartist == old_artist == item.artist:
+                    item.albumartist = old_albumartist
                     item._dirty.discard(u'albumartist')
 
             # Check for and display changes.
@@ -1232,55 +1248,172 @@ default_commands.append(remove_cmd)
 
 # stats: Show library/query statistics.
 
-def show_stats(lib, query, exact):
-    """Shows some statistics about the matched items."""
-    items = lib.items(query)
+class _Stats(object):
+    """Running totals for the statistics shown by `show_stats`.
+    """
+    def __init__(self):
+        self.size = 0
+        self.time = 0.0
+        self.items = 0
+        self.artists = set()
+        self.albums = set()
+        self.album_artists = set()
+
+    def add(self, item, exact):
+        if exact:
+            self.add_size(item.path)
+        else:
+            self.size += int(item.length * item.bitrate / 8)
+        self.time += item.length
+        self.items += 1
+        self.artists.add(item.artist)
+        self.album_artists.add(item.albumartist)
+        if item.album_id:
+            self.albums.add(item.album_id)
+
+    def add_size(self, path):
+        try:
+            self.size += os.path.getsize(syspath(path))
+        except OSError as exc:
+            log.info(u'could not get size of {}: {}', path, exc)
 
-    total_size = 0
-    total_time = 0.0
-    total_items = 0
-    artists = set()
-    albums = set()
-    album_artists = set()
+    def counts(self):
+        """Get the number of artists, albums and album artists.
+        """
+        return len(self.artists), len(self.albums), len(self.album_artists)
 
-    for item in items:
+
+class _SQLStats(_Stats):
+    """Statistics computed by the database (see `_sql_stats`).
+    """
+    def __init__(self, row):
+        super(_SQLStats, self).__init__()
+        self.size = int(row['size'])
+        self.time = row['time']
+        self.items = row['items']
+        self._counts = (row['artists'], row['albums'], row['album_artists'])
+
+    def counts(self):
+        return self._counts
+
+
+def _sql_stats(lib, query, by, exact):
+    """Compute the statistics for the items matching `query`, grouped
+    by the values of the field `by` if it is given, using aggregate
+    queries in the database. Return a list of `(group value, stats)`
+    pairs, or None if the query or the grouping field cannot be
+    expressed in SQL.
+    """
+    try:
+        if isinstance(query, six.string_types):
+            query, _ = library.parse_query_string(query, library.Item)
+        else:
+            query, _ = library.parse_query_parts(query, library.Item)
+    except dbcore.query.InvalidQueryArgumentTypeError as exc:
+        raise dbcore.InvalidQueryError(query, exc)
+    where, subvals = query.clause()
+    if where is None or (by and by not in library.Item._fields):
+        return None
+
+    group_type = library.Item._type(by) if by else None
+    if by:
+        # Fold missing values into the field's null value, like the
+        # model does.
+        group = u'COALESCE({0}, ?)'.format(by)
+        group_vals = [group_type.to_sql(group_type.null)]
+    else:
+        group, group_vals = u'NULL', []
+
+    sql = (
+        u'SELECT {0} AS grp, COUNT(*) AS items, TOTAL(length) AS time, '
+        u'TOTAL(CAST(length * bitrate / 8 AS INTEGER)) AS size, '
+        u"COUNT(DISTINCT COALESCE(artist, '')) AS artists, "
+        u'COUNT(DISTINCT NULLIF(album_id, 0)) AS albums, '
+        u"COUNT(DISTINCT COALESCE(albumartist, '')) AS album_artists "
+        u'FROM items WHERE {1}'
+    ).format(group, where)
+    if by:
+        sql += u' GROUP BY grp ORDER BY grp'
+    with lib.transaction() as tx:
+        rows = tx.query(sql, group_vals + list(subvals))
+        paths = []
         if exact:
-            try:
-                total_size += os.path.getsize(syspath(item.path))
-            except OSError as exc:
-                log.info(u'could not get size of {}: {}', item.path, exc)
+            paths = tx.query(
+                u'SELECT {0} AS grp, path FROM items WHERE {1}'.format(
+                    group, where),
+                group_vals + list(subvals)
+            )
+
+    groups = []
+    by_value = {}
+    for row in rows:
+        stats = _SQLStats(row)
+        if exact:
+            stats.size = 0
+        by_value[row['grp']] = stats
+        if by:
+            value = group_type.format(group_type.from_sql(row['grp']))
         else:
-            total_size += int(item.length * item.bitrate / 8)
-        total_time += item.length
-        total_items += 1
-        artists.add(item.artist)
-        album_artists.add(item.albumartist)
-        if item.album_id:
-            albums.add(item.album_id)
+            value = None
+        groups.append((value, stats))
+    for row in paths:
+        by_value[row['grp']].add_size(row['path'])
+    return groups
+
 
-    size_str = u'' + ui.human_bytes(total_size)
-    if exact:
-        size_str += u' ({0} bytes)'.format(total_size)
+def _python_stats(lib, query, by, exact):
+    """Compute the same statistics as `_sql_stats` by looking at every
+    matching item. This works for all queries and fields.
+    """
+    groups = {}
+    for item in lib.items(query):
+        value = item.formatted().get(by) if by else None
+        if value not in groups:
+            groups[value] = _Stats()
+        groups[value].add(item, exact)
+    if not groups and not by:
+        groups[None] = _Stats()
+    return sorted(groups.items(), key=lambda g: g[0])
+
+
+def show_stats(lib, query, exact, by=None):
+    """Shows some statistics about the matched items. If `by` is given,
+    the statistics are shown separately for each value of that field.
+    """
+    groups = _sql_stats(lib, query, by, exact)
+    if groups is None:
+        groups = _python_stats(lib, query, by, exact)
 
-    print_(u"""Tracks: {0}
+    for i, (value, stats) in enumerate(groups):
+        if by:
+            if i:
+                print_()
+            print_(u'{0}: {1}'.format(by, value))
+
+        size_str = u'' + ui.human_bytes(stats.size)
+        if exact:
+            size_str += u' ({0} bytes)'.format(stats.size)
+
+        artists, albums, album_artists = stats.counts()
+        print_(u"""Tracks: {0}
 Total time: {1}{2}
 {3}: {4}
 Artists: {5}
 Albums: {6}
 Album artists: {7}""".format(
-        total_items,
-        ui.human_seconds(total_time),
-        u' ({0:.2f} seconds)'.format(total_time) if exact else '',
-        u'Total size' if exact else u'Approximate total size',
-        size_str,
-        len(artists),
-        len(albums),
-        len(album_artists)),
-    )
+            stats.items,
+            ui.human_seconds(stats.time),
+            u' ({0:.2f} seconds)'.format(stats.time) if exact else '',
+            u'Total size' if exact else u'Approximate total size',
+            size_str,
+            artists,
+            albums,
+            album_artists),
+        )
 
 
 def stats_func(lib, opts, args):
-    show_stats(lib, decargs(args), opts.exact)
+    show_stats(lib, decargs(args), opts.exact, opts.by)
 
 
 stats_cmd = ui.Subcommand(
@@ -1290,6 +1423,10 @@ stats_cmd.parser.add_option(
     u'-e', u'--exact', action='store_true',
     help=u'exact size and time'
 )
+stats_cmd.parser.add_option(
+    u'-b', u'--by', metavar='FIELD',
+    help=u'show statistics for each value of FIELD'
+)
 stats_cmd.func = stats_func
 default_commands.append(stats_cmd)
 
@@ -1365,8 +1502,17 @@ def modify_items(lib, mods, dels, query, write, move, album, confirm):
 
     # Apply changes to database and files
     with lib.transaction():
+        if write:
+            # Write all the tags on a thread pool first; the items are
+            # then moved and stored like `try_sync` does. Albums pass
+            # their changes on to their items when they are stored.
+            if album:
+                for obj in changed:
+                    obj.store()
+                changed = [i for obj in changed for i in obj.items()]
+            lib.write_items(changed)
         for obj in changed:
-            obj.try_sync(write, move)
+            obj.try_sync(False, move)
 
 
 def print_and_modify(obj, mods, dels):
@@ -1448,13 +1594,24 @@ def move_items(lib, dest, query, copy, album, pretend, confirm=False):
     dest is None, then the library's base directory is used, making the
     command "consolidate" files.
     """
+    if not pretend:
+        # Complete any earlier run that was interrupted.
+        lib.resume_moves()
+
     items, albums = _do_query(lib, query, album, False)
     objs = albums if album else items
 
-    # Filter out files that don't need to be moved.
-    isitemmoved = lambda item: item.path != item.destination(basedir=dest)
-    isalbummoved = lambda album: any(isitemmoved(i) for i in album.items())
-    objs = [o for o in objs if (isalbummoved if album else isitemmoved)(o)]
+    # Compute all the destinations in one batch and filter out files
+    # that don't need to be moved.
+    if album:
+        obj_items = dict((a.id, list(a.items())) for a in albums)
+    else:
+        obj_items = dict((i.id, [i]) for i in items)
+    all_items = [i for o in objs for i in obj_items[o.id]]
+    dests = dict((i.id, d)
+                 for i, d in lib.destinations(all_items, basedir=dest))
+    objs = [o for o in objs
+            if any(i.path != dests[i.id] for i in obj_items[o.id])]
 
     action = u'Copying' if copy else u'Moving'
     act = u'copy' if copy else u'move'
@@ -1465,24 +1622,18 @@ def move_items(lib, dest, query, copy, album, pretend, confirm=False):
         return
 
     if pretend:
-        if album:
-            show_path_changes([(item.path, item.destination(basedir=dest))
-                               for obj in objs for item in obj.items()])
-        else:
-            show_path_changes([(obj.path, obj.destination(basedir=dest))
-                               for obj in objs])
+        show_path_changes([(item.path, dests[item.id])
+                           for obj in objs for item in obj_items[obj.id]])
     else:
         if confirm:
             objs = ui.input_select_objects(
                 u'Really %s' % act, objs,
                 lambda o: show_path_changes(
-                    [(o.path, o.destination(basedir=dest))]))
+                    [(i.path, dests[i.id]) for i in obj_items[o.id]]))
 
-        for obj in objs:
-            log.debug(u'moving: {0}', util.displayable_path(obj.path))
-
-            obj.move(copy, basedir=dest)
-            obj.store()
+        # Plan all the moves at once and perform them in parallel.
+        lib.move_items([item for obj in objs for item in obj_items[obj.id]],
+                       copy, basedir=dest, dests=dests)
 
 
 def move_func(lib, opts, args):
@@ -1528,16 +1679,35 @@ def write_items(lib, query, pretend, force):
     """
     items, albums = _do_query(lib, query, False, False)
 
+    mtimes = util.mtimes([item.path for item in items])
+    candidates = []
     for item in items:
         # Item deleted?
-        if not os.path.exists(syspath(item.path)):
+        if mtimes[item.path] is None:
             log.info(u'missing file: {0}', util.displayable_path(item.path))
             continue
 
+        # Any change to the item's tags resets its mtime, so the file
+        # is already up to date if it has not been touched since the
+        # item was last read or written.
+        if not force and item.mtime and mtimes[item.path] <= item.mtime:
+            log.debug(u'skipping {0} because mtime is up to date ({1})',
+                      displayable_path(item.path), item.mtime)
+            continue
+
+        candidates.append(item)
+
+    def read_clean(item):
         # Get an Item object reflecting the "clean" (on-disk) state.
         try:
-            clean_item = library.Item.from_path(item.path)
+            return item, library.Item.from_path(item.path), None
         except library.ReadError as exc:
+            return item, None, exc
+
+    to_write = []
+    for item, clean_item, exc in util.par_map(read_clean, candidates,
+                                              ordered=True):
+        if exc:
             log.error(u'error reading {0}: {1}',
                       displayable_path(item.path), exc)
             continue
@@ -1546,9 +1716,11 @@ def write_items(lib, query, pretend, force):
         changed = ui.show_model_changes(item, clean_item,
                                         library.Item._media_tag_fields, force)
         if (changed or force) and not pretend:
-            # We use `try_sync` here to keep the mtime up to date in the
-            # database.
-            item.try_sync(True, False)
+            to_write.append(item)
+
+    # Store the items too, to keep the mtime up to date in the
+    # database.
+    lib.write_items(to_write, store=True)
 
 
 def write_func(lib, opts, args):
@@ -22,7 +22,10 @@ import locale
 import re
 import shutil
 import fnmatch
-from collections import Counter
+from collections import Counter, OrderedDict
+from multiprocessing.pool import ThreadPool
+import functools
+import threading
 import traceback
 import subprocess
 import platform
@@ -31,6 +34,14 @@ from beets.util import hidden
 import six
 from unidecode import unidecode
 
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
 
 MAX_FILENAME_LENGTH = 200
 WINDOWS_MAGIC_PREFIX = u'\\\\?\\'
@@ -500,12 +511,13 @@ def link(path, dest, replace=False):
                               traceback.format_exc())
 
 
-def unique_path(path):
+def unique_path(path, taken=()):
     """Returns a version of ``path`` that does not exist on the
     filesystem. Specifically, if ``path` itself already exists, then
-    something unique is appended to the path.
+    something unique is appended to the path. Paths in the `taken`
+    collection are avoided as if they existed.
     """
-    if not os.path.exists(syspath(path)):
+    if path not in taken and not os.path.exists(syspath(path)):
         return path
 
     base, ext = os.path.splitext(path)
@@ -519,7 +531,7 @@ def unique_path(path):
         num += 1
         suffix = u'.{}'.format(num).encode() + ext
         new_path = base + suffix
-        if not os.path.exists(new_path):
+        if new_path not in taken and not os.path.exists(new_path):
             return new_path
 
 # Note: The Windows "reserved characters" are, of course, allowed on
@@ -536,7 +548,7 @@ CHAR_REPLACE = [
 ]
 
 
-def sanitize_path(path, replacements=None):
+def sanitize_path(path, replacements=None, memo=None):
     """Takes a path (as a Unicode string) and makes sure that it is
     legal. Returns a new path. Only works with fragments; won't work
     reliably on Windows when a path begins with a drive letter. Path
@@ -544,6 +556,10 @@ def sanitize_path(path, replacements=None):
     path components. If replacements is specified, it is used *instead*
     of the default set of replacements; it must be a list of (compiled
     regex, replacement string) pairs.
+
+    `memo` may be a dictionary in which sanitized components are
+    remembered across calls that use the same replacements. This helps
+    when many paths share the same directories.
     """
     replacements = replacements or CHAR_REPLACE
 
@@ -551,9 +567,15 @@ def sanitize_path(path, replacements=None):
     if not comps:
         return ''
     for i, comp in enumerate(comps):
+        if memo is not None and comp in memo:
+            comps[i] = memo[comp]
+            continue
+        orig = comp
         for regex, repl in replacements:
             comp = regex.sub(repl, comp)
         comps[i] = comp
+        if memo is not None:
+            memo[orig] = comp
     return os.path.join(*comps)
 
 
@@ -574,7 +596,8 @@ def truncate_path(path, length=MAX_FILENAME_LENGTH):
     return os.path.join(*out)
 
 
-def _legalize_stage(path, replacements, length, extension, fragment):
+def _legalize_stage(path, replacements, length, extension, fragment,
+                    memo=None):
     """Perform a single round of path legalization steps
     (sanitation/replacement, encoding from Unicode to bytes,
     extension-appending, and truncation). Return the path (Unicode if
@@ -582,7 +605,7 @@ def _legalize_stage(path, replacements, length, extension, fragment):
     required.
     """
     # Perform an initial sanitization including user replacements.
-    path = sanitize_path(path, replacements)
+    path = sanitize_path(path, replacements, memo)
 
     # Encode for the filesystem.
     if not fragment:
@@ -598,7 +621,8 @@ def _legalize_stage(path, replacements, length, extension, fragment):
     return path, path != pre_truncate_path
 
 
-def legalize_path(path, replacements, length, extension, fragment):
+def legalize_path(path, replacements, length, extension, fragment,
+                  memo=None):
     """Given a path-like Unicode string, produce a legal path. Return
     the path and a flag indicating whether some replacements had to be
     ignored (see below).
@@ -618,6 +642,9 @@ def legalize_path(path, replacements, length, extension, fragment):
     the path has to be truncated twice (indicating that replacements
     made the string longer again after it was truncated); the
     application should probably log some sort of warning.
+
+    `memo` is passed on to `sanitize_path` for the stages that use
+    `replacements`.
     """
 
     if fragment:
@@ -625,7 +652,7 @@ def legalize_path(path, replacements, length, extension, fragment):
         extension = extension.decode('utf-8', 'ignore')
 
     first_stage_path, _ = _legalize_stage(
-        path, replacements, length, extension, fragment
+        path, replacements, length, extension, fragment, memo
     )
 
     # Convert back to Unicode with extension removed.
@@ -633,7 +660,7 @@ def legalize_path(path, replacements, length, extension, fragment):
 
     # Re-sanitize following truncation (including user replacements).
     second_stage_path, retruncated = _legalize_stage(
-        first_stage_path, replacements, length, extension, fragment
+        first_stage_path, replacements, length, extension, fragment, memo
     )
 
     # If the path was once again truncated, discard user replacements
@@ -712,6 +739,43 @@ def plurality(objs):
     return c.most_common(1)[0]
 
 
+def lru_cache(maxsize=128):
+    """A decorator that memoizes a function of hashable arguments,
+    keeping only the `maxsize` most recently used results.
+    This is a thread-safe stand-in for `functools.lru_cache`, which is
+    not available on Python 2. The decorated function gets a
+    `cache_clear` method to discard all results.
+    """
+    def decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items())) if kwargs else args
+            with lock:
+                if key in cache:
+                    # Move the result to the most recently used end.
+                    value = cache.pop(key)
+                    cache[key] = value
+                    return value
+
+            value = func(*args, **kwargs)
+            with lock:
+                cache[key] = value
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
 def cpu_count():
     """Return the number of hardware thread contexts (cores or SMT
     threads) in the system.
@@ -739,6 +803,76 @@ def cpu_count():
         return 1
 
 
+def par_map(transform, items, threads=None, ordered=False):
+    """Apply `transform` to each element of `items` on a pool of worker
+    threads and generate the results as soon as each one is available,
+    in completion order (or, if `ordered` is set, in the order of
+    `items`). At most `threads` elements (by default, one per CPU) are
+    processed at once. Exceptions raised by `transform` are re-raised in
+    the consuming thread.
+
+    Since these are threads, not processes, this only helps when
+    `transform` spends its time waiting on I/O or on subprocesses.
+    """
+    pool = ThreadPool(threads or cpu_count())
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for result in imap(transform, items):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _dir_mtimes(directory, paths):
+    """Get the mtimes of the given files, which are all in `directory`,
+    as a list of `(path, mtime)` pairs. The mtime is None for missing
+    files.
+    """
+    entries = {}
+    if scandir is not None and len(paths) > 1:
+        # List the directory once instead of looking up every file.
+        try:
+            entries = dict((entry.name, entry)
+                           for entry in scandir(syspath(directory)))
+        except OSError:
+            # Missing or unreadable: check the files one by one.
+            pass
+
+    out = []
+    for path in paths:
+        entry = entries.get(os.path.basename(syspath(path)))
+        try:
+            if entry is not None:
+                mtime = int(entry.stat().st_mtime)
+            else:
+                # Not listed under this exact name (the filesystem may
+                # be case-insensitive or normalize Unicode), so look it
+                # up directly.
+                mtime = int(os.path.getmtime(syspath(path)))
+        except OSError:
+            mtime = None
+        out.append((path, mtime))
+    return out
+
+
+def mtimes(paths, threads=None):
+    """Get the modification times of many files, rounded down to whole
+    seconds, as a dictionary mapping each path to its mtime or to None
+    if the file does not exist. The files are grouped by directory and
+    the directories are examined in parallel.
+    """
+    by_dir = OrderedDict()
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+
+    out = {}
+    for result in par_map(lambda d: _dir_mtimes(d, by_dir[d]), by_dir,
+                          threads):
+        out.update(result)
+    return out
+
+
 def convert_command_args(args):
     """Convert command arguments to bytestrings on Python 2 and
     surrogate-escaped strings on Python 3."""
@@ -790,12 +924,13 @@ def command_output(cmd, shell=False):
     return stdout
 
 
+@lru_cache(maxsize=64)
 def max_filename_length(path, limit=MAX_FILENAME_LENGTH):
     """Attempt to determine the maximum filename length for the
     filesystem containing `path`. If the value is greater than `limit`,
     then `limit` is used instead (to prevent errors when a filesystem
     misreports its capacity). If it cannot be determined (e.g., on
-    Windows), return `limit`.
+    Windows), return `limit`. Results are cached per directory.
     """
     if hasattr(os, 'statvfs'):
         try:
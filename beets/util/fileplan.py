@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# This file is part of beets.
+# Copyright 2016, Adrian Sampson.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+"""Plan and perform many file moves, copies, and links at once.
+
+A `FilePlan` chooses the destination of every operation before any file
+is touched, so planned files never collide with each other or with
+existing files. The operations then run on a pool of threads. An
+optional journal records the plan and every finished operation so that
+an interrupted run can be completed later.
+"""
+from __future__ import division, absolute_import, print_function
+
+import base64
+import json
+import os
+
+from beets import util
+
+MOVE = 'move'
+COPY = 'copy'
+LINK = 'link'
+
+_FUNCS = {
+    MOVE: util.move,
+    COPY: util.copy,
+    LINK: util.link,
+}
+
+
+def _encode_path(path):
+    return base64.b64encode(path).decode('ascii')
+
+
+def _decode_path(data):
+    return base64.b64decode(data.encode('ascii'))
+
+
+class Operation(object):
+    """A planned move, copy, or link of the file at `src` to `dest`.
+    `key` identifies the object the file belongs to (e.g., an item
+    ID).
+    """
+    def __init__(self, key, src, dest, kind=MOVE):
+        self.key = key
+        self.src = src
+        self.dest = dest
+        self.kind = kind
+        self.index = None
+        self.done = False
+
+        # Only set for operations loaded from a journal: the destination
+        # may then hold a partial copy made by the interrupted run.
+        self.replace = False
+
+    def run(self):
+        """Perform the operation. Can raise a `FilesystemError`.
+        """
+        _FUNCS[self.kind](self.src, self.dest, replace=self.replace)
+
+    def _to_json(self):
+        return json.dumps({
+            'key': self.key,
+            'src': _encode_path(self.src),
+            'dest': _encode_path(self.dest),
+            'kind': self.kind,
+        })
+
+    @classmethod
+    def _from_json(cls, data):
+        return cls(data['key'], _decode_path(data['src']),
+                   _decode_path(data['dest']), data['kind'])
+
+    def __repr__(self):
+        return '{0}({1!r}, {2!r}, {3!r}, {4!r})'.format(
+            type(self).__name__, self.key, self.src, self.dest, self.kind
+        )
+
+
+class FilePlan(object):
+    """A batch of file operations.
+
+    Add the operations with `add` and perform them with `run`; the
+    planned operations are in the `ops` list. If a
+    `journal` path is given, the plan is saved there before any file is
+    touched and every finished operation is recorded; call `finish`
+    once the results are safely stored to remove the journal. `owner`
+    (a path, as bytes or text) is saved along with the plan so that
+    `load` can tell whether a journal belongs to the caller.
+    """
+    def __init__(self, journal=None, owner=None):
+        self.journal = util.bytestring_path(journal) if journal else None
+        self.owner = util.bytestring_path(owner) if owner else None
+        self.ops = []
+        self._claimed = set()
+
+    def add(self, key, src, dest, kind=MOVE):
+        """Plan an operation and return it. If `dest` exists or is
+        already the destination of another planned operation, the
+        operation's destination is made unique instead (see
+        `util.unique_path`).
+        """
+        if not util.samefile(src, dest):
+            dest = util.unique_path(dest, self._claimed)
+        self._claimed.add(dest)
+        op = Operation(key, src, dest, kind)
+        self._append(op)
+        return op
+
+    def _append(self, op):
+        op.index = len(self.ops)
+        self.ops.append(op)
+
+    def pending(self):
+        """Get the operations that have not been performed yet.
+        """
+        return [op for op in self.ops if not op.done]
+
+    def run(self, threads=None):
+        """Perform the pending operations with at most `threads` of them
+        running at once. Generate `(op, exc)` pairs as the operations
+        finish, where `exc` is the `FilesystemError` that made the
+        operation fail or None.
+        """
+        pending = self.pending()
+
+        # Create the directories up front so that the workers do not
+        # race to create the same ones.
+        dirs = dict((os.path.dirname(op.dest), op.dest) for op in pending)
+        for dest in dirs.values():
+            util.mkdirall(dest)
+
+        def perform(op):
+            try:
+                op.run()
+            except util.FilesystemError as exc:
+                return op, exc
+            return op, None
+
+        journal = self._open_journal()
+        try:
+            for op, exc in util.par_map(perform, pending, threads):
+                if exc is None:
+                    op.done = True
+                    if journal:
+                        # Flush every record so it survives if the
+                        # process is killed.
+                        journal.write(json.dumps({'done': op.index}))
+                        journal.write('\n')
+                        journal.flush()
+                yield op, exc
+        finally:
+            if journal:
+                journal.close()
+
+    def _open_journal(self):
+        """Write the whole plan to the journal, if any, and return the
+        journal file opened for appending the finished operations.
+        """
+        if not self.journal:
+            return None
+
+        lines = [json.dumps({'owner': _encode_path(self.owner or b'')})]
+        for index, op in enumerate(self.ops):
+            op.index = index
+            lines.append(op._to_json())
+            if op.done:
+                lines.append(json.dumps({'done': op.index}))
+
+        # Replace any old journal atomically, so a valid plan is on disk
+        # at all times.
+        util.mkdirall(self.journal)
+        path = util.syspath(self.journal)
+        tmp = util.syspath(self.journal + b'.tmp')
+        with open(tmp, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        if os.name == 'nt' and os.path.exists(path):
+            # Windows cannot rename over an existing file.
+            os.remove(path)
+        os.rename(tmp, path)
+
+        return open(path, 'a')
+
+    def finish(self):
+        """Remove the journal, once the results of the operations are
+        stored.
+        """
+        if self.journal and os.path.exists(util.syspath(self.journal)):
+            util.remove(self.journal)
+
+    @classmethod
+    def load(cls, journal, owner=None):
+        """Load the plan of an interrupted run from `journal`. Return
+        None if there is no journal or if it was written for a
+        different `owner`.
+
+        Operations recorded as finished are marked as done. The others
+        may have been partially performed, so they will replace their
+        destination file when they are run again, unless they are moves
+        whose source is gone and whose destination exists: those are
+        done too.
+        """
+        path = util.syspath(util.bytestring_path(journal))
+        if not os.path.exists(path):
+            return None
+
+        plan = cls(journal, owner)
+        with open(path) as f:
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A truncated last line.
+                    break
+
+        if not records or \
+                _decode_path(records[0].get('owner', u'')) != \
+                (plan.owner or b''):
+            return None
+
+        for record in records[1:]:
+            if 'done' in record:
+                plan.ops[record['done']].done = True
+            else:
+                op = Operation._from_json(record)
+                op.replace = True
+                plan._append(op)
+                plan._claimed.add(op.dest)
+
+        for op in plan.pending():
+            if op.kind == MOVE and \
+                    not os.path.exists(util.syspath(op.src)) and \
+                    os.path.exists(util.syspath(op.dest)):
+                op.done = True
+        return plan
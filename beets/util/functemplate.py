@@ -36,6 +36,8 @@ import types
 import sys
 import six
 
+from beets.util import lru_cache
+
 SYMBOL_DELIM = u'$'
 FUNC_DELIM = u'%'
 GROUP_OPEN = u'{'
@@ -546,6 +548,15 @@ def _parse(template):
 
 # External interface.
 
+@lru_cache(maxsize=256)
+def template(fmt):
+    """Get a `Template` for the format string `fmt`. Templates are
+    cached, so formatting many objects with the same string only parses
+    and compiles it once.
+    """
+    return Template(fmt)
+
+
 class Template(object):
     """A string template, including text, Symbols, and Calls.
     """
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# This file is part of beets.
+# Copyright 2016, Adrian Sampson.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+"""A persistent cache of facts about files, such as their audio
+properties, checksums, or the results of integrity checks.
+
+Every value is stored along with the size and modification time of the
+file it was computed from and is only used while the file still has
+them, so commands that scan the same files again can skip the
+unchanged ones.
+"""
+from __future__ import division, absolute_import, print_function
+
+import json
+import os
+import sqlite3
+import threading
+
+import six
+
+from beets import mediafile
+from beets import util
+
+if six.PY2:
+    BLOB_TYPE = buffer  # noqa: F821
+else:
+    BLOB_TYPE = memoryview
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path BLOB NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (path, kind)
+);
+"""
+
+# The number of new values to keep before writing them to disk.
+COMMIT_INTERVAL = 100
+
+AUDIO = u'audio'
+"""The kind of the values stored by `probe`."""
+
+
+def _file_state(path):
+    """Get the size and modification time of a file, or None if it
+    cannot be accessed.
+    """
+    try:
+        st = os.stat(util.syspath(path))
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime
+
+
+class ProbeCache(object):
+    """A cache of values computed from the files at given paths. Each
+    file can have values of several kinds (e.g., its audio properties
+    and its checksum), identified by a string. Values must be
+    serializable as JSON.
+
+    The cache can be used from several threads. New values are written
+    to disk in batches; call `close` to write the last ones.
+    """
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(util.syspath(path),
+                                     check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._pending = 0
+
+    @classmethod
+    def from_config(cls, view):
+        """Open the cache configured by the Confit `view` (a filename),
+        or return None if it is disabled (null).
+        """
+        if view.get() is None:
+            return None
+        return cls(view.as_filename())
+
+    def get(self, path, kind):
+        """Get the value of `kind` for the file at `path`, or None if
+        there is none or if the file has changed since the value was
+        stored.
+        """
+        state = _file_state(path)
+        if state is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT size, mtime, value FROM probes '
+                'WHERE path = ? AND kind = ?',
+                (BLOB_TYPE(path), kind)
+            ).fetchone()
+        if row is None or tuple(row[:2]) != state:
+            return None
+        return json.loads(row[2])
+
+    def set(self, path, kind, value):
+        """Store the value of `kind` for the current contents of the file
+        at `path`.
+        """
+        state = _file_state(path)
+        if state is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)',
+                (BLOB_TYPE(path), kind) + state + (json.dumps(value),)
+            )
+            self._pending += 1
+            if self._pending >= COMMIT_INTERVAL:
+                self._conn.commit()
+                self._pending = 0
+
+    def lookup(self, path, kind, func):
+        """Get the value of `kind` for the file at `path`, computing it
+        as `func(path)` and storing it if it is not cached.
+        """
+        value = self.get(path, kind)
+        if value is None:
+            value = func(path)
+            if value is not None:
+                self.set(path, kind, value)
+        return value
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+def probe(path, cache=None):
+    """Get the audio properties of the file at `path` (see
+    `mediafile.probe`), from `cache` if it is given and knows the file.
+    May raise `UnreadableFileError`.
+    """
+    if cache is None:
+        return mediafile.probe(util.syspath(path))
+    return cache.lookup(path, AUDIO,
+                        lambda p: mediafile.probe(util.syspath(p)))
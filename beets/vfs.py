@@ -46,8 +46,8 @@ def libtree(lib):
     child node tuples.
     """
     root = Node({}, {})
-    for item in lib.items():
-        dest = item.destination(fragment=True)
+    items = lib.items(with_albums=True)
+    for item, dest in lib.destinations(items, fragment=True):
         parts = util.components(dest)
         _insert(root, parts, item.id)
     return root
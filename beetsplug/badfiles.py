@@ -21,7 +21,8 @@ from __future__ import division, absolute_import, print_function
 from beets.plugins import BeetsPlugin
 from beets.ui import Subcommand
 from beets.util import displayable_path, confit
-from beets import ui
+from beets.util.probecache import ProbeCache
+from beets import config, ui
 from subprocess import check_output, CalledProcessError, list2cmdline, STDOUT
 import shlex
 import os
@@ -68,12 +69,18 @@ class BadFiles(BeetsPlugin):
             return self.run_command(cmd)
         return checker
 
-    def get_checker(self, ext):
-        ext = ext.lower()
+    def get_command(self, ext):
+        """Get the custom checker command configured for the extension
+        `ext`, if any.
+        """
         try:
-            command = self.config['commands'].get(dict).get(ext)
+            return self.config['commands'].get(dict).get(ext.lower())
         except confit.NotFoundError:
-            command = None
+            return None
+
+    def get_checker(self, ext):
+        ext = ext.lower()
+        command = self.get_command(ext)
         if command:
             return self.check_custom(command)
         elif ext == "mp3":
@@ -82,37 +89,57 @@ class BadFiles(BeetsPlugin):
             return self.check_flac
 
     def check_bad(self, lib, opts, args):
-        for item in lib.items(ui.decargs(args)):
+        cache = ProbeCache.from_config(config['probe_cache'])
+        try:
+            for item in lib.items(ui.decargs(args)):
+                self.check_item(item, cache)
+        finally:
+            if cache:
+                cache.close()
 
-            # First, check whether the path exists. If not, the user
-            # should probably run `beet update` to cleanup your library.
-            dpath = displayable_path(item.path)
-            self._log.debug(u"checking path: {}", dpath)
-            if not os.path.exists(item.path):
-                ui.print_(u"{}: file does not exist".format(
-                    ui.colorize('text_error', dpath)))
+    def check_item(self, item, cache=None):
+        """Check the file of `item` and print the result. If a
+        `ProbeCache` is given, files that have not changed since they
+        were last checked with the same checker are not checked again.
+        """
+        # First, check whether the path exists. If not, the user
+        # should probably run `beet update` to cleanup your library.
+        dpath = displayable_path(item.path)
+        self._log.debug(u"checking path: {}", dpath)
+        if not os.path.exists(item.path):
+            ui.print_(u"{}: file does not exist".format(
+                ui.colorize('text_error', dpath)))
 
-            # Run the checker against the file if one is found
-            ext = os.path.splitext(item.path)[1][1:]
-            checker = self.get_checker(ext)
-            if not checker:
-                continue
-            path = item.path
-            if not isinstance(path, six.text_type):
-                path = item.path.decode(sys.getfilesystemencoding())
+        # Run the checker against the file if one is found
+        ext = os.path.splitext(item.path)[1][1:]
+        checker = self.get_checker(ext)
+        if not checker:
+            return
+        path = item.path
+        if not isinstance(path, six.text_type):
+            path = item.path.decode(sys.getfilesystemencoding())
+        if cache:
+            # The results are specific to the checker.
+            kind = u'badfiles:{0}'.format(
+                self.get_command(ext) or displayable_path(ext).lower()
+            )
+            status, errors, output = cache.lookup(
+                item.path, kind, lambda _: list(checker(path))
+            )
+        else:
             status, errors, output = checker(path)
-            if status > 0:
-                ui.print_(u"{}: checker exited withs status {}"
-                          .format(ui.colorize('text_error', dpath), status))
-                for line in output:
-                    ui.print_(u"  {}".format(displayable_path(line)))
-            elif errors > 0:
-                ui.print_(u"{}: checker found {} errors or warnings"
-                          .format(ui.colorize('text_warning', dpath), errors))
-                for line in output:
-                    ui.print_(u"  {}".format(displayable_path(line)))
-            else:
-                ui.print_(u"{}: ok".format(ui.colorize('text_success', dpath)))
+        if status > 0:
+            ui.print_(u"{}: checker exited withs status {}"
+                      .format(ui.colorize('text_error', dpath), status))
+            for line in output:
+                ui.print_(u"  {}".format(displayable_path(line)))
+        elif errors > 0:
+            ui.print_(u"{}: checker found {} errors or warnings"
+                      .format(ui.colorize('text_warning', dpath), errors))
+            for line in output:
+                ui.print_(u"  {}".format(displayable_path(line)))
+        else:
+            ui.print_(u"{}: ok".format(ui.colorize('text_success', dpath)))
 
     def commands(self):
         bad_command = Subcommand('bad',
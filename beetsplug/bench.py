@@ -24,8 +24,10 @@ from beets import vfs
 from beets import library
 from beets.util.functemplate import Template
 from beets.autotag import match
+from beets.autotag import hooks
 from beets import plugins
 from beets import importer
+from munkres import Munkres
 import cProfile
 import timeit
 
@@ -83,6 +85,65 @@ def match_benchmark(lib, prof, query=None, album_id=None):
         interval = timeit.timeit(_run_match, number=1)
         print('match duration:', interval)
 
+    # Compare the cost matrix construction and assignment strategies
+    # against the same album's tracks.
+    info = hooks.album_for_mbid(album_id)
+    if info:
+        assign_benchmark(items, info.tracks, prof)
+
+
+def assign_benchmark(items, tracks, prof):
+    def _assign_munkres():
+        Munkres().compute(match.track_costs(items, tracks))
+
+    def _assign_vectorized():
+        match.linear_sum_assignment(match.track_cost_matrix(items, tracks))
+
+    funcs = [('munkres', _assign_munkres)]
+    if match.numpy is not None:
+        funcs.append(('vectorized', _assign_vectorized))
+
+    for name, func in funcs:
+        if prof:
+            cProfile.runctx('_assign()', {}, {'_assign': func},
+                            'assign.{0}.prof'.format(name))
+        else:
+            interval = timeit.timeit(func, number=1)
+            print('assignment duration ({0}):'.format(name), interval)
+
+
+def model_benchmark(lib, prof, query=None):
+    # Copy the fields of the matching items so the benchmark does not
+    # depend on the database.
+    values = [dict(item) for item in lib.items(query)]
+    if not values:
+        print('No items to benchmark.')
+        return
+    items = [library.Item(**v) for v in values]
+
+    def _construct():
+        for v in values:
+            library.Item(**v)
+
+    def _assign():
+        for item in items:
+            for key, value in values[0].items():
+                item[key] = value
+
+    def _keys():
+        for item in items:
+            item.keys(True)
+
+    for name, func in [('construct', _construct), ('assign', _assign),
+                       ('keys', _keys)]:
+        if prof:
+            cProfile.runctx('_run()', {}, {'_run': func},
+                            'model.{0}.prof'.format(name))
+        else:
+            interval = timeit.timeit(func, number=1)
+            print('{0} duration ({1} items):'.format(name, len(items)),
+                  interval)
+
 
 class BenchmarkPlugin(BeetsPlugin):
     """A plugin for performing some simple performance benchmarks.
@@ -106,4 +167,12 @@ class BenchmarkPlugin(BeetsPlugin):
         match_bench_cmd.func = lambda lib, opts, args: \
             match_benchmark(lib, opts.profile, ui.decargs(args), opts.id)
 
-        return [aunique_bench_cmd, match_bench_cmd]
+        model_bench_cmd = ui.Subcommand('bench_model',
+                                        help='benchmark for item fields')
+        model_bench_cmd.parser.add_option('-p', '--profile',
+                                          action='store_true', default=False,
+                                          help='performance profiling')
+        model_bench_cmd.func = lambda lib, opts, args: \
+            model_benchmark(lib, opts.profile, ui.decargs(args))
+
+        return [aunique_bench_cmd, match_bench_cmd, model_bench_cmd]
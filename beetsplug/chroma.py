@@ -132,6 +132,7 @@ class AcoustidPlugin(plugins.BeetsPlugin):
 
         self.config.add({
             'auto': True,
+            'threads': util.cpu_count(),
         })
         config['acoustid']['apikey'].redact = True
 
@@ -140,7 +141,8 @@ class AcoustidPlugin(plugins.BeetsPlugin):
         self.register_listener('import_task_apply', apply_acoustid_metadata)
 
     def fingerprint_task(self, task, session):
-        return fingerprint_task(self._log, task, session)
+        return fingerprint_task(self._log, task, session,
+                                self.config['threads'].get(int))
 
     def track_distance(self, item, info):
         dist = hooks.Distance()
@@ -184,7 +186,13 @@ class AcoustidPlugin(plugins.BeetsPlugin):
                 apikey = config['acoustid']['apikey'].as_str()
             except confit.NotFoundError:
                 raise ui.UserError(u'no Acoustid user API key provided')
-            submit_items(self._log, apikey, lib.items(ui.decargs(args)))
+            threads = opts.threads or self.config['threads'].get(int)
+            submit_items(self._log, apikey, lib.items(ui.decargs(args)),
+                         threads=threads)
+        submit_cmd.parser.add_option(
+            u'-t', u'--threads', action='store', type='int',
+            help=u'number of files to fingerprint at once',
+        )
         submit_cmd.func = submit_cmd_func
 
         fingerprint_cmd = ui.Subcommand(
@@ -193,8 +201,15 @@ class AcoustidPlugin(plugins.BeetsPlugin):
         )
 
         def fingerprint_cmd_func(lib, opts, args):
-            for item in lib.items(ui.decargs(args)):
-                fingerprint_item(self._log, item, write=ui.should_write())
+            threads = opts.threads or self.config['threads'].get(int)
+            for _ in fingerprint_items(self._log, lib.items(ui.decargs(args)),
+                                       write=ui.should_write(),
+                                       threads=threads):
+                pass
+        fingerprint_cmd.parser.add_option(
+            u'-t', u'--threads', action='store', type='int',
+            help=u'number of files to fingerprint at once',
+        )
         fingerprint_cmd.func = fingerprint_cmd_func
 
         return [submit_cmd, fingerprint_cmd]
@@ -203,13 +218,15 @@ class AcoustidPlugin(plugins.BeetsPlugin):
 # Hooks into import process.
 
 
-def fingerprint_task(log, task, session):
+def fingerprint_task(log, task, session, threads=None):
     """Fingerprint each item in the task for later use during the
-    autotagging candidate search.
+    autotagging candidate search. Up to `threads` items are fingerprinted
+    and looked up at once.
     """
     items = task.items if task.is_album else [task.item]
-    for item in items:
-        acoustid_match(log, item.path)
+    for _ in util.par_map(lambda item: acoustid_match(log, item.path),
+                          items, threads):
+        pass
 
 
 def apply_acoustid_metadata(task, session):
@@ -225,8 +242,9 @@ def apply_acoustid_metadata(task, session):
 # UI commands.
 
 
-def submit_items(log, userkey, items, chunksize=64):
-    """Submit fingerprints for the items to the Acoustid server.
+def submit_items(log, userkey, items, chunksize=64, threads=None):
+    """Submit fingerprints for the items to the Acoustid server. Missing
+    fingerprints are generated using up to `threads` threads.
     """
     data = []  # The running list of dictionaries to submit.
 
@@ -239,9 +257,7 @@ def submit_items(log, userkey, items, chunksize=64):
             log.warning(u'acoustid submission error: {0}', exc)
         del data[:]
 
-    for item in items:
-        fp = fingerprint_item(log, item)
-
+    for item, fp in fingerprint_items(log, items, threads=threads):
         # Construct a submission dictionary for this item.
         item_data = {
             'duration': int(item.length),
@@ -272,6 +288,43 @@ def submit_items(log, userkey, items, chunksize=64):
         submit_chunk()
 
 
+def _generate_fingerprint(log, item):
+    """Run the fingerprinter on an Item's file. Return an `(item,
+    fingerprint)` pair, where the fingerprint is None if generation
+    failed. This does not modify the item, so it is safe to call from
+    worker threads.
+    """
+    log.info(u'{0}: fingerprinting',
+             util.displayable_path(item.path))
+    try:
+        _, fp = acoustid.fingerprint_file(util.syspath(item.path))
+    except acoustid.FingerprintGenerationError as exc:
+        log.info(u'fingerprint generation failed: {0}', exc)
+        return item, None
+    return item, fp
+
+
+def _set_fingerprint(log, item, fp, write):
+    """Attach a newly generated fingerprint to an Item and, if `write`
+    is set, write it to the file's metadata.
+    """
+    item.acoustid_fingerprint = fp
+    if write:
+        log.info(u'{0}: writing fingerprint',
+                 util.displayable_path(item.path))
+        item.try_write()
+
+
+def _store_items(items):
+    """Save a batch of Items to their database in a single transaction.
+    """
+    items = [item for item in items if item._db]
+    if items:
+        with items[0]._db.transaction():
+            for item in items:
+                item.store()
+
+
 def fingerprint_item(log, item, write=False):
     """Get the fingerprint for an Item. If the item already has a
     fingerprint, it is not regenerated. If fingerprint generation fails,
@@ -292,17 +345,39 @@ def fingerprint_item(log, item, write=False):
                      util.displayable_path(item.path))
             return item.acoustid_fingerprint
     else:
-        log.info(u'{0}: fingerprinting',
-                 util.displayable_path(item.path))
-        try:
-            _, fp = acoustid.fingerprint_file(item.path)
-            item.acoustid_fingerprint = fp
-            if write:
-                log.info(u'{0}: writing fingerprint',
-                         util.displayable_path(item.path))
-                item.try_write()
+        _, fp = _generate_fingerprint(log, item)
+        if fp:
+            _set_fingerprint(log, item, fp, write)
             if item._db:
                 item.store()
-            return item.acoustid_fingerprint
-        except acoustid.FingerprintGenerationError as exc:
-            log.info(u'fingerprint generation failed: {0}', exc)
+            return fp
+
+
+def fingerprint_items(log, items, write=False, threads=None, chunksize=64):
+    """Get fingerprints for many Items, like `fingerprint_item`, with up
+    to `threads` files being fingerprinted at once. Generate `(item,
+    fingerprint)` pairs as soon as each fingerprint is available. New
+    fingerprints are saved to the database in batches of `chunksize`.
+    """
+    pending = []
+    for item in items:
+        if not item.length or item.acoustid_fingerprint:
+            # Nothing to generate.
+            yield item, fingerprint_item(log, item, write)
+        else:
+            pending.append(item)
+
+    unsaved = []
+    try:
+        for item, fp in util.par_map(
+                lambda item: _generate_fingerprint(log, item),
+                pending, threads):
+            if fp:
+                _set_fingerprint(log, item, fp, write)
+                unsaved.append(item)
+                if len(unsaved) >= chunksize:
+                    _store_items(unsaved)
+                    del unsaved[:]
+            yield item, fp
+    finally:
+        _store_items(unsaved)
@@ -22,11 +22,18 @@ import threading
 import subprocess
 import tempfile
 import shlex
+import sqlite3
+import hashlib
+import time
 import six
+from multiprocessing.pool import ThreadPool
 from string import Template
 
 from beets import ui, util, plugins, config
+from beets import library
 from beets.plugins import BeetsPlugin
+from beets.mediafile import MediaFile, UnreadableFileError
+from beets.util import confit
 from beets.util.confit import ConfigTypeError
 from beets import art
 from beets.util.artresizer import ArtResizer
@@ -99,6 +106,164 @@ def should_transcode(item, fmt):
         item.bitrate >= 1000 * maxbr
 
 
+def conversion_method(command, transcode):
+    """Get a short string identifying how a file is converted: either
+    by copying it or by transcoding it with the command template
+    `command`.
+    """
+    if not transcode:
+        return u'copy'
+    return u'sha1:' + hashlib.sha1(command).hexdigest()
+
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    dest BLOB PRIMARY KEY,
+    source BLOB NOT NULL,
+    source_mtime REAL NOT NULL,
+    source_size INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    dest_mtime REAL NOT NULL,
+    dest_size INTEGER NOT NULL,
+    audio TEXT,
+    tags TEXT
+);
+"""
+
+# The results of `Manifest.check`.
+CURRENT = 'current'
+RETAG = 'retag'
+STALE = 'stale'
+
+# The results of `ConvertPlugin.convert_item`.
+SKIPPED = 'skipped'
+RETAGGED = 'retagged'
+COPIED = 'copied'
+TRANSCODED = 'transcoded'
+
+
+def _file_state(path):
+    """Get the modification time and size of a file.
+    """
+    st = os.stat(util.syspath(path))
+    return st.st_mtime, st.st_size
+
+
+def audio_signature(path):
+    """Get a string summarizing the audio properties of a file, which
+    only changes when its audio is replaced. Return None if the file
+    cannot be read.
+    """
+    try:
+        mf = MediaFile(util.syspath(path))
+    except UnreadableFileError:
+        return None
+    # `MediaFile.bitrate` is estimated from the file size, tags included,
+    # when the format does not store it, so only use the stream's own.
+    bitrate = getattr(mf.mgfile.info, 'bitrate', None) or u''
+    return u'{0}:{1:.3f}:{2}:{3}:{4}:{5}'.format(
+        mf.format, mf.length, bitrate, mf.samplerate, mf.bitdepth,
+        mf.channels,
+    )
+
+
+def tag_hash(item, artpath=None):
+    """Hash the metadata that is written to the files converted from
+    `item`: its media fields and, if given, the album art embedded in
+    them.
+    """
+    h = hashlib.sha1()
+    for key in sorted(item._media_fields):
+        h.update(repr((key, item.get(key))).encode('utf-8'))
+    if artpath:
+        h.update(artpath)
+        h.update(repr(_file_state(artpath)).encode('utf-8'))
+    return h.hexdigest()
+
+
+class Manifest(object):
+    """A record of the files made by the `convert` command. For every
+    converted file, it remembers the state of the source file it was
+    made from, how it was made, and a hash of the tags written to it,
+    so that later runs can tell whether the converted file is still up
+    to date.
+
+    The manifest can be used from several threads.
+    """
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(MANIFEST_SCHEMA)
+
+            # Add the columns missing from older manifests.
+            columns = set(row[1] for row in self._conn.execute(
+                'PRAGMA table_info(conversions)'
+            ))
+            for column in ('audio', 'tags'):
+                if column not in columns:
+                    self._conn.execute(
+                        'ALTER TABLE conversions ADD COLUMN {0} TEXT'
+                        .format(column)
+                    )
+
+    def check(self, source, dest, method, tags):
+        """Compare the converted file `dest` with the manifest's record.
+
+        Return None if there is no record of `dest`. Return `CURRENT` if
+        it was made from the current contents of `source` using `method`
+        and with the tags hashed as `tags`, and has not been modified
+        since. Return `RETAG` if only the tags are out of date: either
+        the hash differs or the source file was modified but its audio
+        is unchanged. Return `STALE` if the file needs to be converted
+        again.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT source, source_mtime, source_size, method, '
+                'dest_mtime, dest_size, audio, tags '
+                'FROM conversions WHERE dest = ?',
+                (library.BLOB_TYPE(dest),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        try:
+            source_state = _file_state(source)
+            dest_state = _file_state(dest)
+        except OSError:
+            return STALE
+        if bytes(row[0]) != source or row[3] != method or \
+                tuple(row[4:6]) != dest_state:
+            return STALE
+
+        if tuple(row[1:3]) != source_state:
+            # The tags of the source may have been rewritten.
+            if row[6] is None or audio_signature(source) != row[6]:
+                return STALE
+            return RETAG
+        return CURRENT if row[7] == tags else RETAG
+
+    def record(self, source, dest, method, tags):
+        """Remember that `dest` was made from the current contents of
+        `source` using `method` and that the tags hashed as `tags` were
+        written to it.
+        """
+        row = (library.BLOB_TYPE(dest), library.BLOB_TYPE(source)) + \
+            _file_state(source) + (method,) + _file_state(dest) + \
+            (audio_signature(source), tags)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO conversions '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', row
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
 class ConvertPlugin(BeetsPlugin):
     def __init__(self):
         super(ConvertPlugin, self).__init__()
@@ -106,6 +271,7 @@ class ConvertPlugin(BeetsPlugin):
             u'dest': None,
             u'pretend': False,
             u'threads': util.cpu_count(),
+            u'io_threads': 4,
             u'format': u'mp3',
             u'formats': {
                 u'aac': {
@@ -135,6 +301,7 @@ class ConvertPlugin(BeetsPlugin):
             u'never_convert_lossy_files': False,
             u'copy_album_art': False,
             u'album_art_maxwidth': 0,
+            u'manifest': u'convert.db',
         })
         self.import_stages = [self.auto_convert]
 
@@ -229,109 +396,164 @@ class ConvertPlugin(BeetsPlugin):
             self._log.info(u'Finished encoding {0}',
                            util.displayable_path(source))
 
-    def convert_item(self, dest_dir, keep_new, path_formats, fmt,
-                     pretend=False):
-        """A pipeline thread that converts `Item` objects from a
-        library.
+    def convert_item(self, item, dest, keep_new, fmt, pretend=False,
+                     manifest=None):
+        """Convert an `Item` to the path `dest` (as generated by
+        `Library.destinations`), changing the extension if the file is
+        transcoded. Return what was done: `SKIPPED`, `RETAGGED`,
+        `COPIED`, or `TRANSCODED`, or None if the conversion failed.
+
+        If a `Manifest` is given, existing destination files are
+        converted again when their source has changed since they were
+        made (unless `keep_new` is set).
         """
         command, ext = get_format(fmt)
-        item, original, converted = None, None, None
-        while True:
-            item = yield (item, original, converted)
-            dest = item.destination(basedir=dest_dir,
-                                    path_formats=path_formats)
-
-            # When keeping the new file in the library, we first move the
-            # current (pristine) file to the destination. We'll then copy it
-            # back to its old path or transcode it to a new path.
-            if keep_new:
-                original = dest
-                converted = item.path
-                if should_transcode(item, fmt):
-                    converted = replace_ext(converted, ext)
-            else:
-                original = item.path
-                if should_transcode(item, fmt):
-                    dest = replace_ext(dest, ext)
-                converted = dest
-
-            # Ensure that only one thread tries to create directories at a
-            # time. (The existence check is not atomic with the directory
-            # creation inside this function.)
-            if not pretend:
-                with _fs_lock:
-                    util.mkdirall(dest)
+        if keep_new:
+            # The converted files replace the library's: there is no
+            # destination to keep up to date.
+            manifest = None
+
+        transcode = should_transcode(item, fmt)
+        method = conversion_method(command, transcode)
+
+        # When keeping the new file in the library, we first move the
+        # current (pristine) file to the destination. We'll then copy it
+        # back to its old path or transcode it to a new path.
+        if keep_new:
+            original = dest
+            converted = item.path
+            if transcode:
+                converted = replace_ext(converted, ext)
+        else:
+            original = item.path
+            if transcode:
+                dest = replace_ext(dest, ext)
+            converted = dest
+
+        # Ensure that only one thread tries to create directories at a
+        # time. (The existence check is not atomic with the directory
+        # creation inside this function.)
+        if not pretend:
+            with _fs_lock:
+                util.mkdirall(dest)
+
+        artpath = self._embedded_art(item)
+        tags = tag_hash(item, artpath) if manifest else None
 
-            if os.path.exists(util.syspath(dest)):
+        if os.path.exists(util.syspath(dest)):
+            status = manifest and manifest.check(original, converted,
+                                                 method, tags)
+            if status == STALE:
+                self._log.info(u'Updating {0} (source changed)',
+                               util.displayable_path(item.path))
+                if not pretend:
+                    util.remove(converted)
+            elif status == RETAG:
+                # The audio is unchanged: just write the new tags.
+                self._log.info(u'Updating tags of {0}',
+                               util.displayable_path(converted))
+                if not pretend:
+                    self._write_tags(item, converted, artpath)
+                    manifest.record(original, converted, method, tags)
+                return RETAGGED
+            else:
+                if status is None and manifest and not pretend:
+                    # Made before the manifest was kept: assume it is up
+                    # to date from now on.
+                    manifest.record(original, converted, method, tags)
                 self._log.info(u'Skipping {0} (target file exists)',
                                util.displayable_path(item.path))
-                continue
-
-            if keep_new:
-                if pretend:
-                    self._log.info(u'mv {0} {1}',
-                                   util.displayable_path(item.path),
-                                   util.displayable_path(original))
-                else:
-                    self._log.info(u'Moving to {0}',
-                                   util.displayable_path(original))
-                    util.move(item.path, original)
+                return SKIPPED
 
-            if should_transcode(item, fmt):
-                try:
-                    self.encode(command, original, converted, pretend)
-                except subprocess.CalledProcessError:
-                    continue
+        if keep_new:
+            if pretend:
+                self._log.info(u'mv {0} {1}',
+                               util.displayable_path(item.path),
+                               util.displayable_path(original))
             else:
-                if pretend:
-                    self._log.info(u'cp {0} {1}',
-                                   util.displayable_path(original),
-                                   util.displayable_path(converted))
-                else:
-                    # No transcoding necessary.
-                    self._log.info(u'Copying {0}',
-                                   util.displayable_path(item.path))
-                    util.copy(original, converted)
+                self._log.info(u'Moving to {0}',
+                               util.displayable_path(original))
+                util.move(item.path, original)
 
+        if transcode:
+            try:
+                self.encode(command, original, converted, pretend)
+            except subprocess.CalledProcessError:
+                return None
+        else:
             if pretend:
-                continue
+                self._log.info(u'cp {0} {1}',
+                               util.displayable_path(original),
+                               util.displayable_path(converted))
+            else:
+                # No transcoding necessary.
+                self._log.info(u'Copying {0}',
+                               util.displayable_path(item.path))
+                util.copy(original, converted)
+
+        if pretend:
+            return TRANSCODED if transcode else COPIED
 
+        if keep_new:
             # Write tags from the database to the converted file.
             item.try_write(path=converted)
 
-            if keep_new:
-                # If we're keeping the transcoded file, read it again (after
-                # writing) to get new bitrate, duration, etc.
-                item.path = converted
-                item.read()
-                item.store()  # Store new path and audio data.
-
-            if self.config['embed']:
-                album = item.get_album()
-                if album and album.artpath:
-                    self._log.debug(u'embedding album art from {}',
-                                    util.displayable_path(album.artpath))
-                    art.embed_item(self._log, item, album.artpath,
-                                   itempath=converted)
-
-            if keep_new:
-                plugins.send('after_convert', item=item,
-                             dest=dest, keepnew=True)
-            else:
-                plugins.send('after_convert', item=item,
-                             dest=converted, keepnew=False)
+            # If we're keeping the transcoded file, read it again (after
+            # writing) to get new bitrate, duration, etc.
+            item.path = converted
+            item.read()
+            item.store()  # Store new path and audio data.
+
+            if artpath:
+                self._embed_art(item, converted, artpath)
+        else:
+            self._write_tags(item, converted, artpath)
+
+        if manifest:
+            manifest.record(original, converted, method, tags)
+
+        if keep_new:
+            plugins.send('after_convert', item=item,
+                         dest=dest, keepnew=True)
+        else:
+            plugins.send('after_convert', item=item,
+                         dest=converted, keepnew=False)
+        return TRANSCODED if transcode else COPIED
+
+    def _embedded_art(self, item):
+        """Get the path of the album art to embed in the files converted
+        from `item`, or None.
+        """
+        if self.config['embed']:
+            album = item.get_album()
+            if album and album.artpath:
+                return album.artpath
+        return None
+
+    def _embed_art(self, item, path, artpath):
+        self._log.debug(u'embedding album art from {}',
+                        util.displayable_path(artpath))
+        art.embed_item(self._log, item, artpath, itempath=path)
+
+    def _write_tags(self, item, path, artpath):
+        """Write the tags from the database, and the album art at
+        `artpath` if any, to the converted file at `path`.
+        """
+        item.try_write(path=path)
+        if artpath:
+            self._embed_art(item, path, artpath)
 
-    def copy_album_art(self, album, dest_dir, path_formats, pretend=False):
-        """Copies or converts the associated cover art of the album. Album must
-        have at least one track.
+    def _album_art_dest(self, album, dest_dir, path_formats):
+        """Get the path to copy the album's cover art to, or None if it
+        has no art to copy.
         """
         if not album or not album.artpath:
-            return
+            return None
 
         album_item = album.items().get()
         # Album shouldn't be empty.
         if not album_item:
-            return
+            return None
 
         # Get the destination of the first item (track) of the album, we use
         # this function to format the path accordingly to path_formats.
@@ -343,10 +565,15 @@ class ConvertPlugin(BeetsPlugin):
 
         dest = album.art_destination(album.artpath, item_dir=dest)
         if album.artpath == dest:
-            return
+            return None
+        return dest
 
+    def _copy_art(self, album, dest, pretend=False):
+        """Copy or resize the album's cover art to `dest`.
+        """
         if not pretend:
-            util.mkdirall(dest)
+            with _fs_lock:
+                util.mkdirall(dest)
 
         if os.path.exists(util.syspath(dest)):
             self._log.info(u'Skipping {0} (target file exists)',
@@ -419,18 +646,116 @@ class ConvertPlugin(BeetsPlugin):
         if not (pretend or opts.yes or ui.input_yn(u"Convert? (Y/n)")):
             return
 
+        art = []
         if opts.album and self.config['copy_album_art']:
             for album in albums:
-                self.copy_album_art(album, dest, path_formats, pretend)
-
-        convert = [self.convert_item(dest,
-                                     opts.keep_new,
-                                     path_formats,
-                                     fmt,
-                                     pretend)
-                   for _ in range(threads)]
-        pipe = util.pipeline.Pipeline([iter(items), convert])
-        pipe.run_parallel()
+                art_dest = self._album_art_dest(album, dest, path_formats)
+                if art_dest:
+                    art.append((album, art_dest))
+
+        # Transcoding is limited by the CPU and copying by the disk, so
+        # each gets its own pool of threads and both run at once. The
+        # longest tracks are transcoded first so that the run does not
+        # end with a single long track keeping one thread busy.
+        transcodes, copies = [], []
+        for item, item_dest in lib.destinations(items, basedir=dest,
+                                                path_formats=path_formats):
+            if should_transcode(item, fmt):
+                transcodes.append((item, item_dest))
+            else:
+                copies.append((item, item_dest))
+        transcodes.sort(key=lambda job: job[0].length, reverse=True)
+
+        manifest = self._open_manifest()
+        try:
+            self._convert_all(transcodes, copies, art, threads,
+                              self.config['io_threads'].get(int),
+                              opts.keep_new, fmt, pretend, manifest)
+        finally:
+            if manifest:
+                manifest.close()
+
+    def _convert_all(self, transcodes, copies, art, threads, io_threads,
+                     keep_new, fmt, pretend, manifest):
+        """Convert the `(item, dest)` pairs in `transcodes` on a pool of
+        `threads` threads while the ones in `copies` and the
+        `(album, dest)` cover art pairs in `art` are copied on a pool of
+        `io_threads` threads. Log how long the conversion took.
+        """
+        def convert(job):
+            item, item_dest = job
+            size = item.try_filesize()
+            start = time.time()
+            outcome = self.convert_item(item, item_dest, keep_new, fmt,
+                                        pretend, manifest)
+            elapsed = time.time() - start
+            if outcome == TRANSCODED and not pretend:
+                self._log.debug(u'Transcoded {0} in {1:.1f}s ({2:.1f}x)',
+                                util.displayable_path(item.path), elapsed,
+                                item.length / max(elapsed, 0.001))
+            elif outcome == COPIED and not pretend:
+                self._log.debug(u'Copied {0} in {1:.1f}s ({2}/s)',
+                                util.displayable_path(item.path), elapsed,
+                                ui.human_bytes(size / max(elapsed, 0.001)))
+            return outcome, item.length, size
+
+        def copy_art(job):
+            album, art_dest = job
+            self._copy_art(album, art_dest, pretend)
+
+        start = time.time()
+        cpu_pool = ThreadPool(max(threads, 1))
+        io_pool = ThreadPool(max(io_threads, 1))
+        counts = dict((outcome, 0) for outcome in
+                      (SKIPPED, RETAGGED, COPIED, TRANSCODED, None))
+        length, size = 0.0, 0
+        try:
+            # Both pools start working as soon as their jobs are
+            # submitted; the results are then collected one pool after
+            # the other.
+            results = [cpu_pool.imap_unordered(convert, transcodes),
+                       io_pool.imap_unordered(convert, copies),
+                       io_pool.imap_unordered(copy_art, art)]
+            for result in results:
+                for job_result in result:
+                    if job_result is None:
+                        # Cover art is not counted.
+                        continue
+                    outcome, job_length, job_size = job_result
+                    if outcome == TRANSCODED:
+                        length += job_length
+                    elif outcome == COPIED:
+                        size += job_size
+                    counts[outcome] += 1
+        finally:
+            cpu_pool.terminate()
+            io_pool.terminate()
+            cpu_pool.join()
+            io_pool.join()
+        elapsed = time.time() - start
+
+        if pretend or not (transcodes or copies):
+            return
+        self._log.info(
+            u'Transcoded {0} ({1:.1f}x), copied {2} ({3}/s), updated {4}, '
+            u'skipped {5}, failed {6} in {7}',
+            counts[TRANSCODED], length / max(elapsed, 0.001),
+            counts[COPIED], ui.human_bytes(size / max(elapsed, 0.001)),
+            counts[RETAGGED], counts[SKIPPED], counts[None],
+            ui.human_seconds_short(elapsed),
+        )
+
+    def _open_manifest(self):
+        """Open the manifest of converted files, or return None if it is
+        disabled.
+        """
+        if self.config['manifest'].get() is None:
+            return None
+        # A relative path is relative to the configuration directory, like
+        # the importer's state file.
+        return Manifest(self.config['manifest'].get(
+            confit.Filename(in_app_dir=True)
+        ))
 
     def convert_on_import(self, lib, item):
         """Transcode a file automatically after it is imported into the
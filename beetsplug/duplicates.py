@@ -21,7 +21,10 @@ import shlex
 
 from beets.plugins import BeetsPlugin
 from beets.ui import decargs, print_, Subcommand, UserError
-from beets.util import command_output, displayable_path, subprocess
+from beets import config
+from beets.util import command_output, displayable_path, subprocess, \
+    text_string
+from beets.util.probecache import ProbeCache
 from beets.library import Item, Album
 import six
 
@@ -146,8 +149,13 @@ class DuplicatesPlugin(BeetsPlugin):
                 fmt += u': {0}'
 
             if checksum:
-                for i in items:
-                    k, _ = self._checksum(i, checksum)
+                cache = ProbeCache.from_config(config['probe_cache'])
+                try:
+                    for i in items:
+                        k, _ = self._checksum(i, checksum, cache)
+                finally:
+                    if cache:
+                        cache.close()
                 keys = [k]
 
             for obj_id, obj_count, objs in self._duplicates(items,
@@ -191,14 +199,29 @@ class DuplicatesPlugin(BeetsPlugin):
             setattr(item, k, v)
             item.store()
 
-    def _checksum(self, item, prog):
+    def _checksum(self, item, prog, cache=None):
         """Run external `prog` on file path associated with `item`, cache
         output as flexattr on a key that is the name of the program, and
         return the key, checksum tuple.
+
+        If a `ProbeCache` is given, the checksum is also kept there, so
+        that it is computed again when the file has changed.
         """
         args = [p.format(file=item.path) for p in shlex.split(prog)]
         key = args[0]
+        kind = u'duplicates:' + prog
         checksum = getattr(item, key, False)
+        if cache:
+            cached = cache.get(item.path, kind)
+            if cached is None:
+                # The file may have changed since the checksum was
+                # computed.
+                checksum = False
+            elif not checksum:
+                # Restore the bytes the program printed.
+                checksum = cached.encode('latin-1')
+                setattr(item, key, checksum)
+                item.store()
         if not checksum:
             self._log.debug(u'key {0} on item {1} not cached:'
                             u'computing checksum',
@@ -207,6 +230,9 @@ class DuplicatesPlugin(BeetsPlugin):
                 checksum = command_output(args)
                 setattr(item, key, checksum)
                 item.store()
+                if cache:
+                    cache.set(item.path, kind,
+                              text_string(checksum, 'latin-1'))
                 self._log.debug(u'computed checksum for {0} using {1}',
                                 item.title, key)
             except subprocess.CalledProcessError as e:
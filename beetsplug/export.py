@@ -18,6 +18,8 @@
 from __future__ import division, absolute_import, print_function
 
 import sys
+import csv
+import io
 import json
 import codecs
 
@@ -26,6 +28,7 @@ from beets.plugins import BeetsPlugin
 from beets import ui
 from beets import mediafile
 from beetsplug.info import make_key_filter, library_data, tag_data
+import six
 
 
 class ExportEncoder(json.JSONEncoder):
@@ -52,6 +55,21 @@ class ExportPlugin(BeetsPlugin):
                     'sort_keys': True
                 }
             },
+            'jsonlines': {
+                # json module formatting options
+                'formatting': {
+                    'ensure_ascii': False,
+                    'separators': (',', ': '),
+                    'sort_keys': True
+                }
+            },
+            'csv': {
+                # csv module formatting options
+                'formatting': {
+                    'delimiter': ',',
+                    'dialect': 'excel'
+                }
+            },
             # TODO: Use something like the edit plugin
             # 'item_fields': []
         })
@@ -78,12 +96,17 @@ class ExportPlugin(BeetsPlugin):
             u'-o', u'--output',
             help=u'path for the output file. If not given, will print the data'
         )
+        cmd.parser.add_option(
+            u'-f', u'--format', default=None,
+            choices=['json', 'jsonlines', 'csv'],
+            help=u'the output format: json (default), jsonlines or csv',
+        )
         return [cmd]
 
     def run(self, lib, opts, args):
 
         file_path = opts.output
-        file_format = self.config['default_format'].get(str)
+        file_format = opts.format or self.config['default_format'].as_str()
         file_mode = 'a' if opts.append else 'w'
         format_options = self.config[file_format]['formatting'].get(dict)
 
@@ -94,7 +117,6 @@ class ExportPlugin(BeetsPlugin):
             }
         )
 
-        items = []
         data_collector = library_data if opts.library else tag_data
 
         included_keys = []
@@ -102,17 +124,17 @@ class ExportPlugin(BeetsPlugin):
             included_keys.extend(keys.split(','))
         key_filter = make_key_filter(included_keys)
 
-        for data_emitter in data_collector(lib, ui.decargs(args)):
-            try:
-                data, item = data_emitter()
-            except (mediafile.UnreadableFileError, IOError) as ex:
-                self._log.error(u'cannot read file: {0}', ex)
-                continue
+        def items():
+            for data_emitter in data_collector(lib, ui.decargs(args)):
+                try:
+                    data, item = data_emitter()
+                except (mediafile.UnreadableFileError, IOError) as ex:
+                    self._log.error(u'cannot read file: {0}', ex)
+                    continue
 
-            data = key_filter(data)
-            items += [data]
+                yield key_filter(data)
 
-        export_format.export(items, **format_options)
+        export_format.export(items(), **format_options)
 
 
 class ExportFormat(object):
@@ -125,6 +147,10 @@ class ExportFormat(object):
                 return JsonFileFormat(**kwargs)
             else:
                 return JsonPrintFormat()
+        elif type == "jsonlines":
+            return JsonLinesFormat(**kwargs)
+        elif type == "csv":
+            return CsvFormat(**kwargs)
         raise NotImplementedError()
 
     def export(self, data, **kwargs):
@@ -135,7 +161,7 @@ class JsonPrintFormat(ExportFormat):
     """Outputs to the console"""
 
     def export(self, data, **kwargs):
-        json.dump(data, sys.stdout, cls=ExportEncoder, **kwargs)
+        json.dump(list(data), sys.stdout, cls=ExportEncoder, **kwargs)
 
 
 class JsonFileFormat(ExportFormat):
@@ -148,4 +174,97 @@ class JsonFileFormat(ExportFormat):
 
     def export(self, data, **kwargs):
         with codecs.open(self.path, self.mode, self.encoding) as f:
-            json.dump(data, f, cls=ExportEncoder, **kwargs)
+            json.dump(list(data), f, cls=ExportEncoder, **kwargs)
+
+
+class StreamFormat(ExportFormat):
+    """A format that writes one record at a time, either to a file or,
+    through a buffer, to the console. The data is never held in memory
+    as a whole.
+    """
+
+    def __init__(self, file_path=None, file_mode=u'w', encoding=u'utf-8'):
+        self.path = file_path
+        self.mode = file_mode
+        self.encoding = encoding
+
+    def open(self):
+        """Open the output as a text stream.
+        """
+        if self.path:
+            return codecs.open(self.path, self.mode, self.encoding)
+        else:
+            return ui.BufferedPrinter()
+
+    def export(self, data, **kwargs):
+        with self.open() as out:
+            for text in self.records(data, **kwargs):
+                out.write(text)
+
+    def records(self, data, **kwargs):
+        """Generate the text for each element of `data`.
+        """
+        raise NotImplementedError()
+
+
+class JsonLinesFormat(StreamFormat):
+    """Writes one JSON object per line"""
+
+    def records(self, data, **kwargs):
+        kwargs.pop('indent', None)
+        encoder = ExportEncoder(**kwargs)
+        for element in data:
+            text = encoder.encode(element)
+            if isinstance(text, bytes):
+                text = text.decode('utf-8')
+            yield text + u'\n'
+
+
+class CsvFormat(StreamFormat):
+    """Writes comma-separated values with a header row. The columns are
+    the keys of the first element.
+    """
+
+    def records(self, data, **kwargs):
+        # The csv module on Python 2 only writes bytes, so we write each
+        # row to a buffer and decode it.
+        buf = io.BytesIO() if six.PY2 else io.StringIO()
+        fieldnames = None
+        writer = None
+        for element in data:
+            if writer is None:
+                fieldnames = sorted(element)
+                writer = csv.writer(buf, **_csv_options(kwargs))
+                writer.writerow([_csv_value(k) for k in fieldnames])
+            writer.writerow([_csv_value(element.get(k))
+                             for k in fieldnames])
+
+            text = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            yield text.decode('utf-8') if six.PY2 else text
+
+
+def _csv_options(options):
+    """Convert configured csv module options to the native string
+    types the csv module needs on Python 2.
+    """
+    return dict((str(k), str(v) if isinstance(v, six.string_types) else v)
+                for k, v in options.items())
+
+
+def _csv_value(value):
+    """Convert a value to a string for a CSV cell, in the string type
+    the csv module needs.
+    """
+    if value is None:
+        value = u''
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    elif isinstance(value, list):
+        value = u'; '.join(six.text_type(v) for v in value)
+    elif isinstance(value, bytes):
+        value = value.decode('utf-8', 'ignore')
+    elif not isinstance(value, six.text_type):
+        value = six.text_type(value)
+    return value.encode('utf-8') if six.PY2 else value
@@ -18,8 +18,12 @@
 from __future__ import division, absolute_import, print_function
 
 from contextlib import closing
+import hashlib
 import os
 import re
+import sqlite3
+import threading
+import time
 from tempfile import NamedTemporaryFile
 
 import requests
@@ -47,6 +51,16 @@ CONTENT_TYPES = {
 }
 IMAGE_EXTENSIONS = [ext for exts in CONTENT_TYPES.values() for ext in exts]
 
+# Whether a request failed in the current thread while trying a source.
+_request_state = threading.local()
+
+
+def _request_failed():
+    """Note that a request failed, so that an art source returning no
+    candidates is not remembered as having no art.
+    """
+    _request_state.failed = True
+
 
 class Candidate(object):
     """Holds information about a matching artwork, deals with validation of
@@ -145,12 +159,31 @@ class Candidate(object):
             self.path = ArtResizer.shared.resize(extra['maxwidth'], self.path)
 
 
+def _session(host_connections=None):
+    """Create a `requests.Session` that identifies itself as beets.
+
+    If `host_connections` is given, the session keeps at most that many
+    connections open to each host; requests beyond that wait for a
+    connection to become free.
+    """
+    session = requests.Session()
+    session.headers = {'User-Agent': 'beets'}
+    if host_connections:
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=host_connections,
+                                                pool_block=True)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    return session
+
+
 def _logged_get(log, *args, **kwargs):
     """Like `requests.get`, but logs the effective URL to the specified
     `log` at the `DEBUG` level.
 
     Use the optional `message` parameter to specify what to log before
-    the URL. By default, the string is "getting URL".
+    the URL. By default, the string is "getting URL". Use the optional
+    `session` parameter to send the request through an existing session
+    (see `_session`) instead of a new one.
 
     Also sets the User-Agent header to indicate beets.
     """
@@ -169,26 +202,42 @@ def _logged_get(log, *args, **kwargs):
         message = kwargs.pop('message')
     else:
         message = 'getting URL'
+    session = kwargs.pop('session', None)
 
     req = requests.Request('GET', *args, **req_kwargs)
-    with requests.Session() as s:
-        s.headers = {'User-Agent': 'beets'}
-        prepped = s.prepare_request(req)
-        log.debug('{}: {}', message, prepped.url)
-        return s.send(prepped, **send_kwargs)
+    if session is not None:
+        return _send(log, session, req, message, send_kwargs)
+    with _session() as s:
+        return _send(log, s, req, message, send_kwargs)
+
+
+def _send(log, session, req, message, send_kwargs):
+    prepped = session.prepare_request(req)
+    log.debug('{}: {}', message, prepped.url)
+    return session.send(prepped, **send_kwargs)
 
 
 class RequestMixin(object):
     """Adds a Requests wrapper to the class that uses the logger, which
-    must be named `self._log`.
+    must be named `self._log`. Requests are sent through
+    `self._session`, if it is set, so that its connections are reused.
     """
+    _session = None
 
     def request(self, *args, **kwargs):
         """Like `requests.get`, but uses the logger `self._log`.
 
         See also `_logged_get`.
         """
-        return _logged_get(self._log, *args, **kwargs)
+        kwargs.setdefault('session', self._session)
+        try:
+            resp = _logged_get(self._log, *args, **kwargs)
+        except requests.RequestException:
+            _request_failed()
+            raise
+        if resp.status_code >= 500:
+            _request_failed()
+        return resp
 
 
 # ART SOURCES ################################################################
@@ -197,6 +246,8 @@ class ArtSource(RequestMixin):
     def __init__(self, log, config):
         self._log = log
         self._config = config
+        # Every source keeps its connections alive between albums.
+        self._session = _session(config['host_connections'].get(int))
 
     def get(self, album, extra):
         raise NotImplementedError()
@@ -286,6 +337,7 @@ class RemoteArtSource(ArtSource):
             # Handling TypeError works around a urllib3 bug:
             # https://github.com/shazow/urllib3/issues/556
             self._log.debug(u'error fetching art: {}', exc)
+            _request_failed()
             return
 
 
@@ -469,6 +521,7 @@ class ITunesStore(RemoteArtSource):
                 results = itunes.search_album(search_string)
             except Exception as exc:
                 self._log.debug(u'iTunes search failed: {0}', exc)
+                _request_failed()
                 return
 
             # Get the first match.
@@ -691,6 +744,103 @@ ART_SOURCES = {
 }
 SOURCE_NAMES = {v: k for k, v in ART_SOURCES.items()}
 
+# RESULT CACHE ###############################################################
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    album TEXT NOT NULL,
+    source TEXT NOT NULL,
+    url TEXT,
+    match INTEGER,
+    size INTEGER,
+    width INTEGER,
+    height INTEGER,
+    time REAL NOT NULL,
+    PRIMARY KEY (album, source)
+);
+"""
+
+DAY = 24 * 60 * 60
+
+
+class ArtCache(object):
+    """A record of what the remote art sources returned for each album:
+    either the URL of the image that was used (along with its size in
+    bytes and its dimensions, when known) or nothing. Hits are kept for
+    `hit_ttl` and misses for `miss_ttl` seconds; older results are
+    ignored and removed when the cache is opened.
+
+    Albums are identified by a key (see `FetchArtPlugin._cache_key`).
+    The cache can be used from several threads.
+    """
+    def __init__(self, path, hit_ttl, miss_ttl):
+        self.hit_ttl = hit_ttl
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(CACHE_SCHEMA)
+            now = time.time()
+            self._conn.execute(
+                'DELETE FROM results WHERE '
+                '(url IS NULL AND time < ?) OR (url IS NOT NULL AND time < ?)',
+                (now - miss_ttl, now - hit_ttl)
+            )
+
+    def get(self, album, source):
+        """Get the result of `source` for the album with the key `album`
+        as a `(url, match, size, dimensions)` tuple, where `url` is None
+        if the source had no art. Return None if the result is unknown
+        or too old.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, match, size, width, height, time FROM results '
+                'WHERE album = ? AND source = ?', (album, source)
+            ).fetchone()
+        if row is None:
+            return None
+        ttl = self.miss_ttl if row[0] is None else self.hit_ttl
+        if row[5] < time.time() - ttl:
+            return None
+        dimensions = tuple(row[3:5]) if row[3] is not None else None
+        return row[0], row[1], row[2], dimensions
+
+    def _store(self, album, source, url, match, size, dimensions):
+        width, height = dimensions or (None, None)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO results '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (album, source, url, match, size, width, height,
+                     time.time())
+                )
+
+    def record_hit(self, album, source, url, match, size, dimensions):
+        """Remember that `source` found the image at `url` for `album`.
+        """
+        self._store(album, source, url, match, size, dimensions)
+
+    def record_miss(self, album, source):
+        """Remember that `source` found no usable art for `album`.
+        """
+        self._store(album, source, None, None, None, None)
+
+    def forget(self, album, source):
+        """Remove the result of `source` for `album`.
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'DELETE FROM results WHERE album = ? AND source = ?',
+                    (album, source)
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
 # PLUGIN LOGIC ###############################################################
 
 
@@ -718,6 +868,11 @@ class FetchArtPlugin(plugins.BeetsPlugin, RequestMixin):
             'google_engine': u'001442825323518660753:hrh5ch1gjzm',
             'fanarttv_key': None,
             'store_source': False,
+            'threads': 8,
+            'host_connections': 4,
+            'cache': u'fetchart.db',
+            'hit_ttl': 90,
+            'miss_ttl': 7,
         })
         self.config['google_key'].redact = True
         self.config['fanarttv_key'].redact = True
@@ -754,6 +909,8 @@ class FetchArtPlugin(plugins.BeetsPlugin, RequestMixin):
             # Enable two import hooks when fetching is enabled.
             self.import_stages = [self.fetch_art]
             self.register_listener('import_task_files', self.assign_art)
+            self.register_listener('import', self._close_art_cache)
+        self.register_listener('cli_exit', self._close_art_cache)
 
         available_sources = list(SOURCES_ALL)
         if not HAVE_ITUNES and u'itunes' in available_sources:
@@ -777,6 +934,10 @@ class FetchArtPlugin(plugins.BeetsPlugin, RequestMixin):
         self.sources = [ART_SOURCES[s](self._log, self.config)
                         for s in sources_name]
 
+        # The cache of remote results is opened when it is first needed.
+        self._cache = None
+        self._cache_lock = threading.Lock()
+
     # Asynchronous; after music is added to the library.
     def fetch_art(self, session, task):
         """Find art for the album being imported."""
@@ -828,20 +989,27 @@ class FetchArtPlugin(plugins.BeetsPlugin, RequestMixin):
             action='store_true', default=False,
             help=u're-download art when already present'
         )
+        cmd.parser.add_option(
+            u'-t', u'--threads', action='store', type='int',
+            help=u'number of albums to look for art for at once'
+        )
 
         def func(lib, opts, args):
-            self.batch_fetch_art(lib, lib.albums(ui.decargs(args)), opts.force)
+            threads = opts.threads or self.config['threads'].get(int)
+            self.batch_fetch_art(lib, lib.albums(ui.decargs(args)), opts.force,
+                                 threads)
         cmd.func = func
         return [cmd]
 
     # Utilities converted from functions to methods on logging overhaul
 
-    def art_for_album(self, album, paths, local_only=False):
+    def art_for_album(self, album, paths, local_only=False, force=False):
         """Given an Album object, returns a path to downloaded art for the
         album (or None if no art is found). If `maxwidth`, then images are
         resized to this maximum pixel size. If `local_only`, then only local
         image files from the filesystem are returned; no network requests
-        are made.
+        are made. If `force`, the Web sources are searched even if they
+        had no art the last time (and their cached results are updated).
         """
         out = None
 
@@ -862,17 +1030,15 @@ class FetchArtPlugin(plugins.BeetsPlugin, RequestMixin):
                     SOURCE_NAMES[type(source)],
                     album,
                 )
-                # URLs might be invalid at this point, or the image may not
-                # fulfill the requirements
-                for candidate in source.get(album, extra):
-                    source.fetch_image(candidate, extra)
-                    if candidate.validate(extra):
-                        out = candidate
-                        self._log.debug(
-                            u'using {0.LOC_STR} image {1}'.format(
-                                source, util.displayable_path(out.path)))
-                        break
+                if source.IS_LOCAL:
+                    out = self._art_from_source(source, album, extra)
+                else:
+                    out = self._cached_art_from_source(source, album, extra,
+                                                       force)
                 if out:
+                    self._log.debug(
+                        u'using {0.LOC_STR} image {1}'.format(
+                            source, util.displayable_path(out.path)))
                     break
 
         if out:
@@ -880,24 +1046,143 @@ class FetchArtPlugin(plugins.BeetsPlugin, RequestMixin):
 
         return out
 
-    def batch_fetch_art(self, lib, albums, force):
+    def _art_from_source(self, source, album, extra):
+        """Get the first valid candidate of `source` for the album, or
+        None.
+        """
+        # URLs might be invalid at this point, or the image may not
+        # fulfill the requirements
+        for candidate in source.get(album, extra):
+            source.fetch_image(candidate, extra)
+            if candidate.validate(extra):
+                return candidate
+
+    def _cached_art_from_source(self, source, album, extra, force=False):
+        """Like `_art_from_source`, but for a remote source: use and
+        update the cache of its previous results, if it is enabled. If
+        `force`, the cached result is ignored and replaced.
+        """
+        cache = self._art_cache()
+        if cache is None:
+            return self._art_from_source(source, album, extra)
+        key = self._cache_key(album)
+        name = SOURCE_NAMES[type(source)]
+
+        cached = None if force else cache.get(key, name)
+        if cached is not None:
+            url, match, size, dimensions = cached
+            if url is None:
+                self._log.debug(u'{0} had no art last time', name)
+                return None
+
+            # The image was valid for the same album and settings, so
+            # only download it again. Its dimensions are still known
+            # unless the file changed.
+            candidate = source._candidate(url=url, match=match,
+                                          size=dimensions)
+            source.fetch_image(candidate, extra)
+            if candidate.path and \
+                    os.path.getsize(syspath(candidate.path)) != size:
+                candidate.size = None
+            if candidate.validate(extra):
+                return candidate
+            self._log.debug(u'cached image from {0} is gone', name)
+            cache.forget(key, name)
+
+        _request_state.failed = False
+        for candidate in source.get(album, extra):
+            url = candidate.url
+            source.fetch_image(candidate, extra)
+            if candidate.validate(extra):
+                size = os.path.getsize(syspath(candidate.path))
+                cache.record_hit(key, name, url, candidate.match, size,
+                                 candidate.size)
+                return candidate
+
+        # Only remember the miss if the source could be reached.
+        if not _request_state.failed:
+            cache.record_miss(key, name)
+
+    def _art_cache(self):
+        """Get the cache of the remote sources' results, opening it if
+        necessary, or None if it is disabled.
+        """
+        with self._cache_lock:
+            if self._cache is None and self.config['cache'].get() is not None:
+                # A relative path is relative to the configuration
+                # directory.
+                self._cache = ArtCache(
+                    self.config['cache'].get(confit.Filename(in_app_dir=True)),
+                    self.config['hit_ttl'].as_number() * DAY,
+                    self.config['miss_ttl'].as_number() * DAY,
+                )
+            return self._cache
+
+    def _close_art_cache(self, **kwargs):
+        """Close the cache of the remote sources' results, if it is open.
+        It is opened again when it is needed.
+        """
+        with self._cache_lock:
+            if self._cache is not None:
+                self._cache.close()
+                self._cache = None
+
+    def _cache_key(self, album):
+        """Get the key of the album in the cache. It changes when the
+        album's identifiers or the settings that decide whether an image
+        is valid change.
+        """
+        key = (album.mb_albumid, album.mb_releasegroupid, album.asin,
+               album.albumartist, album.album, self.minwidth,
+               self.enforce_ratio, self.margin_px, self.margin_percent)
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+    def _store_art(self, lib, found):
+        """Set the art of a batch of `(album, candidate)` pairs in a single
+        transaction.
+        """
+        if found:
+            with lib.transaction():
+                for album, candidate in found:
+                    self._set_art(album, candidate)
+
+    def batch_fetch_art(self, lib, albums, force, threads=None, chunksize=64):
         """Fetch album art for each of the albums. This implements the manual
         fetchart CLI command.
+
+        Art is looked for for up to `threads` albums at once. The art that
+        is found is stored in batches of `chunksize` albums.
         """
+        pending = []
         for album in albums:
             if album.artpath and not force and os.path.isfile(album.artpath):
                 message = ui.colorize('text_highlight_minor', u'has album art')
+                self._log.info(u'{0}: {1}', album, message)
             else:
                 # In ordinary invocations, look for images on the
                 # filesystem. When forcing, however, always go to the Web
-                # sources.
+                # sources. The album's directory is looked up here, since
+                # the workers cannot query an in-memory database.
                 local_paths = None if force else [album.path]
+                pending.append((album, local_paths))
 
-                candidate = self.art_for_album(album, local_paths)
+        def fetch(args):
+            album, local_paths = args
+            return album, self.art_for_album(album, local_paths, force=force)
+
+        found = []
+        try:
+            for album, candidate in util.par_map(fetch, pending, threads):
                 if candidate:
-                    self._set_art(album, candidate)
+                    found.append((album, candidate))
+                    if len(found) >= chunksize:
+                        self._store_art(lib, found)
+                        del found[:]
                     message = ui.colorize('text_success', u'found album art')
                 else:
                     message = ui.colorize('text_error', u'no art found')
 
-            self._log.info(u'{0}: {1}', album, message)
+                self._log.info(u'{0}: {1}', album, message)
+        finally:
+            self._store_art(lib, found)
+            self._close_art_cache()
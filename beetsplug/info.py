@@ -22,35 +22,44 @@ import os
 import re
 
 from beets.plugins import BeetsPlugin
+from beets import config
 from beets import ui
 from beets import mediafile
 from beets.library import Item
-from beets.util import displayable_path, normpath, syspath
+from beets.util import displayable_path, normpath, syspath, probecache
 
 
-def tag_data(lib, args):
+def tag_data(lib, args, audio_only=False, cache=None):
     query = []
     for arg in args:
         path = normpath(arg)
         if os.path.isfile(syspath(path)):
-            yield tag_data_emitter(path)
+            yield tag_data_emitter(path, audio_only, cache)
         else:
             query.append(arg)
 
     if query:
         for item in lib.items(query):
-            yield tag_data_emitter(item.path)
+            yield tag_data_emitter(item.path, audio_only, cache)
 
 
-def tag_data_emitter(path):
+def tag_data_emitter(path, audio_only=False, cache=None):
+    """Get a function that reads the tags of the file at `path`. If
+    `audio_only` is set, only its audio properties are read, from the
+    `ProbeCache` `cache` if possible.
+    """
     def emitter():
+        if audio_only:
+            tags = probecache.probe(path, cache)
+            item = Item(path=path)
+            item.update(tags)
+            return tags, item
+
         fields = list(mediafile.MediaFile.readable_fields())
         fields.remove('images')
         mf = mediafile.MediaFile(syspath(path))
-        tags = {}
-        for field in fields:
-            tags[field] = getattr(mf, field)
-        tags['art'] = mf.art is not None
+        tags = mf.read_fields(fields)
+        tags['art'] = tags['art'] is not None
         # create a temporary Item to take advantage of __format__
         item = Item.from_path(syspath(path))
 
@@ -59,7 +68,7 @@ def tag_data_emitter(path):
 
 
 def library_data(lib, args):
-    for item in lib.items(args):
+    for item in lib.items(args, with_albums=True):
         yield library_data_emitter(item)
 
 
@@ -81,17 +90,21 @@ def update_summary(summary, tags):
     return summary
 
 
-def print_data(data, item=None, fmt=None):
+def print_data(data, item=None, fmt=None, out=None):
     """Print, with optional formatting, the fields of a single element.
 
     If no format string `fmt` is passed, the entries on `data` are printed one
     in each line, with the format 'field: value'. If `fmt` is not `None`, the
     `item` is printed according to `fmt`, using the `Item.__format__`
     machinery.
+
+    The lines are printed with `out` (a `ui.BufferedPrinter`) if it is
+    given.
     """
+    print_ = out.print_ if out else ui.print_
     if fmt:
         # use fmt specified by the user
-        ui.print_(format(item, fmt))
+        print_(format(item, fmt))
         return
 
     path = displayable_path(item.path) if item else None
@@ -109,18 +122,19 @@ def print_data(data, item=None, fmt=None):
     lineformat = u'{{0:>{0}}}: {{1}}'.format(maxwidth)
 
     if path:
-        ui.print_(displayable_path(path))
+        print_(displayable_path(path))
 
     for field in sorted(formatted):
         value = formatted[field]
         if isinstance(value, list):
             value = u'; '.join(value)
-        ui.print_(lineformat.format(field, value))
+        print_(lineformat.format(field, value))
 
 
-def print_data_keys(data, item=None):
+def print_data_keys(data, item=None, out=None):
     """Print only the keys (field names) for an item.
     """
+    print_ = out.print_ if out else ui.print_
     path = displayable_path(item.path) if item else None
     formatted = []
     for key, value in data.items():
@@ -131,10 +145,10 @@ def print_data_keys(data, item=None):
 
     line_format = u'{0}{{0}}'.format(u' ' * 4)
     if path:
-        ui.print_(displayable_path(path))
+        print_(displayable_path(path))
 
     for field in sorted(formatted):
-        ui.print_(line_format.format(field))
+        print_(line_format.format(field))
 
 
 class InfoPlugin(BeetsPlugin):
@@ -176,40 +190,63 @@ class InfoPlugin(BeetsPlugin):
         dictionary and only prints that. If two files have different values
         for the same tag, the value is set to '[various]'
         """
-        if opts.library:
-            data_collector = library_data
-        else:
-            data_collector = tag_data
-
         included_keys = []
         for keys in opts.included_keys:
             included_keys.extend(keys.split(','))
         key_filter = make_key_filter(included_keys)
 
+        fmt = ui.decargs([opts.format])[0] if opts.format else None
+
+        # Only read the stream headers of the files when nothing but
+        # their audio properties is shown.
+        fields = dict.fromkeys(mediafile.MediaFile.readable_fields())
+        audio_only = bool(included_keys) and not fmt and \
+            set(key_filter(fields)) <= set(mediafile.AUDIO_PROPERTIES)
+
+        cache = None
+        if opts.library:
+            emitters = library_data(lib, ui.decargs(args))
+        else:
+            if audio_only:
+                cache = probecache.ProbeCache.from_config(
+                    config['probe_cache']
+                )
+            emitters = tag_data(lib, ui.decargs(args), audio_only, cache)
+
+        try:
+            self.print_info(emitters, opts, key_filter, fmt)
+        finally:
+            if cache:
+                cache.close()
+
+    def print_info(self, emitters, opts, key_filter, fmt):
+        """Print the data from the emitters generated by `tag_data` or
+        `library_data`.
+        """
         first = True
         summary = {}
-        for data_emitter in data_collector(lib, ui.decargs(args)):
-            try:
-                data, item = data_emitter()
-            except (mediafile.UnreadableFileError, IOError) as ex:
-                self._log.error(u'cannot read file: {0}', ex)
-                continue
-
-            data = key_filter(data)
-            if opts.summarize:
-                update_summary(summary, data)
-            else:
-                if not first:
-                    ui.print_()
-                if opts.keys_only:
-                    print_data_keys(data, item)
+        with ui.BufferedPrinter() as out:
+            for data_emitter in emitters:
+                try:
+                    data, item = data_emitter()
+                except (mediafile.UnreadableFileError, IOError) as ex:
+                    self._log.error(u'cannot read file: {0}', ex)
+                    continue
+
+                data = key_filter(data)
+                if opts.summarize:
+                    update_summary(summary, data)
                 else:
-                    fmt = ui.decargs([opts.format])[0] if opts.format else None
-                    print_data(data, item, fmt)
-                first = False
+                    if not first:
+                        out.print_()
+                    if opts.keys_only:
+                        print_data_keys(data, item, out)
+                    else:
+                        print_data(data, item, fmt, out)
+                    first = False
 
-        if opts.summarize:
-            print_data(summary)
+            if opts.summarize:
+                print_data(summary, out=out)
 
 
 def make_key_filter(include):
@@ -23,17 +23,23 @@ from beets.autotag import hooks
 from collections import defaultdict
 
 
-def apply_item_changes(lib, item, move, pretend, write):
-    """Store, move and write the item according to the arguments.
+def apply_item_changes(lib, items, move, pretend, write):
+    """Store, move and write the items according to the arguments.
+
+    The tags of all the items are written together so that the files
+    can be processed in parallel.
     """
     if not pretend:
-        # Move the item if it's in the library.
-        if move and lib.directory in util.ancestry(item.path):
-            item.move(with_album=False)
+        # Move the items if they're in the library.
+        if move:
+            for item in items:
+                if lib.directory in util.ancestry(item.path):
+                    item.move(with_album=False)
 
         if write:
-            item.try_write()
-        item.store()
+            lib.write_items(items)
+        for item in items:
+            item.store()
 
 
 class MBSyncPlugin(BeetsPlugin):
@@ -93,7 +99,7 @@ class MBSyncPlugin(BeetsPlugin):
             # Apply.
             with lib.transaction():
                 autotag.apply_item_metadata(item, track_info)
-                apply_item_changes(lib, item, move, pretend, write)
+                apply_item_changes(lib, [item], move, pretend, write)
 
     def albums(self, lib, query, move, pretend, write):
         """Retrieve and apply info from the autotagger for albums matched by
@@ -144,12 +150,10 @@ class MBSyncPlugin(BeetsPlugin):
             self._log.debug(u'applying changes to {}', album_formatted)
             with lib.transaction():
                 autotag.apply_metadata(album_info, mapping)
-                changed = False
-                for item in items:
-                    item_changed = ui.show_model_changes(item)
-                    changed |= item_changed
-                    if item_changed:
-                        apply_item_changes(lib, item, move, pretend, write)
+                changed_items = [item for item in items
+                                 if ui.show_model_changes(item)]
+                changed = bool(changed_items)
+                apply_item_changes(lib, changed_items, move, pretend, write)
 
                 if not changed:
                     # No change to any item.
@@ -18,16 +18,25 @@ from __future__ import division, absolute_import, print_function
 import subprocess
 import os
 import collections
+import math
 import sys
 import warnings
+import wave
 import re
+import tempfile
 from six.moves import zip
 
 from beets import logging
 from beets import ui
 from beets.plugins import BeetsPlugin
+from beets import util
 from beets.util import syspath, command_output, displayable_path, py3_path
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 # Utilities.
 
@@ -74,6 +83,10 @@ class Backend(object):
     """An abstract class representing engine for calculating RG values.
     """
 
+    # Whether the gains of several albums or tracks can be computed at
+    # the same time from different threads.
+    parallel = False
+
     def __init__(self, config, log):
         """Initialize the backend with the configuration view for the
         plugin.
@@ -94,6 +107,7 @@ class Bs1770gainBackend(Backend):
     """bs1770gain is a loudness scanner compliant with ITU-R BS.1770 and
     its flavors EBU R128, ATSC A/85 and Replaygain 2.0.
     """
+    parallel = True
 
     def __init__(self, config, log):
         super(Bs1770gainBackend, self).__init__(config, log)
@@ -248,6 +262,7 @@ class Bs1770gainBackend(Backend):
 
 # mpgain/aacgain CLI tool backend.
 class CommandBackend(Backend):
+    parallel = True
 
     def __init__(self, config, log):
         super(CommandBackend, self).__init__(config, log)
@@ -784,6 +799,338 @@ class AudioToolsBackend(Backend):
         )
 
 
+# NumPy-based backend.
+
+def _k_weighting_coefficients(rate):
+    """Get the coefficients `(b, a)` of the two biquad filters that make
+    up the BS.1770 K-weighting filter (a high shelf followed by a high
+    pass) at the sample rate `rate`.
+    """
+    # High shelf, modeling the acoustic effect of the head.
+    f0 = 1681.974450955533
+    gain = 3.999843853973347
+    q = 0.7071752369554196
+    k = math.tan(math.pi * f0 / rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = (
+        [(vh + vb * k / q + k * k) / a0,
+         2 * (k * k - vh) / a0,
+         (vh - vb * k / q + k * k) / a0],
+        [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0],
+    )
+
+    # High pass (the "RLB" weighting curve).
+    f0 = 38.13547087602444
+    q = 0.5003270373238773
+    k = math.tan(math.pi * f0 / rate)
+    a0 = 1 + k / q + k * k
+    high_pass = (
+        [1.0, -2.0, 1.0],
+        [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0],
+    )
+    return shelf, high_pass
+
+
+@util.lru_cache(maxsize=16)
+def _k_weighting(rate):
+    """Get the impulse response of the K-weighting filter at `rate` as
+    an FIR filter. It is computed from the filter's frequency response
+    and cut off after 1/8 of a second, by which point it has decayed
+    far below the resolution of any audio format.
+    """
+    length = int(rate) // 8
+    size = 1 << (8 * length).bit_length()
+    z = numpy.exp(-1j * numpy.linspace(0, math.pi, size // 2 + 1))
+    response = numpy.ones_like(z)
+    for b, a in _k_weighting_coefficients(rate):
+        response *= numpy.polyval(b[::-1], z) / numpy.polyval(a[::-1], z)
+    return numpy.fft.irfft(response, size)[:length]
+
+
+def _oversampling_taps(factor, taps_per_phase=32):
+    """Get a windowed-sinc low pass filter that interpolates a signal
+    padded with zeros to `factor` times its sample rate.
+    """
+    length = factor * taps_per_phase
+    n = numpy.arange(length) - (length - 1) / 2
+    return numpy.sinc(n / factor) * numpy.kaiser(length, 8.0)
+
+
+class _FIRFilter(object):
+    """Apply an FIR filter to consecutive chunks of a multi-channel
+    signal, given as arrays with one row per frame, using FFT
+    convolution.
+    """
+    def __init__(self, taps, channels):
+        self.taps = taps
+        self.tail = numpy.zeros((len(taps) - 1, channels))
+        self._spectra = {}
+
+    def __call__(self, chunk):
+        n = len(chunk)
+        m = len(self.taps)
+        size = 1 << (n + m - 2).bit_length()
+        if size not in self._spectra:
+            self._spectra[size] = numpy.fft.rfft(self.taps, size)[:, None]
+
+        spectrum = numpy.fft.rfft(chunk, size, axis=0) * self._spectra[size]
+        out = numpy.fft.irfft(spectrum, size, axis=0)[:n + m - 1]
+
+        # Overlap-add with the end of the previous chunk's output.
+        out[:m - 1] += self.tail
+        self.tail = out[n:].copy()
+        return out[:n]
+
+
+class _LoudnessMeter(object):
+    """Measure the loudness of a signal as described in ITU-R BS.1770
+    and EBU R128.
+
+    Feed the signal's samples to `feed`, as floating-point arrays with
+    one row per frame. The meter then provides the mean square of the
+    K-weighted signal in each 400 ms gating block (`blocks`) and the
+    signal's peak (`peak`). With `true_peak`, the peak is measured on the
+    signal oversampled four times, which catches the peaks between
+    samples.
+    """
+    oversampling = 4
+
+    def __init__(self, rate, channels, true_peak=False):
+        self.step = int(round(rate * 0.1))
+        self.filter = _FIRFilter(_k_weighting(rate), channels)
+        if true_peak:
+            self.oversampler = _FIRFilter(
+                _oversampling_taps(self.oversampling), channels
+            )
+        else:
+            self.oversampler = None
+
+        # Surround channels are weighted more, and the LFE channel of a
+        # 5.1 signal not at all.
+        self.weights = numpy.ones(channels)
+        if channels == 6:
+            self.weights[3] = 0.0
+            self.weights[4:] = 1.41
+
+        self.peak = 0.0
+        self._segments = []
+        self._pending = numpy.zeros(0)
+
+    def feed(self, samples):
+        if len(samples) == 0:
+            return
+
+        if self.oversampler:
+            padded = numpy.zeros((len(samples) * self.oversampling,
+                                  samples.shape[1]))
+            padded[::self.oversampling] = samples
+            peak = numpy.abs(self.oversampler(padded)).max()
+        else:
+            peak = numpy.abs(samples).max()
+        self.peak = max(self.peak, float(peak))
+
+        # Sum the weighted power of each 100 ms segment: the gating
+        # blocks overlap by 75%, so each consists of four segments.
+        power = numpy.dot(self.filter(samples) ** 2, self.weights)
+        power = numpy.concatenate((self._pending, power))
+        end = len(power) - len(power) % self.step
+        self._segments.append(power[:end].reshape(-1, self.step).sum(axis=1))
+        self._pending = power[end:]
+
+    def blocks(self):
+        """Get an array of the mean square of each gating block. A
+        signal shorter than a block is measured as a single block.
+        """
+        segments = numpy.concatenate(self._segments or [numpy.zeros(0)])
+        if len(segments) < 4:
+            frames = len(segments) * self.step + len(self._pending)
+            if not frames:
+                return numpy.zeros(0)
+            total = segments.sum() + self._pending.sum()
+            return numpy.array([total / frames])
+        sums = segments[:-3] + segments[1:-2] + segments[2:-1] + segments[3:]
+        return sums / (4 * self.step)
+
+
+def _integrated_loudness(blocks):
+    """Compute the gated loudness, in LUFS, of a signal from the mean
+    squares of its gating blocks (see `_LoudnessMeter.blocks`).
+    """
+    def loudness(power):
+        return -0.691 + 10 * math.log10(power)
+
+    # Absolute gate at -70 LUFS, then a relative gate 10 LU below the
+    # loudness of what is left.
+    blocks = blocks[blocks > 10 ** ((-70 + 0.691) / 10)]
+    if not len(blocks):
+        return -70.0
+    blocks = blocks[blocks > blocks.mean() / 10]
+    return loudness(blocks.mean())
+
+
+class NumpyBackend(Backend):
+    """Measure the loudness in Python, with NumPy, following EBU R128
+    (which is also what ReplayGain 2.0 uses). WAV files are decoded with
+    Python's `wave` module and other files are decoded by streaming PCM
+    data from FFmpeg.
+    """
+    parallel = True
+    chunk_frames = 1 << 16
+
+    def __init__(self, config, log):
+        super(NumpyBackend, self).__init__(config, log)
+        config.add({
+            'command': u'ffmpeg',
+            'peak': u'sample',
+        })
+        if numpy is None:
+            raise FatalReplayGainError(
+                u'the numpy backend requires the NumPy library'
+            )
+        self.command = config['command'].as_str()
+        self.true_peak = config['peak'].as_choice(['sample', 'true']) \
+            == 'true'
+
+        # The ReplayGain target level of 89 dB corresponds to -18 LUFS.
+        self.target = config['targetlevel'].as_number() - 107
+
+    def compute_track_gain(self, items):
+        """Computes the track gain of the given tracks, returns a list
+        of Gain objects.
+        """
+        return [self._gain(*self._analyze(item)) for item in items]
+
+    def compute_album_gain(self, album):
+        """Computes the album gain of the given album, returns an
+        AlbumGain object. The album's loudness is measured on the gating
+        blocks of all its tracks, so no track is decoded twice.
+        """
+        results = [self._analyze(item) for item in album.items()]
+        if not results:
+            raise ReplayGainError(u'album {0} has no tracks'.format(album))
+
+        track_gains = [self._gain(blocks, peak) for blocks, peak in results]
+        album_gain = self._gain(
+            numpy.concatenate([blocks for blocks, _ in results]),
+            max(peak for _, peak in results),
+        )
+        return AlbumGain(album_gain, track_gains)
+
+    def _gain(self, blocks, peak):
+        return Gain(self.target - _integrated_loudness(blocks), peak)
+
+    def _analyze(self, item):
+        """Decode an item's file and return its gating blocks and its
+        peak.
+        """
+        self._log.debug(u'analyzing {0}', displayable_path(item.path))
+        rate, channels, chunks = self._decode(item)
+        meter = _LoudnessMeter(rate, channels, self.true_peak)
+        for chunk in chunks:
+            meter.feed(chunk)
+        return meter.blocks(), meter.peak
+
+    def _decode(self, item):
+        """Get the sample rate, the number of channels and an iterator
+        over the chunks of float samples of the item's file.
+        """
+        if item.path.lower().endswith(b'.wav'):
+            try:
+                wav = wave.open(syspath(item.path), 'rb')
+            except wave.Error:
+                # Not a PCM WAV file.
+                pass
+            except (IOError, EOFError) as exc:
+                raise ReplayGainError(
+                    u'could not read {0}: {1}'.format(
+                        displayable_path(item.path), exc)
+                )
+            else:
+                return (wav.getframerate(), wav.getnchannels(),
+                        self._wav_chunks(wav))
+
+        rate = item.samplerate or 48000
+        channels = item.channels or 2
+        return rate, channels, self._ffmpeg_chunks(item, rate, channels)
+
+    def _wav_chunks(self, wav):
+        """Generate chunks of float samples from an open WAV file.
+        """
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        try:
+            while True:
+                data = wav.readframes(self.chunk_frames)
+                if not data:
+                    break
+                if width == 1:
+                    samples = (numpy.frombuffer(data, numpy.uint8) -
+                               128.0) / 128
+                elif width == 3:
+                    # Pad every 24-bit sample to 32 bits.
+                    raw = numpy.frombuffer(data, numpy.uint8).reshape(-1, 3)
+                    padded = numpy.zeros((len(raw), 4), numpy.uint8)
+                    padded[:, 1:] = raw
+                    samples = padded.view('<i4')[:, 0] / float(1 << 31)
+                else:
+                    dtype = '<i2' if width == 2 else '<i4'
+                    samples = numpy.frombuffer(data, dtype) / \
+                        float(1 << (8 * width - 1))
+                yield samples.reshape(-1, channels)
+        finally:
+            wav.close()
+
+    def _ffmpeg_chunks(self, item, rate, channels):
+        """Generate chunks of float samples decoded by FFmpeg, which
+        also converts the audio to the given sample rate and number of
+        channels.
+        """
+        args = [self.command, '-v', 'error', '-nostdin',
+                '-i', syspath(item.path, prefix=False),
+                '-f', 'f32le', '-acodec', 'pcm_f32le',
+                '-ar', str(rate), '-ac', str(channels), '-']
+        self._log.debug(u'executing {0}',
+                        u' '.join(map(displayable_path, args)))
+        # Collect the error messages in a file: if they went to a pipe
+        # that is only read at the end, FFmpeg could block on it.
+        errors = tempfile.TemporaryFile()
+        try:
+            proc = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                    stderr=errors)
+        except OSError as exc:
+            errors.close()
+            raise ReplayGainError(
+                u'could not run {0}: {1}'.format(self.command, exc)
+            )
+
+        try:
+            frame_size = 4 * channels
+            while True:
+                data = proc.stdout.read(self.chunk_frames * frame_size)
+                data = data[:len(data) - len(data) % frame_size]
+                if not data:
+                    break
+                samples = numpy.frombuffer(data, '<f4').astype(float)
+                yield samples.reshape(-1, channels)
+
+            if proc.wait():
+                errors.seek(0)
+                error = errors.read()
+                raise ReplayGainError(
+                    u'{0} failed on {1}: {2}'.format(
+                        self.command, displayable_path(item.path),
+                        error.decode('utf-8', 'ignore').strip())
+                )
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+            errors.close()
+
+
 # Main plugin logic.
 
 class ReplayGainPlugin(BeetsPlugin):
@@ -794,7 +1141,8 @@ class ReplayGainPlugin(BeetsPlugin):
         "command": CommandBackend,
         "gstreamer": GStreamerBackend,
         "audiotools": AudioToolsBackend,
-        "bs1770gain": Bs1770gainBackend
+        "bs1770gain": Bs1770gainBackend,
+        "numpy": NumpyBackend,
     }
 
     def __init__(self):
@@ -806,6 +1154,7 @@ class ReplayGainPlugin(BeetsPlugin):
             'auto': True,
             'backend': u'command',
             'targetlevel': 89,
+            'threads': util.cpu_count(),
         })
 
         self.overwrite = self.config['overwrite'].get(bool)
@@ -875,24 +1224,37 @@ class ReplayGainPlugin(BeetsPlugin):
         self._log.info(u'analyzing {0}', album)
 
         try:
-            album_gain = self.backend_instance.compute_album_gain(album)
-            if len(album_gain.track_gains) != len(album.items()):
-                raise ReplayGainError(
-                    u"ReplayGain backend failed "
-                    u"for some tracks in album {0}".format(album)
-                )
-
-            self.store_album_gain(album, album_gain.album_gain)
-            for item, track_gain in zip(album.items(), album_gain.track_gains):
-                self.store_track_gain(item, track_gain)
-                if write:
-                    item.try_write()
+            album_gain = self.compute_album_gain(album)
+            self.apply_album_gain(album, album_gain, write)
         except ReplayGainError as e:
             self._log.info(u"ReplayGain error: {0}", e)
         except FatalReplayGainError as e:
             raise ui.UserError(
                 u"Fatal replay gain error: {0}".format(e))
 
+    def compute_album_gain(self, album):
+        """Compute the album gain of `album` and the track gains of its
+        items and return an `AlbumGain`. Nothing is stored, so several
+        albums can be analyzed at once if the backend is `parallel`.
+        """
+        album_gain = self.backend_instance.compute_album_gain(album)
+        if len(album_gain.track_gains) != len(album.items()):
+            raise ReplayGainError(
+                u"ReplayGain backend failed "
+                u"for some tracks in album {0}".format(album)
+            )
+        return album_gain
+
+    def apply_album_gain(self, album, album_gain, write):
+        """Store an `AlbumGain` computed for `album` and, if `write` is
+        truthy, write it to the items' files.
+        """
+        self.store_album_gain(album, album_gain.album_gain)
+        for item, track_gain in zip(album.items(), album_gain.track_gains):
+            self.store_track_gain(item, track_gain)
+            if write:
+                item.try_write()
+
     def handle_track(self, item, write):
         """Compute track replay gain and store it in the item.
 
@@ -907,21 +1269,80 @@ class ReplayGainPlugin(BeetsPlugin):
         self._log.info(u'analyzing {0}', item)
 
         try:
-            track_gains = self.backend_instance.compute_track_gain([item])
-            if len(track_gains) != 1:
-                raise ReplayGainError(
-                    u"ReplayGain backend failed for track {0}".format(item)
-                )
-
-            self.store_track_gain(item, track_gains[0])
-            if write:
-                item.try_write()
+            track_gain = self.compute_track_gain(item)
+            self.apply_track_gain(item, track_gain, write)
         except ReplayGainError as e:
             self._log.info(u"ReplayGain error: {0}", e)
         except FatalReplayGainError as e:
             raise ui.UserError(
                 u"Fatal replay gain error: {0}".format(e))
 
+    def compute_track_gain(self, item):
+        """Compute the track gain of `item` and return a `Gain` without
+        storing it.
+        """
+        track_gains = self.backend_instance.compute_track_gain([item])
+        if len(track_gains) != 1:
+            raise ReplayGainError(
+                u"ReplayGain backend failed for track {0}".format(item)
+            )
+        return track_gains[0]
+
+    def apply_track_gain(self, item, track_gain, write):
+        """Store a `Gain` computed for `item` and, if `write` is truthy,
+        write it to the file.
+        """
+        self.store_track_gain(item, track_gain)
+        if write:
+            item.try_write()
+
+    def handle_many(self, lib, objs, album, write, threads):
+        """Handle many albums (if `album` is set) or items, like
+        `handle_album` and `handle_track` do.
+
+        If the backend supports it, up to `threads` albums or tracks are
+        analyzed at once. The results are stored and written from this
+        thread as soon as they are available.
+        """
+        if album:
+            requires_gain = self.album_requires_gain
+            compute, apply_gain = self.compute_album_gain, \
+                self.apply_album_gain
+        else:
+            requires_gain = self.track_requires_gain
+            compute, apply_gain = self.compute_track_gain, \
+                self.apply_track_gain
+
+        if not self.backend_instance.parallel or threads <= 1:
+            handle = self.handle_album if album else self.handle_track
+            for obj in objs:
+                handle(obj, write)
+            return
+
+        todo = []
+        for obj in objs:
+            if requires_gain(obj):
+                todo.append(obj)
+            else:
+                self._log.info(u'Skipping {0}', obj)
+
+        def analyze(obj):
+            try:
+                return obj, compute(obj), None
+            except (ReplayGainError, FatalReplayGainError) as exc:
+                return obj, None, exc
+
+        for obj, gain, exc in util.par_map(analyze, todo, threads):
+            if isinstance(exc, FatalReplayGainError):
+                raise ui.UserError(
+                    u"Fatal replay gain error: {0}".format(exc))
+            elif exc:
+                self._log.info(u"ReplayGain error: {0}", exc)
+            else:
+                self._log.info(u'analyzed {0}', obj)
+                with lib.transaction():
+                    apply_gain(obj, gain, write)
+
     def imported(self, session, task):
         """Add replay gain info to items or albums of ``task``.
         """
@@ -937,16 +1358,20 @@ class ReplayGainPlugin(BeetsPlugin):
             self._log.setLevel(logging.INFO)
 
             write = ui.should_write()
+            threads = opts.threads or self.config['threads'].get(int)
 
             if opts.album:
-                for album in lib.albums(ui.decargs(args)):
-                    self.handle_album(album, write)
-
+                objs = lib.albums(ui.decargs(args))
             else:
-                for item in lib.items(ui.decargs(args)):
-                    self.handle_track(item, write)
+                objs = lib.items(ui.decargs(args))
+            self.handle_many(lib, objs, opts.album, write, threads)
 
         cmd = ui.Subcommand('replaygain', help=u'analyze for ReplayGain')
         cmd.parser.add_album_option()
+        cmd.parser.add_option(
+            u'-t', u'--threads', action='store', type='int',
+            help=u'number of albums or tracks to analyze at once '
+                 u'(if the backend supports it)',
+        )
         cmd.func = func
         return [cmd]
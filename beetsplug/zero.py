@@ -88,7 +88,7 @@ class ZeroPlugin(BeetsPlugin):
         """Populate `self.fields_to_progs` for a given field.
         Do some sanity checks then compile the regexes.
         """
-        if field not in MediaFile.fields():
+        if field not in MediaFile.field_names():
             self._log.error(u'invalid field: {0}', field)
         elif field in ('id', 'path', 'album_id'):
             self._log.warning(u'field \'{0}\' ignored, zeroing '
@@ -164,6 +164,8 @@ class TestCase(unittest.TestCase, Assertions):
 
         beets.config['statefile'] = \
             util.py3_path(os.path.join(self.temp_dir, b'state.  pickle'))
+        beets.config['statedb'] = \
+            util.py3_path(os.path.join(self.temp_dir, b'state.db'))
         beets.config['library'] = \
             util.py3_path(os.path.join(self.temp_dir, b'library.db'))
         beets.config['directory'] = \
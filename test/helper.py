@@ -226,6 +226,9 @@ class TestHelper(object):
         Album._original_types = dict(Album._types)
         Item._types.update(beets.plugins.types(Item))
         Album._types.update(beets.plugins.types(Album))
+        Item._clear_type_cache()
+        Album._clear_type_cache()
+        beets.library.path_format_query.cache_clear()
 
     def unload_plugins(self):
         """Unload all plugins and remove the from the configuration.
@@ -236,6 +239,7 @@ class TestHelper(object):
         beets.plugins._instances = {}
         Item._types = Item._original_types
         Album._types = Album._original_types
+        beets.library.path_format_query.cache_clear()
 
     def create_importer(self, item_count=1, album_count=1):
         """Create files to import and return corresponding session.
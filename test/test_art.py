@@ -98,6 +98,22 @@ class FetchImageTest(FetchImageHelper, UseThePlugin):
         self.assertEqual(os.path.splitext(self.candidate.path)[1], b'.png')
         self.assertExists(self.candidate.path)
 
+    def test_reuses_session(self):
+        self.mock_response(self.URL, 'image/jpeg')
+        with patch.object(self.source._session, 'send',
+                          wraps=self.source._session.send) as send:
+            self.source.fetch_image(self.candidate, self.extra)
+            self.source.fetch_image(fetchart.Candidate(logger, url=self.URL),
+                                    self.extra)
+        self.assertEqual(send.call_count, 2)
+
+    def test_session_limits_host_connections(self):
+        self.plugin.config['host_connections'] = 3
+        source = fetchart.RemoteArtSource(logger, self.plugin.config)
+        adapter = source._session.get_adapter(self.URL)
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertTrue(adapter._pool_block)
+
 
 class FSArtTest(UseThePlugin):
     def setUp(self):
@@ -229,6 +245,133 @@ class CombinedTest(FetchImageHelper, UseThePlugin):
         self.assertEqual(len(responses.calls), 0)
 
 
+class ArtCacheTest(FetchImageHelper, UseThePlugin):
+    ASIN = 'xxxx'
+    AMAZON_URLS = [fetchart.Amazon.URL % ('xxxx', index)
+                   for index in fetchart.Amazon.INDICES]
+
+    def setUp(self):
+        super(ArtCacheTest, self).setUp()
+        self.plugin.sources = [fetchart.Amazon(logger, self.plugin.config)]
+        self.album = _common.Bag(asin=self.ASIN, album=u'album')
+
+    def test_hit_is_downloaded_without_searching(self):
+        self.mock_response(self.AMAZON_URLS[0], content_type='text/html')
+        self.mock_response(self.AMAZON_URLS[1])
+        self.assertIsNotNone(self.plugin.art_for_album(self.album, None))
+        self.assertEqual(len(responses.calls), 2)
+
+        candidate = self.plugin.art_for_album(self.album, None)
+        self.assertIsNotNone(candidate)
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(responses.calls[-1].request.url,
+                         self.AMAZON_URLS[1])
+
+    def test_miss_is_not_searched_again(self):
+        for url in self.AMAZON_URLS:
+            self.mock_response(url, content_type='text/html')
+        self.assertIsNone(self.plugin.art_for_album(self.album, None))
+        self.assertEqual(len(responses.calls), 2)
+
+        self.assertIsNone(self.plugin.art_for_album(self.album, None))
+        self.assertEqual(len(responses.calls), 2)
+
+    def test_forced_search_ignores_miss(self):
+        for url in self.AMAZON_URLS:
+            self.mock_response(url, content_type='text/html')
+        self.assertIsNone(self.plugin.art_for_album(self.album, None))
+        self.assertEqual(len(responses.calls), 2)
+
+        self.assertIsNone(self.plugin.art_for_album(self.album, None,
+                                                    force=True))
+        self.assertEqual(len(responses.calls), 4)
+
+    def test_forced_search_refreshes_hit(self):
+        self.mock_response(self.AMAZON_URLS[0])
+        self.assertIsNotNone(self.plugin.art_for_album(self.album, None))
+        self.assertEqual(len(responses.calls), 1)
+
+        # The source is searched again, and now the first URL fails.
+        responses.reset()
+        self.mock_response(self.AMAZON_URLS[0], content_type='text/html')
+        self.mock_response(self.AMAZON_URLS[1])
+        self.plugin.art_for_album(self.album, None, force=True)
+        self.assertEqual(len(responses.calls), 2)
+
+        # The new hit replaced the old one.
+        responses.reset()
+        self.mock_response(self.AMAZON_URLS[1])
+        self.plugin.art_for_album(self.album, None)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(responses.calls[0].request.url,
+                         self.AMAZON_URLS[1])
+
+    def test_expired_miss_is_searched_again(self):
+        self.plugin.config['miss_ttl'] = 0
+        for url in self.AMAZON_URLS:
+            self.mock_response(url, content_type='text/html')
+        self.plugin.art_for_album(self.album, None)
+        self.plugin.art_for_album(self.album, None)
+        self.assertEqual(len(responses.calls), 4)
+
+    def test_failed_request_is_not_a_miss(self):
+        # Requests to URLs without a mocked response fail.
+        self.assertIsNone(self.plugin.art_for_album(self.album, None))
+        self.plugin.art_for_album(self.album, None)
+        self.assertEqual(len(responses.calls), 4)
+
+    def test_other_album_is_searched(self):
+        for url in self.AMAZON_URLS:
+            self.mock_response(url, content_type='text/html')
+        self.plugin.art_for_album(self.album, None)
+        album = _common.Bag(asin=self.ASIN, album=u'other album')
+        self.plugin.art_for_album(album, None)
+        self.assertEqual(len(responses.calls), 4)
+
+    def test_expired_results_are_removed(self):
+        path = os.path.join(self.temp_dir, b'cache.db')
+        cache = fetchart.ArtCache(path, 10, 10)
+        cache.record_miss(u'key', u'amazon')
+        cache.record_hit(u'key', u'coverart', u'http://x', 0, 1, (2, 3))
+        self.assertEqual(cache.get(u'key', u'coverart'),
+                         (u'http://x', 0, 1, (2, 3)))
+        cache.close()
+
+        cache = fetchart.ArtCache(path, 10, 0)
+        self.assertIsNone(cache.get(u'key', u'amazon'))
+        self.assertIsNotNone(cache.get(u'key', u'coverart'))
+        count, = cache._conn.execute('SELECT COUNT(*) FROM results').fetchone()
+        self.assertEqual(count, 1)
+        cache.close()
+
+    def test_cache_closed_after_batch(self):
+        for url in self.AMAZON_URLS:
+            self.mock_response(url, content_type='text/html')
+        self.plugin.art_for_album(self.album, None)
+        self.assertIsNotNone(self.plugin._cache)
+        self.plugin.batch_fetch_art(None, [], force=False)
+        self.assertIsNone(self.plugin._cache)
+
+        # The cache is opened again when needed.
+        self.plugin.art_for_album(self.album, None)
+        self.assertEqual(len(responses.calls), 2)
+
+    def test_cache_closed_on_exit(self):
+        self.plugin.art_for_album(self.album, None)
+        self.assertIsNotNone(self.plugin._cache)
+        for handler in self.plugin.listeners['cli_exit']:
+            handler(lib=None)
+        self.assertIsNone(self.plugin._cache)
+
+    def test_cache_disabled(self):
+        self.plugin.config['cache'] = None
+        for url in self.AMAZON_URLS:
+            self.mock_response(url, content_type='text/html')
+        self.plugin.art_for_album(self.album, None)
+        self.plugin.art_for_album(self.album, None)
+        self.assertEqual(len(responses.calls), 4)
+
+
 class AAOTest(UseThePlugin):
     ASIN = 'xxxx'
     AAO_URL = 'http://www.albumart.org/index_detail.php?asin={0}'.format(ASIN)
@@ -414,7 +557,7 @@ class ArtImporterTest(UseThePlugin):
         self.old_afa = self.plugin.art_for_album
         self.afa_response = fetchart.Candidate(logger, path=self.art_file)
 
-        def art_for_album(i, p, local_only=False):
+        def art_for_album(i, p, local_only=False, force=False):
             return self.afa_response
 
         self.plugin.art_for_album = art_for_album
@@ -513,6 +656,33 @@ class ArtImporterTest(UseThePlugin):
         self.plugin.batch_fetch_art(self.lib, self.lib.albums(), force=False)
         self.assertExists(self.album.artpath)
 
+    def test_batch_fetch_art_for_many_albums(self):
+        for index in range(4):
+            albumdir = os.path.join(self.libdir,
+                                    'album{0}'.format(index).encode('ascii'))
+            os.mkdir(albumdir)
+            item = _common.item()
+            item.path = os.path.join(albumdir, b'test.mp3')
+            shutil.copyfile(self.i.path, item.path)
+            self.lib.add_album([item])
+
+        def art_for_album(album, paths, local_only=False, force=False):
+            # Every album gets its own file, since the art is moved.
+            path = os.path.join(self.temp_dir, 'cover{0}.jpg'.format(
+                album.id).encode('ascii'))
+            _common.touch(path)
+            return fetchart.Candidate(logger, path=path)
+        self.plugin.art_for_album = art_for_album
+
+        self.plugin.batch_fetch_art(self.lib, self.lib.albums(), force=False,
+                                    threads=3, chunksize=2)
+        albums = self.lib.albums()
+        self.assertEqual(len(albums), 5)
+        for album in albums:
+            self.assertEqual(album.artpath,
+                             os.path.join(album.item_dir(), b'cover.jpg'))
+            self.assertExists(album.artpath)
+
 
 class ArtForAlbumTest(UseThePlugin):
     """ Tests that fetchart.art_for_album respects the size
@@ -19,17 +19,27 @@ from __future__ import division, absolute_import, print_function
 
 import re
 import copy
+import random
 import unittest
 
+from jellyfish import levenshtein_distance
+from munkres import Munkres
+
 from test import _common
 from beets import autotag
 from beets.autotag import match
+from beets.autotag import hooks
 from beets.autotag.hooks import Distance, string_dist
 from beets.library import Item
 from beets.util import plurality
 from beets.autotag import AlbumInfo, TrackInfo
 from beets import config
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class PluralityTest(_common.TestCase):
     def test_plurality_consensus(self):
@@ -487,6 +497,60 @@ class AlbumDistanceTest(_common.TestCase):
         self.assertEqual(dist, 0)
 
 
+class CandidatePruningTest(_common.TestCase):
+    def setUp(self):
+        super(CandidatePruningTest, self).setUp()
+        self.items = [
+            _make_item(u'one', 1),
+            _make_item(u'two', 2),
+            _make_item(u'three', 3),
+        ]
+
+    def _info(self, album_id, artist, album, tracks=None):
+        return AlbumInfo(
+            artist=artist,
+            album=album,
+            tracks=tracks or _make_trackinfo(),
+            va=False,
+            album_id=album_id,
+            artist_id=None,
+        )
+
+    def test_lower_bound_does_not_exceed_distance(self):
+        infos = [
+            self._info(u'1', u'some artist', u'some album'),
+            self._info(u'2', u'someone else', u'other album'),
+            self._info(u'3', u'some artist', u'some album',
+                       _make_trackinfo()[:2]),
+            self._info(u'4', u'some artist', u'album',
+                       _make_trackinfo() + _make_trackinfo()),
+        ]
+        infos[0].tracks[1].title = u'completely different'
+        for info in infos:
+            mapping, _, _ = match.assign_items(self.items, info.tracks)
+            dist = match.distance(self.items, info, mapping)
+            bound = match.distance_lower_bound(self.items, info)
+            self.assertLessEqual(bound, dist.distance + 1e-9)
+
+    def test_prune_candidate_beyond_best(self):
+        config['match']['prune_candidates'] = 1
+        results = {}
+        match._add_candidate(self.items, results,
+                             self._info(u'1', u'some artist', u'some album'))
+        match._add_candidate(self.items, results,
+                             self._info(u'2', u'another', u'elsewhere'))
+        self.assertEqual(list(results.keys()), [u'1'])
+
+    def test_keep_candidates_when_pruning_disabled(self):
+        config['match']['prune_candidates'] = 0
+        results = {}
+        match._add_candidate(self.items, results,
+                             self._info(u'1', u'some artist', u'some album'))
+        match._add_candidate(self.items, results,
+                             self._info(u'2', u'another', u'elsewhere'))
+        self.assertEqual(set(results.keys()), set([u'1', u'2']))
+
+
 class AssignmentTest(unittest.TestCase):
     def item(self, title, track):
         return Item(
@@ -615,6 +679,59 @@ class AssignmentTest(unittest.TestCase):
             self.assertEqual(items.index(item), trackinfo.index(info))
 
 
+@unittest.skipIf(match.numpy is None, u'numpy not available')
+class VectorizedAssignmentTest(unittest.TestCase):
+    def setUp(self):
+        self.items = [
+            Item(title=u'one', track=1, length=200.0, mb_trackid=u'a'),
+            Item(title=u'Two (Live)', track=2, length=180.0, mb_trackid=u''),
+            Item(title=u'three', track=7, length=330.0, mb_trackid=u'x'),
+            Item(title=u'four', track=0, length=100.0, mb_trackid=u''),
+        ]
+        self.tracks = [
+            TrackInfo(u'One', u'a', length=201.0, index=1, medium_index=1),
+            TrackInfo(u'two', u'b', length=None, index=2, medium_index=2),
+            TrackInfo(u'Three', u'c', length=240.0, index=3, medium_index=1),
+            TrackInfo(u'Four', u'd', length=100.0, index=None),
+            TrackInfo(u'Five', u'e', length=90.0, index=5, medium_index=7),
+        ]
+
+    def test_cost_matrix_matches_track_distance(self):
+        costs = match.track_costs(self.items, self.tracks)
+        matrix = match.track_cost_matrix(self.items, self.tracks)
+        for i, row in enumerate(costs):
+            for j, dist in enumerate(row):
+                self.assertAlmostEqual(matrix[i, j], dist.distance)
+
+    def assertOptimal(self, costs):  # noqa
+        matching = match.linear_sum_assignment(costs)
+        expected = Munkres().compute(costs.tolist())
+        self.assertEqual(len(matching), len(expected))
+        self.assertAlmostEqual(sum(costs[i, j] for i, j in matching),
+                               sum(costs[i, j] for i, j in expected))
+        self.assertEqual(len(set(i for i, _ in matching)), len(matching))
+        self.assertEqual(len(set(j for _, j in matching)), len(matching))
+
+    def test_assignment_is_optimal(self):
+        rand = random.Random(2)
+        for rows, cols in [(1, 1), (5, 5), (4, 7), (7, 4), (12, 12)]:
+            costs = numpy.array([[rand.random() for _ in range(cols)]
+                                 for _ in range(rows)])
+            self.assertOptimal(costs)
+
+    def test_assign_items_matches_munkres(self):
+        mapping, extra_items, extra_tracks = \
+            match.assign_items(self.items, self.tracks)
+        costs = match.track_costs(self.items, self.tracks)
+        expected = Munkres().compute(costs)
+        self.assertEqual(
+            mapping,
+            dict((self.items[i], self.tracks[j]) for i, j in expected),
+        )
+        self.assertEqual(extra_items, [])
+        self.assertEqual(len(extra_tracks), 1)
+
+
 class ApplyTestUtil(object):
     def _apply(self, info=None, per_disc_numbering=False):
         info = info or self.info
@@ -934,6 +1051,25 @@ class StringDistanceTest(unittest.TestCase):
         dist = string_dist(u'\xe9\xe1\xf1', u'ean')
         self.assertEqual(dist, 0.0)
 
+    def test_cached_result_unchanged(self):
+        hooks.clear_string_dist_cache()
+        dist1 = string_dist(u'My Song (Live) feat. Someone', u'My Song')
+        dist2 = string_dist(u'My Song (Live) feat. Someone', u'My Song')
+        hooks.clear_string_dist_cache()
+        dist3 = string_dist(u'My Song (Live) feat. Someone', u'My Song')
+        self.assertEqual(dist1, dist2)
+        self.assertEqual(dist1, dist3)
+
+    def test_bitparallel_levenshtein(self):
+        pairs = [
+            (u'', u''), (u'abc', u''), (u'', u'abc'), (u'kitten', u'sitting'),
+            (u'flaw', u'lawn'), (u'abc', u'abc'), (u'abcdef', u'azced'),
+            (u'a' * 70 + u'b', u'b' + u'a' * 70), (u'gumbo', u'gambol'),
+        ]
+        for str1, str2 in pairs:
+            self.assertEqual(hooks._levenshtein_bitparallel(str1, str2),
+                             levenshtein_distance(str1, str2))
+
 
 class EnumTest(_common.TestCase):
     """
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# This file is part of beets.
+# Copyright 2016, Adrian Sampson.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+"""Tests for fingerprinting in the 'chroma' plugin.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import unittest
+from mock import patch
+
+from test import _common
+from test.helper import TestHelper
+
+from beets import logging
+from beets.library import Item
+
+try:
+    import acoustid
+    from beetsplug import chroma
+except ImportError:
+    acoustid = None
+
+log = logging.getLogger('beets.test_chroma')
+
+
+def fake_fingerprint(path):
+    """Stand in for `acoustid.fingerprint_file`: fingerprint a file
+    with its path.
+    """
+    return 10.0, b'fp:' + path
+
+
+@unittest.skipIf(acoustid is None, u'pyacoustid cannot be found')
+class FingerprintItemsTest(unittest.TestCase, TestHelper):
+    def setUp(self):
+        self.setup_beets()
+        self.items = [self.add_item(title=u't%i' % i, length=10.0)
+                      for i in range(3)]
+
+    def tearDown(self):
+        self.teardown_beets()
+
+    def fingerprint(self, **kwargs):
+        with patch('acoustid.fingerprint_file',
+                   side_effect=fake_fingerprint) as fingerprint_file:
+            results = list(chroma.fingerprint_items(log, self.items,
+                                                    **kwargs))
+        return results, fingerprint_file
+
+    def test_fingerprints_stored(self):
+        results, _ = self.fingerprint(threads=2, chunksize=2)
+        self.assertEqual(sorted(item.id for item, _ in results),
+                         [item.id for item in self.items])
+        for item, fp in results:
+            self.assertEqual(fp, b'fp:' + item.path)
+            self.assertEqual(self.lib.get_item(item.id).acoustid_fingerprint,
+                             fp)
+
+    def test_write_calls_try_write(self):
+        with patch.object(Item, 'try_write') as try_write:
+            self.fingerprint(write=True)
+        self.assertEqual(try_write.call_count, 3)
+
+    def test_no_write_by_default(self):
+        with patch.object(Item, 'try_write') as try_write:
+            self.fingerprint()
+        self.assertFalse(try_write.called)
+
+    def test_failed_generation_yields_none(self):
+        error = acoustid.FingerprintGenerationError(u'broken')
+        with patch('acoustid.fingerprint_file', side_effect=error):
+            results = list(chroma.fingerprint_items(log, self.items))
+        self.assertEqual([fp for _, fp in results], [None] * 3)
+        for item in self.items:
+            self.assertFalse(
+                self.lib.get_item(item.id).acoustid_fingerprint)
+
+    def test_existing_fingerprint_not_regenerated(self):
+        self.items[0].acoustid_fingerprint = u'old'
+        self.items[0].store()
+        results, fingerprint_file = self.fingerprint()
+        self.assertEqual(dict((item.id, fp) for item, fp in results)
+                         [self.items[0].id], u'old')
+        self.assertEqual(fingerprint_file.call_count, 2)
+        self.assertEqual(self.lib.get_item(self.items[0].id)
+                         .acoustid_fingerprint, u'old')
+
+
+@unittest.skipIf(acoustid is None, u'pyacoustid cannot be found')
+class FingerprintTaskTest(unittest.TestCase, TestHelper):
+    def setUp(self):
+        self.setup_beets()
+        self.load_plugins('chroma')
+
+    def tearDown(self):
+        chroma._fingerprints.clear()
+        chroma._acoustids.clear()
+        chroma._matches.clear()
+        self.unload_plugins()
+        self.teardown_beets()
+
+    def test_fingerprint_every_item_of_task(self):
+        items = [self.create_item(path='/a{0}.mp3'.format(i).encode('ascii'))
+                 for i in range(3)]
+        task = _common.Bag(is_album=True, items=items)
+        with patch('acoustid.fingerprint_file',
+                   side_effect=fake_fingerprint), \
+                patch('acoustid.lookup', return_value={'status': 'error'}):
+            chroma.fingerprint_task(log, task, None, threads=2)
+        for item in items:
+            self.assertEqual(chroma._fingerprints[item.path],
+                             b'fp:' + item.path)
+
+    def test_fingerprint_command_with_threads(self):
+        for i in range(3):
+            self.add_item(title=u't%i' % i, length=10.0)
+        with patch('acoustid.fingerprint_file',
+                   side_effect=fake_fingerprint), \
+                patch.object(Item, 'try_write'):
+            self.run_command('fingerprint', '-t', '2')
+        for item in self.lib.items():
+            self.assertEqual(item.acoustid_fingerprint, b'fp:' + item.path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -17,6 +17,7 @@ from __future__ import division, absolute_import, print_function
 
 import re
 import os.path
+import shutil
 import unittest
 
 from test import _common
@@ -211,6 +212,108 @@ class ConvertCliTest(unittest.TestCase, TestHelper, ConvertCommand):
         with open(converted, 'r') as f:
             self.assertEqual(f.read(), 'XXX')
 
+    def test_skip_unchanged(self):
+        self.run_convert('--yes')
+        converted = os.path.join(self.convert_dest, b'converted.mp3')
+        mtime = os.path.getmtime(converted)
+
+        with capture_log('beets.convert') as logs:
+            self.run_convert('--yes')
+        self.assertIn(u'convert: Skipping {0} (target file exists)'.format(
+            util.displayable_path(self.item.path)), logs)
+        self.assertEqual(os.path.getmtime(converted), mtime)
+
+    def test_reconvert_changed_source(self):
+        # A file converted before the manifest existed is kept at first.
+        converted = os.path.join(self.convert_dest, b'converted.mp3')
+        self.touch(converted, content='XXX')
+        self.run_convert('--yes')
+        self.assertFileTag(converted, 'XXX')
+
+        # Replace the audio.
+        shutil.copy(os.path.join(_common.RSRC, b'full.flac'), self.item.path)
+        with capture_log('beets.convert') as logs:
+            self.run_convert('--yes')
+        self.assertIn(u'convert: Updating {0} (source changed)'.format(
+            util.displayable_path(self.item.path)), logs)
+        self.assertFileTag(converted, 'mp3')
+
+    def test_retag_when_only_metadata_changed(self):
+        # Copy the file without transcoding so that its tags can be read.
+        self.run_convert('--yes', '--format', 'ogg')
+        converted = os.path.join(self.convert_dest, b'converted.ogg')
+
+        self.item.title = u'new title'
+        self.item.store()
+        with capture_log('beets.convert') as logs:
+            self.run_convert('--yes', '--format', 'ogg')
+        self.assertIn(u'convert: Updating tags of {0}'.format(
+            util.displayable_path(converted)), logs)
+        self.assertEqual(MediaFile(converted).title, u'new title')
+
+        # Writing the tags to the source file does not change its audio.
+        self.item.title = u'newer title'
+        self.item.store()
+        self.item.write()
+        with capture_log('beets.convert') as logs:
+            self.run_convert('--yes', '--format', 'ogg')
+        self.assertIn(u'convert: Updating tags of {0}'.format(
+            util.displayable_path(converted)), logs)
+        self.assertEqual(MediaFile(converted).title, u'newer title')
+
+    def test_retag_when_tags_of_opus_source_rewritten(self):
+        # The bitrate of Opus files is estimated from their size, which
+        # changes with their tags.
+        self.config['convert']['formats']['opus'] = {
+            'command': self.tagged_copy_cmd('opus'),
+            'extension': 'opus',
+        }
+        [item] = self.add_item_fixtures(ext='opus')
+        self.run_convert_path(item.path, '--yes', '--format', 'opus')
+        converted = os.path.join(self.convert_dest, b'converted.opus')
+
+        item.lyrics = u'la la la ' * 1000
+        item.store()
+        item.write()
+        with capture_log('beets.convert') as logs:
+            self.run_convert_path(item.path, '--yes', '--format', 'opus')
+        self.assertIn(u'convert: Updating tags of {0}'.format(
+            util.displayable_path(converted)), logs)
+        self.assertEqual(MediaFile(converted).lyrics, item.lyrics)
+
+    def test_manifest_disabled(self):
+        self.config['convert']['manifest'] = None
+        self.run_convert('--yes')
+        converted = os.path.join(self.convert_dest, b'converted.mp3')
+        self.touch(converted, content='XXX')
+
+        mtime = os.path.getmtime(self.item.path) + 10
+        os.utime(self.item.path, (mtime, mtime))
+        self.run_convert('--yes')
+        self.assertFileTag(converted, 'XXX')
+
+    def test_copy_album_art(self):
+        self.config['convert']['copy_album_art'] = True
+        self.album.artpath = os.path.join(_common.RSRC, b'image-2x3.jpg')
+        self.album.store()
+        self.run_command('convert', '--yes', '--album')
+        self.assertFileTag(os.path.join(self.convert_dest, b'converted.mp3'),
+                           'mp3')
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.convert_dest, b'cover.jpg')))
+
+    def test_log_summary(self):
+        with capture_log('beets.convert') as logs:
+            self.run_convert('--yes')
+        self.assertTrue(any(line.startswith(u'convert: Transcoded 1 (')
+                            for line in logs))
+
+        with capture_log('beets.convert') as logs:
+            self.run_convert('--yes')
+        summary = [line for line in logs
+                   if line.startswith(u'convert: Transcoded')]
+        self.assertIn(u'skipped 1, failed 0', summary[0])
+
     def test_pretend(self):
         self.run_convert('--pretend')
         converted = os.path.join(self.convert_dest, b'converted.mp3')
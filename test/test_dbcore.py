@@ -285,6 +285,36 @@ class ModelTest(unittest.TestCase):
         model.some_float_field = None
         self.assertEqual(model.some_float_field, 0.0)
 
+    def test_registered_type_is_used(self):
+        self.assertEqual(TestModel1._type('new_float_field'),
+                         dbcore.types.DEFAULT)
+        TestModel1._types['new_float_field'] = dbcore.types.FLOAT
+        TestModel1._clear_type_cache()
+        try:
+            model = TestModel1()
+            model.new_float_field = None
+            self.assertEqual(model.new_float_field, 0.0)
+        finally:
+            del TestModel1._types['new_float_field']
+            TestModel1._clear_type_cache()
+        self.assertEqual(TestModel1._type('new_float_field'),
+                         dbcore.types.DEFAULT)
+
+    def test_retyped_field_is_used(self):
+        TestModel1._types['some_float_field'] = dbcore.types.INTEGER
+        TestModel1._clear_type_cache()
+        try:
+            self.assertEqual(TestModel1._type('some_float_field'),
+                             dbcore.types.INTEGER)
+            # Subclasses share the types.
+            self.assertEqual(TestModel2._type('some_float_field'),
+                             dbcore.types.INTEGER)
+        finally:
+            TestModel1._types['some_float_field'] = dbcore.types.FLOAT
+            TestModel1._clear_type_cache()
+        self.assertEqual(TestModel1._type('some_float_field'),
+                         dbcore.types.FLOAT)
+
     def test_load_deleted_flex_field(self):
         model1 = TestModel1()
         model1['flex_field'] = True
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# This file is part of beets.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+"""Tests for the 'export' plugin.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import json
+import unittest
+
+from test.helper import TestHelper
+
+
+class ExportPluginTest(unittest.TestCase, TestHelper):
+
+    def setUp(self):
+        self.setup_beets()
+        self.load_plugins('export')
+        for i, title in enumerate([u'one', u'two, too']):
+            self.add_item(title=title, artist=u'the artist', track=i + 1)
+
+    def tearDown(self):
+        self.unload_plugins()
+        self.teardown_beets()
+
+    def test_json_output(self):
+        out = self.run_with_output('export', '-l', '-i', 'title,track')
+        data = json.loads(out)
+        self.assertEqual(sorted(d['title'] for d in data),
+                         [u'one', u'two, too'])
+
+    def test_jsonlines_output(self):
+        out = self.run_with_output('export', '-l', '-f', 'jsonlines',
+                                   '-i', 'title,track')
+        lines = out.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]),
+                         {u'title': u'one', u'track': u'01'})
+
+    def test_csv_output(self):
+        out = self.run_with_output('export', '-l', '-f', 'csv',
+                                   '-i', 'title,track')
+        self.assertEqual(out.splitlines(),
+                         [u'title,track', u'one,01', u'"two, too",02'])
+
+    def test_csv_output_to_file(self):
+        path = self.temp_dir + b'/out.csv'
+        self.run_command('export', '-l', '-f', 'csv', '-i', 'artist',
+                         '-o', path.decode('utf-8'))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read().splitlines(),
+                             [b'artist', b'the artist', b'the artist'])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
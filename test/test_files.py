@@ -27,6 +27,7 @@ from test import _common
 from test._common import item, touch
 import beets.library
 from beets import util
+from beets.util import fileplan
 
 
 class MoveTest(_common.TestCase):
@@ -607,6 +608,12 @@ class UniquePathTest(_common.TestCase):
         path = util.unique_path(os.path.join(self.base, b'x.1.mp3'))
         self.assertEqual(path, os.path.join(self.base, b'x.3.mp3'))
 
+    def test_taken_path_avoided(self):
+        taken = set([os.path.join(self.base, b'z.mp3'),
+                     os.path.join(self.base, b'z.1.mp3')])
+        path = util.unique_path(os.path.join(self.base, b'z.mp3'), taken)
+        self.assertEqual(path, os.path.join(self.base, b'z.2.mp3'))
+
 
 class MkDirAllTest(_common.TestCase):
     def test_parent_exists(self):
@@ -624,6 +631,115 @@ class MkDirAllTest(_common.TestCase):
         ))
 
 
+class MoveItemsTest(_common.TestCase):
+    def setUp(self):
+        super(MoveItemsTest, self).setUp()
+
+        self.libdir = join(self.temp_dir, b'testlibdir')
+        self.lib = beets.library.Library(':memory:', self.libdir)
+        self.lib.path_formats = [('default', join('$artist', '$title'))]
+        self.journal = join(self.temp_dir, b'move.journal')
+        beets.config['move']['journal'] = util.py3_path(self.journal)
+
+        self.srcdir = join(self.libdir, b'src')
+        os.makedirs(self.srcdir)
+        self.items = []
+        for i in range(3):
+            path = self.src(i)
+            shutil.copy(join(_common.RSRC, b'full.mp3'), path)
+            it = beets.library.Item.from_path(path)
+            it.artist = u'artist'
+            it.title = u'title %i' % i
+            self.lib.add(it)
+            self.items.append(it)
+
+    def src(self, index):
+        return join(self.srcdir, util.bytestring_path(u'%i.mp3' % index))
+
+    def dest(self, name):
+        return join(self.libdir, b'artist', util.bytestring_path(name))
+
+    def test_move_items(self):
+        moved = self.lib.move_items(self.items)
+        self.assertEqual(moved, self.items)
+        for i, it in enumerate(self.items):
+            self.assertExists(self.dest(u'title %i.mp3' % i))
+            self.assertEqual(self.lib.get_item(it.id).path,
+                             self.dest(u'title %i.mp3' % i))
+        self.assertNotExists(self.srcdir)
+        self.assertNotExists(self.journal)
+
+    def test_copy_items(self):
+        self.lib.move_items(self.items, copy=True)
+        for i, it in enumerate(self.items):
+            self.assertExists(self.src(i))
+            self.assertExists(self.dest(u'title %i.mp3' % i))
+
+    def test_colliding_destinations_made_unique(self):
+        for it in self.items:
+            it.title = u'title'
+        self.lib.move_items(self.items)
+        paths = set(self.lib.get_item(it.id).path for it in self.items)
+        self.assertEqual(paths, set([self.dest(b'title.mp3'),
+                                     self.dest(b'title.1.mp3'),
+                                     self.dest(b'title.2.mp3')]))
+
+    def test_failed_move_leaves_item(self):
+        os.remove(self.items[0].path)
+        moved = self.lib.move_items(self.items)
+        self.assertEqual(moved, self.items[1:])
+        self.assertEqual(self.lib.get_item(self.items[0].id).path,
+                         join(self.srcdir, b'0.mp3'))
+
+    def test_resume_interrupted_move(self):
+        # Journal a plan and perform only part of it.
+        plan = fileplan.FilePlan(self.journal, self.lib.path)
+        for i, it in enumerate(self.items):
+            plan.add(it.id, it.path, self.dest(u'title %i.mp3' % i))
+        plan._open_journal().close()
+        util.mkdirall(plan.ops[0].dest)
+        util.move(plan.ops[0].src, plan.ops[0].dest)
+        shutil.copy(plan.ops[1].src, plan.ops[1].dest)
+
+        moved = self.lib.resume_moves()
+        self.assertEqual(len(moved), 3)
+        for i, it in enumerate(self.items):
+            self.assertExists(self.dest(u'title %i.mp3' % i))
+            self.assertEqual(self.lib.get_item(it.id).path,
+                             self.dest(u'title %i.mp3' % i))
+        self.assertNotExists(self.srcdir)
+        self.assertNotExists(self.journal)
+
+    def test_move_items_of_library_with_text_path(self):
+        lib = beets.library.Library(u':memory:', self.libdir)
+        lib.path_formats = self.lib.path_formats
+        it = beets.library.Item.from_path(self.items[0].path)
+        it.artist = u'artist'
+        it.title = u'text'
+        lib.add(it)
+
+        self.assertEqual(lib.move_items([it]), [it])
+        self.assertExists(self.dest(b'text.mp3'))
+        self.assertNotExists(self.journal)
+
+    def test_text_library_path(self):
+        plan = fileplan.FilePlan(self.journal, u'/text/library.db')
+        plan.add(self.items[0].id, self.items[0].path, self.dest(b'x.mp3'))
+        plan._open_journal().close()
+
+        plan = fileplan.FilePlan.load(self.journal, u'/text/library.db')
+        self.assertEqual(plan.owner, b'/text/library.db')
+        self.assertEqual(len(plan.ops), 1)
+
+    def test_journal_of_other_library_ignored(self):
+        plan = fileplan.FilePlan(self.journal, b'/other/library.db')
+        plan.add(self.items[0].id, self.items[0].path, self.dest(b'x.mp3'))
+        plan._open_journal().close()
+
+        self.assertEqual(self.lib.resume_moves(), [])
+        self.assertExists(self.items[0].path)
+
+
 def suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
 
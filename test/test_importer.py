@@ -19,6 +19,7 @@ from __future__ import division, absolute_import, print_function
 """
 import os
 import re
+import pickle
 import shutil
 import unicodedata
 import sys
@@ -1353,6 +1354,44 @@ class IncrementalImportTest(unittest.TestCase, TestHelper):
         importer.run()
         self.assertEqual(len(self.lib.albums()), 1)
 
+    def test_state_db_closed_after_run(self):
+        self.create_importer(album_count=1).run()
+        self.assertIsNone(importer._state_conn)
+
+        # The history is still there when the database is reopened.
+        self.assertEqual(len(importer.history_get()), 1)
+
+
+class ImportStateTest(_common.TestCase):
+    def test_progress(self):
+        self.assertFalse(importer.has_progress(b'/top'))
+        importer.progress_add(b'/top', b'/top/b', b'/top/a')
+        self.assertTrue(importer.has_progress(b'/top'))
+        self.assertTrue(importer.progress_element(b'/top', b'/top/a'))
+        self.assertFalse(importer.progress_element(b'/top', b'/top/c'))
+        self.assertFalse(importer.progress_element(b'/other', b'/top/a'))
+
+        importer.progress_reset(b'/top')
+        self.assertFalse(importer.has_progress(b'/top'))
+        self.assertFalse(importer.progress_element(b'/top', b'/top/a'))
+
+    def test_history(self):
+        importer.history_add([b'/dir/a', b'/dir/b'])
+        self.assertTrue(importer.history_element([b'/dir/a', b'/dir/b']))
+        self.assertFalse(importer.history_element([b'/dir/a']))
+        self.assertEqual(importer.history_get(),
+                         set([(b'/dir/a', b'/dir/b')]))
+
+    def test_migrate_state_file(self):
+        state = {
+            importer.PROGRESS_KEY: {b'/top': [b'/top/a']},
+            importer.HISTORY_KEY: set([(b'/dir/a',)]),
+        }
+        with open(config['statefile'].as_filename(), 'wb') as f:
+            pickle.dump(state, f)
+        self.assertTrue(importer.progress_element(b'/top', b'/top/a'))
+        self.assertTrue(importer.history_element([b'/dir/a']))
+
 
 def _mkmp3(path):
     shutil.copyfile(os.path.join(_common.RSRC, b'min.mp3'), path)
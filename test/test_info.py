@@ -16,6 +16,7 @@
 from __future__ import division, absolute_import, print_function
 
 import unittest
+from mock import patch
 from test.helper import TestHelper
 
 from beets.mediafile import MediaFile
@@ -103,6 +104,20 @@ class InfoTest(unittest.TestCase, TestHelper):
         self.assertNotIn(u'title:', out)
         self.assertIn(u'album: xxxx', out)
 
+    def test_audio_properties_only(self):
+        path = self.create_mediafile_fixture()
+        out = self.run_with_output('info', '-i', 'format,length', path)
+        self.assertIn(u'format: MP3', out)
+        self.assertIn(u'length:', out)
+        self.assertNotIn(u'title:', out)
+
+        # The second time, the file is not read again.
+        with patch('beets.mediafile.probe') as probe:
+            out2 = self.run_with_output('info', '-i', 'format,length', path)
+        self.assertFalse(probe.called)
+        self.assertEqual(out, out2)
+        self.remove_mediafile_fixtures()
+
     def test_custom_format(self):
         self.add_item_fixtures()
         out = self.run_with_output('info', '--library', '--format',
@@ -24,6 +24,7 @@ import shutil
 import re
 import unicodedata
 import sys
+import threading
 import time
 import unittest
 
@@ -492,6 +493,24 @@ class DestinationTest(_common.TestCase):
         dest = self.i.destination()
         self.assertEqual(dest[-2:], b'XX')
 
+    def test_destinations_match_destination(self):
+        self.lib.directory = b'base'
+        self.lib.path_formats = [(u'default', u'$artist/$title'),
+                                 (u'comp:true', u'comp/$title')]
+        other = item(self.lib)
+        other.comp = True
+        other.title = u'other: title'
+        items = [self.i, other]
+        dests = list(self.lib.destinations(items))
+        self.assertEqual(dests, [(i, i.destination()) for i in items])
+        self.assertEqual(dests[1][1], np('base/comp/other_ title'))
+
+    def test_destinations_fragment(self):
+        self.lib.path_formats = [(u'default', u'$album/$title')]
+        [(_, dest)] = self.lib.destinations([self.i], fragment=True)
+        self.assertEqual(dest, self.i.destination(fragment=True))
+        self.assertIsInstance(dest, six.text_type)
+
 
 class ItemFormattedMappingTest(_common.LibTestCase):
     def test_formatted_item_value(self):
@@ -730,6 +749,71 @@ class DisambiguationTest(_common.TestCase, PathFormattingMixin):
         self._setf(u'foo%aunique{albumartist album,albumtype}/$title')
         self._assert_dest(b'/base/foo [foo_bar]/the title', self.i1)
 
+    def test_index_follows_added_albums(self):
+        self._assert_dest(b'/base/foo [2001]/the title', self.i1)
+        i3 = item()
+        i3.year = 2001
+        self.lib.add_album([i3])
+        self._assert_dest(b'/base/foo 1/the title', self.i1)
+
+    def test_index_follows_changed_albums(self):
+        self._assert_dest(b'/base/foo [2001]/the title', self.i1)
+        album2 = self.lib.get_album(self.i2)
+        album2.album = u'different album'
+        album2.store()
+        self._assert_dest(b'/base/foo/the title', self.i1)
+        album2.album = self.i1.album
+        album2.store()
+        self._assert_dest(b'/base/foo [2002]/the title', self.i2)
+
+    def test_index_follows_removed_albums(self):
+        self._assert_dest(b'/base/foo [2001]/the title', self.i1)
+        self.lib.get_album(self.i2).remove()
+        self._assert_dest(b'/base/foo/the title', self.i1)
+
+    def test_index_uses_flexible_fields(self):
+        for i, value in ((self.i1, u'a'), (self.i2, u'b')):
+            album = self.lib.get_album(i)
+            album.year = 2001
+            album.edition = value
+            album.store()
+        self._setf(u'foo%aunique{albumartist album,edition}/$title')
+        self._assert_dest(b'/base/foo [b]/the title', self.i2)
+
+    def test_index_reloads_many_albums_in_chunks(self):
+        self._assert_dest(b'/base/foo [2001]/the title', self.i1)
+        self.lib._aunique_index.chunk_size = 2
+        for year in range(2003, 2008):
+            i = item()
+            i.year = year
+            self.lib.add_album([i])
+        album2 = self.lib.get_album(self.i2)
+        album2.year = 2001
+        album2.store()
+        self._assert_dest(b'/base/foo 1/the title', self.i1)
+
+    def test_store_during_index_load_does_not_deadlock(self):
+        lib = beets.library.Library(os.path.join(self.temp_dir, b'lib.db'))
+        album = lib.add_album([item()])
+        results = []
+
+        def lookup():
+            results.append(lib._aunique_index.disambiguator(
+                album.id, ('albumartist', 'album'), ('year',)))
+
+        # Storing an album invalidates the index while holding a
+        # transaction. Meanwhile, the lookup waits for the database.
+        with lib.transaction():
+            thread = threading.Thread(target=lookup)
+            thread.start()
+            time.sleep(0.1)
+            album.year = 2003
+            album.store()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [None])
+        lib._close()
+
 
 class PluginDestinationTest(_common.TestCase):
     def setUp(self):
@@ -881,6 +965,34 @@ class AlbumInfoTest(_common.TestCase):
         self.assertEqual(i.album, ai.album)
 
 
+class AlbumPrefetchTest(_common.TestCase):
+    def setUp(self):
+        super(AlbumPrefetchTest, self).setUp()
+        self.lib = beets.library.Library(':memory:')
+        self.album1 = self.lib.add_album([item(), item()])
+        self.album2 = self.lib.add_album([item()])
+        self.single = item(self.lib)
+
+    def test_items_share_prefetched_album(self):
+        items = list(self.album1.items())
+        self.assertEqual(len(items), 2)
+        self.assertIs(items[0].get_album(), items[1].get_album())
+        self.assertEqual(items[0].get_album().id, self.album1.id)
+
+    def test_prefetched_albums_match_items(self):
+        for i in self.lib.items(with_albums=True):
+            album = i.get_album()
+            if i.id == self.single.id:
+                self.assertIsNone(album)
+            else:
+                self.assertEqual(album.id, i.album_id)
+
+    def test_changed_album_id_is_not_served_from_cache(self):
+        i = list(self.album1.items())[0]
+        i.album_id = self.album2.id
+        self.assertEqual(i.get_album().id, self.album2.id)
+
+
 class ArtDestinationTest(_common.TestCase):
     def setUp(self):
         super(ArtDestinationTest, self).setUp()
@@ -1138,6 +1250,20 @@ class WriteTest(unittest.TestCase, TestHelper):
         item.write()
         self.assertEqual(MediaFile(syspath(item.path)).year, clean_year)
 
+    def test_write_items(self):
+        items = [self.add_item_fixture(title=u'title {0}'.format(i))
+                 for i in range(3)]
+        missing = self.add_item(path=b'/path/does/not/exist')
+
+        written = self.lib.write_items(items + [missing], store=True,
+                                       threads=2, chunk_size=2)
+        self.assertEqual(written, items)
+        for i, written_item in enumerate(written):
+            self.assertEqual(MediaFile(syspath(written_item.path)).title,
+                             u'title {0}'.format(i))
+            stored = self.lib.get_item(written_item.id)
+            self.assertEqual(stored.mtime, written_item.current_mtime())
+
 
 class ItemReadTest(unittest.TestCase):
 
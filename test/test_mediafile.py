@@ -27,7 +27,7 @@ from six import assertCountEqual
 
 from test import _common
 from beets.mediafile import MediaFile, Image, \
-    ImageType, CoverArtField, UnreadableFileError
+    ImageType, CoverArtField, UnreadableFileError, AUDIO_PROPERTIES, probe
 
 
 class ArtTestMixin(object):
@@ -419,6 +419,33 @@ class ReadWriteTestBase(ArtTestMixin, GenreListTestMixin,
         mediafile = self._mediafile_fixture('full')
         self.assertTags(mediafile, self.full_initial_tags)
 
+    def test_read_fields(self):
+        mediafile = self._mediafile_fixture('full')
+        fields = list(mediafile.readable_fields())
+        values = mediafile.read_fields()
+        self.assertEqual(sorted(values), sorted(fields))
+        for field in fields:
+            self.assertEqual(values[field], getattr(mediafile, field))
+
+    def test_read_fields_subset(self):
+        mediafile = self._mediafile_fixture('full')
+        self.assertEqual(mediafile.read_fields(['title', 'mb_albumid']), {
+            'title': u'full',
+            'mb_albumid': u'9e873859-8aa4-4790-b985-5a953e8ef628',
+        })
+
+    def test_read_fields_after_write(self):
+        mediafile = self._mediafile_fixture('full')
+        mediafile.read_fields()
+        mediafile.mb_albumid = u'new id'
+        self.assertEqual(mediafile.read_fields(['mb_albumid']),
+                         {'mb_albumid': u'new id'})
+
+    def test_probe(self):
+        mediafile = self._mediafile_fixture('full')
+        self.assertEqual(probe(mediafile.path),
+                         mediafile.read_fields(AUDIO_PROPERTIES))
+
     def test_read_empty(self):
         mediafile = self._mediafile_fixture('empty')
         for field in self.tag_fields:
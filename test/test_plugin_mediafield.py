@@ -45,6 +45,11 @@ class ExtendedFieldTestMixin(_common.TestCase):
         shutil.copy(src, target)
         return mediafile.MediaFile(target)
 
+    def _remove_customtag(self):
+        delattr(mediafile.MediaFile, 'customtag')
+        mediafile.MediaFile._field_names = None
+        Item._media_fields.remove('customtag')
+
     def test_extended_field_write(self):
         plugin = BeetsPlugin()
         plugin.add_media_field('customtag', field_extension)
@@ -58,8 +63,7 @@ class ExtendedFieldTestMixin(_common.TestCase):
             self.assertEqual(mf.customtag, u'F#')
 
         finally:
-            delattr(mediafile.MediaFile, 'customtag')
-            Item._media_fields.remove('customtag')
+            self._remove_customtag()
 
     def test_write_extended_tag_from_item(self):
         plugin = BeetsPlugin()
@@ -75,8 +79,7 @@ class ExtendedFieldTestMixin(_common.TestCase):
             self.assertEqual(mf.customtag, u'Gb')
 
         finally:
-            delattr(mediafile.MediaFile, 'customtag')
-            Item._media_fields.remove('customtag')
+            self._remove_customtag()
 
     def test_read_flexible_attribute_from_file(self):
         plugin = BeetsPlugin()
@@ -91,8 +94,20 @@ class ExtendedFieldTestMixin(_common.TestCase):
             self.assertEqual(item['customtag'], u'F#')
 
         finally:
-            delattr(mediafile.MediaFile, 'customtag')
-            Item._media_fields.remove('customtag')
+            self._remove_customtag()
+
+    def test_added_field_resets_item_mtime(self):
+        self.assertNotIn('customtag', mediafile.MediaFile.field_names())
+        plugin = BeetsPlugin()
+        plugin.add_media_field('customtag', field_extension)
+
+        try:
+            self.assertIn('customtag', mediafile.MediaFile.field_names())
+            item = Item(mtime=12345)
+            item['customtag'] = u'F#'
+            self.assertEqual(item.mtime, 0)
+        finally:
+            self._remove_customtag()
 
     def test_invalid_descriptor(self):
         with self.assertRaises(ValueError) as cm:
@@ -164,6 +164,42 @@ class ItemTypeConflictTest(unittest.TestCase, TestHelper):
         self.assertNotEqual(None, plugins.types(Item))
 
 
+class TemplateTableCacheTest(unittest.TestCase, TestHelper):
+
+    def setUp(self):
+        self.setup_plugin_loader()
+        self.setup_beets()
+
+    def tearDown(self):
+        self.teardown_plugin_loader()
+        self.teardown_beets()
+
+    def test_tables_reused_until_plugins_change(self):
+        class ShoutPlugin(plugins.BeetsPlugin):
+            template_funcs = {'shout': lambda s: s.upper() + u'!'}
+            template_fields = {'loud': lambda i: i.title.upper()}
+
+        item = Item(title=u'title')
+        self.assertNotIn('loud', item.keys(True))
+        before = plugins.table_stats['item_field_getters', 'hits']
+        item.keys(True)
+        self.assertGreater(plugins.table_stats['item_field_getters', 'hits'],
+                           before)
+        self.assertIs(Item._getters(), Item._getters())
+
+        self.register_plugin(ShoutPlugin)
+        plugins.load_plugins()
+        self.assertIn('loud', item.keys(True))
+        self.assertEqual(item.evaluate_template(u'%shout{$loud}'),
+                         u'TITLE!')
+
+    def test_bound_functions_use_evaluated_item(self):
+        one = Item(title=u'one')
+        two = Item(title=u'two')
+        self.assertEqual(one.evaluate_template(u'%ifdef{title}'), u'one')
+        self.assertEqual(two.evaluate_template(u'%ifdef{title}'), u'two')
+
+
 class EventsTest(unittest.TestCase, ImportHelper, TestHelper):
 
     def setUp(self):
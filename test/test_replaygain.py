@@ -16,15 +16,25 @@
 
 from __future__ import division, absolute_import, print_function
 
+import math
+import os
+import struct
+import threading
 import unittest
+import wave
 import six
 
 from test.helper import TestHelper, has_program
 
 from beets import config
+from beets import logging
+from beets.library import Item
 from beets.mediafile import MediaFile
+from beets.util import bytestring_path, py3_path
 from beetsplug.replaygain import (FatalGstreamerPluginReplayGainError,
-                                  GStreamerBackend)
+                                  GStreamerBackend, Backend, Gain, AlbumGain,
+                                  ReplayGainPlugin, NumpyBackend,
+                                  ReplayGainError)
 
 try:
     import gi
@@ -38,6 +48,11 @@ if any(has_program(cmd, ['-v']) for cmd in ['mp3gain', 'aacgain']):
 else:
     GAIN_PROG_AVAILABLE = False
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 if has_program('bs1770gain', ['--replaygain']):
     LOUDNESS_PROG_AVAILABLE = True
 else:
@@ -166,6 +181,178 @@ class ReplayGainLdnsCliTest(ReplayGainCliTestBase, unittest.TestCase):
     backend = u'bs1770gain'
 
 
+class FakeBackend(Backend):
+    """A backend that derives the gain from the track number and records
+    the threads it runs in.
+    """
+    parallel = True
+    threads = set()
+
+    def compute_track_gain(self, items):
+        self.threads.add(threading.current_thread())
+        return [Gain(-float(item.track), 0.5) for item in items]
+
+    def compute_album_gain(self, album):
+        track_gains = self.compute_track_gain(album.items())
+        return AlbumGain(Gain(-1.0 * album.id, 0.25), track_gains)
+
+
+class ReplayGainParallelTest(TestHelper, unittest.TestCase):
+
+    def setUp(self):
+        # The analysis runs in other threads, which need to see the
+        # library.
+        self.setup_beets(disk=True)
+        ReplayGainPlugin.backends['fake'] = FakeBackend
+        FakeBackend.threads = set()
+        self.config['replaygain']['backend'] = u'fake'
+        self.load_plugins('replaygain')
+        self.albums = [self.add_album_fixture(2) for _ in range(3)]
+
+    def tearDown(self):
+        del ReplayGainPlugin.backends['fake']
+        self.teardown_beets()
+        self.unload_plugins()
+
+    def test_albums_analyzed_in_worker_threads(self):
+        self.run_command(u'replaygain', u'-a', u'-t', u'2')
+
+        self.assertNotIn(threading.current_thread(), FakeBackend.threads)
+        for album in self.albums:
+            album.load()
+            self.assertEqual(album.rg_album_gain, -1.0 * album.id)
+            for item in album.items():
+                self.assertEqual(item.rg_track_gain, -float(item.track))
+                self.assertEqual(item.rg_album_gain, -1.0 * album.id)
+                self.assertEqual(MediaFile(item.path).rg_track_gain,
+                                 item.rg_track_gain)
+
+    def test_single_thread_analyzes_in_place(self):
+        self.run_command(u'replaygain', u'-t', u'1')
+
+        self.assertEqual(FakeBackend.threads,
+                         set([threading.current_thread()]))
+        for item in self.lib.items():
+            self.assertEqual(item.rg_track_gain, -float(item.track))
+
+
+@unittest.skipIf(numpy is None, u'numpy cannot be found')
+class NumpyBackendTest(TestHelper, unittest.TestCase):
+    rate = 44100
+
+    def setUp(self):
+        self.setup_beets()
+        config['replaygain']['targetlevel'] = 89
+        self.backend = NumpyBackend(config['replaygain'],
+                                    logging.getLogger('beets.replaygain'))
+
+    def tearDown(self):
+        self.teardown_beets()
+
+    def sine(self, level, seconds, freq=1000.0, phase=0.0):
+        """Generate samples of a sine wave with a peak `level` in dBFS.
+        """
+        t = numpy.arange(int(self.rate * seconds)) / self.rate
+        return 10 ** (level / 20) * numpy.sin(2 * math.pi * freq * t + phase)
+
+    def item(self, *parts, **kwargs):
+        """Write a stereo WAV file with the concatenated samples and
+        return an item for it.
+        """
+        width = kwargs.get('width', 2)
+        samples = numpy.concatenate(parts)
+        ints = numpy.round(samples * ((1 << (8 * width - 1)) - 1))
+        frames = numpy.repeat(ints.astype('<i4'), 2)
+
+        if width == 3:
+            data = b''.join(struct.pack('<i', f)[:3] for f in frames)
+        else:
+            data = frames.astype('<i2').tobytes()
+
+        name = u'%i.wav' % len(os.listdir(self.temp_dir))
+        path = os.path.join(self.temp_dir, bytestring_path(name))
+        wav = wave.open(path, 'wb')
+        wav.setnchannels(2)
+        wav.setsampwidth(width)
+        wav.setframerate(self.rate)
+        wav.writeframes(data)
+        wav.close()
+        return Item(path=path)
+
+    def test_sine_track_gain(self):
+        gain, = self.backend.compute_track_gain(
+            [self.item(self.sine(-23, 3))]
+        )
+        # -23 LUFS is 5 dB below the -18 LUFS ReplayGain reference.
+        self.assertAlmostEqual(gain.gain, 5.0, delta=0.05)
+        self.assertAlmostEqual(gain.peak, 10 ** (-23 / 20), places=3)
+
+    def test_quiet_parts_gated(self):
+        relative = self.item(self.sine(-36, 1), self.sine(-23, 12),
+                             self.sine(-36, 1))
+        absolute = self.item(self.sine(-72, 1), self.sine(-36, 1),
+                             self.sine(-23, 12), self.sine(-36, 1),
+                             self.sine(-72, 1))
+        for gain in self.backend.compute_track_gain([relative, absolute]):
+            self.assertAlmostEqual(gain.gain, 5.0, delta=0.1)
+
+    def test_24_bit_file(self):
+        gain, = self.backend.compute_track_gain(
+            [self.item(self.sine(-23, 3), width=3)]
+        )
+        self.assertAlmostEqual(gain.gain, 5.0, delta=0.05)
+
+    def test_album_gain(self):
+        items = [self.item(self.sine(-23, 3)), self.item(self.sine(-33, 3))]
+        for item in items:
+            self.lib.add(item)
+        album = self.lib.add_album(items)
+
+        album_gain = self.backend.compute_album_gain(album)
+        self.assertEqual(len(album_gain.track_gains), 2)
+        self.assertAlmostEqual(album_gain.track_gains[0].gain, 5.0,
+                               delta=0.05)
+        self.assertAlmostEqual(album_gain.track_gains[1].gain, 15.0,
+                               delta=0.05)
+
+        # The album's loudness is that of the mean power of both tracks.
+        loudness = 10 * math.log10((10 ** -2.3 + 10 ** -3.3) / 2)
+        self.assertAlmostEqual(album_gain.album_gain.gain, -18 - loudness,
+                               delta=0.05)
+        self.assertAlmostEqual(album_gain.album_gain.peak, 10 ** (-23 / 20),
+                               places=3)
+
+    @unittest.skipIf(os.name == 'nt', u'uses a shell script')
+    def test_decoder_errors_are_reported(self):
+        # A decoder that fills the stderr pipe before writing any audio.
+        script = os.path.join(self.temp_dir, b'decoder.sh')
+        with open(script, 'w') as f:
+            f.write('#!/bin/sh\n'
+                    'head -c 200000 /dev/zero | tr "\\0" x >&2\n'
+                    'echo broken >&2\n'
+                    'exit 1\n')
+        os.chmod(script, 0o755)
+        self.backend.command = py3_path(script)
+
+        item = Item(path=os.path.join(self.temp_dir, b'x.mp3'))
+        with self.assertRaises(ReplayGainError) as cm:
+            list(self.backend._ffmpeg_chunks(item, self.rate, 2))
+        self.assertIn(u'broken', six.text_type(cm.exception))
+
+    def test_true_peak(self):
+        # The samples of this sine wave all miss its peaks.
+        item = self.item(self.sine(-6, 1, self.rate / 4, math.pi / 4))
+        sample_gain, = self.backend.compute_track_gain([item])
+        self.assertAlmostEqual(sample_gain.peak, 10 ** (-6 / 20) / 2 ** 0.5,
+                               places=3)
+
+        config['replaygain']['peak'] = u'true'
+        backend = NumpyBackend(config['replaygain'],
+                               logging.getLogger('beets.replaygain'))
+        true_gain, = backend.compute_track_gain([item])
+        self.assertAlmostEqual(true_gain.peak, 10 ** (-6 / 20), places=2)
+
+
 def suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
 
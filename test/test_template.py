@@ -281,6 +281,18 @@ class EvalTest(unittest.TestCase):
         self.assertEqual(self._eval(u"%len{}"), u"0")
 
 
+class TemplateCacheTest(unittest.TestCase):
+    def test_same_string_reuses_template(self):
+        tmpl = functemplate.template(u'$foo %lower{$bar}')
+        self.assertIs(functemplate.template(u'$foo %lower{$bar}'), tmpl)
+
+    def test_different_strings_get_different_templates(self):
+        tmpl1 = functemplate.template(u'$foo')
+        tmpl2 = functemplate.template(u'$bar')
+        self.assertEqual(tmpl1.substitute({u'foo': u'x'}), u'x')
+        self.assertEqual(tmpl2.substitute({u'bar': u'y'}), u'y')
+
+
 def suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
 
@@ -398,6 +398,25 @@ class WriteTest(unittest.TestCase, TestHelper):
         self.assertTrue(u'{0} -> new title'.format(old_title)
                         in output)
 
+    def test_skip_file_with_current_mtime(self):
+        item = self.add_item_fixture()
+        item.read()
+        item.store()
+
+        # Change the file behind beets' back without touching its mtime.
+        mtime = item.current_mtime()
+        mediafile = MediaFile(syspath(item.path))
+        mediafile.title = u'changed title'
+        mediafile.save()
+        os.utime(syspath(item.path), (mtime, mtime))
+
+        self.assertEqual(self.write_cmd(), '')
+        self.assertEqual(MediaFile(syspath(item.path)).title,
+                         u'changed title')
+
+        self.write_cmd('--force')
+        self.assertEqual(MediaFile(syspath(item.path)).title, item.title)
+
 
 class MoveTest(_common.TestCase):
     def setUp(self):
@@ -536,6 +555,23 @@ class UpdateTest(_common.TestCase):
         item = self.lib.items().get()
         self.assertEqual(item.title, u'differentTitle')
 
+    def test_only_changed_items_read(self):
+        other = library.Item.from_path(
+            os.path.join(_common.RSRC, b'full.mp3'))
+        self.lib.add(other)
+        other.move(True)
+        other.title = u'unchanged'
+        other.mtime = other.current_mtime()
+        other.store()
+
+        mf = MediaFile(syspath(self.i.path))
+        mf.title = u'differentTitle'
+        mf.save()
+        self._update()
+        self.assertEqual(self.lib.get_item(self.i.id).title,
+                         u'differentTitle')
+        self.assertEqual(self.lib.get_item(other.id).title, u'unchanged')
+
     def test_modified_metadata_moved(self):
         mf = MediaFile(syspath(self.i.path))
         mf.title = u'differentTitle'
@@ -661,6 +697,18 @@ class PrintTest(_common.TestCase):
             else:
                 del os.environ['LC_CTYPE']
 
+    def test_buffered_printer_writes_in_chunks(self):
+        with ui.BufferedPrinter(chunk_size=8) as out:
+            out.print_(u'one')
+            self.assertEqual(self.io.getoutput(), u'')
+            out.print_(u'two', u'three')
+            self.assertEqual(self.io.getoutput(), u'one\ntwo three\n')
+            out.print_(u'f\xfcnf', end=u'')
+        output = self.io.getoutput()
+        if six.PY2:
+            output = output.decode('utf-8')
+        self.assertEqual(output, u'f\xfcnf')
+
 
 class ImportTest(_common.TestCase):
     def test_quiet_timid_disallowed(self):
@@ -1188,6 +1236,43 @@ class CompletionTest(_common.TestCase, TestHelper):
             self.fail(u'test/test_completion.sh did not execute properly')
 
 
+class StatsTest(unittest.TestCase, TestHelper):
+    def setUp(self):
+        self.setup_beets()
+        for artist, year, length in ((u'a', 2001, 60.0), (u'a', 2002, 90.5),
+                                     (u'b', 2001, 30.0)):
+            self.add_item(artist=artist, albumartist=artist, year=year,
+                          length=length, bitrate=128000)
+        self.lib.add_album([self.add_item(artist=u'b', year=2002)])
+
+    def tearDown(self):
+        self.teardown_beets()
+
+    def _summary(self, groups):
+        return [(value, stats.items, stats.time, stats.size, stats.counts())
+                for value, stats in groups]
+
+    def test_sql_stats_match_python_stats(self):
+        for query, by, exact in (([], None, False),
+                                 ([u'artist:a'], None, True),
+                                 ([], u'year', False),
+                                 ([u'year:2001'], u'artist', True)):
+            sql = commands._sql_stats(self.lib, query, by, exact)
+            python = commands._python_stats(self.lib, query, by, exact)
+            self.assertEqual(self._summary(sql), self._summary(python))
+
+    def test_slow_query_falls_back(self):
+        self.assertIsNone(
+            commands._sql_stats(self.lib, [u'artist::^a$'], None, False))
+        self.assertIsNone(
+            commands._sql_stats(self.lib, [], u'nonexistent', False))
+
+    def test_stats_by_field(self):
+        out = self.run_with_output(u'stats', u'--by', u'year', u'artist:a')
+        self.assertIn(u'year: 2001\nTracks: 1\n', out)
+        self.assertIn(u'year: 2002\nTracks: 1\n', out)
+
+
 class CommonOptionsParserCliTest(unittest.TestCase, TestHelper):
     """Test CommonOptionsParser and formatting LibModel formatting on 'list'
     command.
@@ -26,6 +26,7 @@ from mock import patch, Mock
 
 from test import _common
 from beets import util
+from beets.util.probecache import ProbeCache
 import six
 
 
@@ -96,6 +97,17 @@ class UtilTest(unittest.TestCase):
             ])
         self.assertEqual(p, u'bar/bar')
 
+    def test_sanitize_with_memo_reuses_components(self):
+        replacements = [(re.compile(r'foo'), u'bar')]
+        memo = {}
+        with _common.platform_posix():
+            p = util.sanitize_path(u'foo/one', replacements, memo)
+            self.assertEqual(memo[u'foo'], u'bar')
+            memo[u'foo'] = u'baz'
+            q = util.sanitize_path(u'foo/two', replacements, memo)
+        self.assertEqual(p, u'bar/one')
+        self.assertEqual(q, u'baz/two')
+
     @unittest.skip(u'unimplemented: #359')
     def test_sanitize_empty_component(self):
         with _common.platform_posix():
@@ -126,6 +138,94 @@ class UtilTest(unittest.TestCase):
         self.assertEqual(exc_context.exception.returncode, 1)
         self.assertEqual(exc_context.exception.cmd, 'taga \xc3\xa9')
 
+    def test_par_map_generates_all_results(self):
+        results = util.par_map(lambda x: x * 2, range(10), threads=3)
+        self.assertEqual(sorted(results), [x * 2 for x in range(10)])
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        calls = []
+
+        @util.lru_cache(maxsize=2)
+        def double(x):
+            calls.append(x)
+            return x * 2
+
+        self.assertEqual(double(1), 2)
+        self.assertEqual(double(2), 4)
+        double(1)
+        double(3)  # Evicts 2.
+        double(1)
+        double(2)
+        self.assertEqual(calls, [1, 2, 3, 2])
+
+        double.cache_clear()
+        double(1)
+        self.assertEqual(calls, [1, 2, 3, 2, 1])
+
+    def test_par_map_reraises_exceptions(self):
+        def fail(x):
+            raise ValueError(x)
+        with self.assertRaises(ValueError):
+            list(util.par_map(fail, [1, 2], threads=2))
+
+    def test_par_map_ordered(self):
+        results = util.par_map(lambda x: x * 2, range(10), threads=3,
+                               ordered=True)
+        self.assertEqual(list(results), [x * 2 for x in range(10)])
+
+
+class MtimesTest(_common.TestCase):
+    def test_mtimes_of_existing_and_missing_files(self):
+        paths = []
+        for i, subdir in enumerate([b'a', b'a', b'b']):
+            path = os.path.join(self.temp_dir, subdir,
+                                b'file%i' % i)
+            util.mkdirall(path)
+            _common.touch(path)
+            os.utime(path, (1000 + i, 1000 + i))
+            paths.append(path)
+        missing = [os.path.join(self.temp_dir, b'a', b'missing'),
+                   os.path.join(self.temp_dir, b'c', b'missing')]
+
+        mtimes = util.mtimes(paths + missing, threads=2)
+        self.assertEqual([mtimes[p] for p in paths], [1000, 1001, 1002])
+        self.assertEqual([mtimes[p] for p in missing], [None, None])
+
+
+class ProbeCacheTest(_common.TestCase):
+    def setUp(self):
+        super(ProbeCacheTest, self).setUp()
+        self.cache = ProbeCache(os.path.join(self.temp_dir, b'probe.db'))
+        self.path = os.path.join(self.temp_dir, b'file')
+        _common.touch(self.path)
+        os.utime(self.path, (1000, 1000))
+
+    def tearDown(self):
+        self.cache.close()
+        super(ProbeCacheTest, self).tearDown()
+
+    def test_get_stored_value(self):
+        self.cache.set(self.path, u'kind', {u'a': 1})
+        self.assertEqual(self.cache.get(self.path, u'kind'), {u'a': 1})
+        self.assertIsNone(self.cache.get(self.path, u'other kind'))
+
+    def test_changed_file_not_cached(self):
+        self.cache.set(self.path, u'kind', 1)
+        os.utime(self.path, (2000, 2000))
+        self.assertIsNone(self.cache.get(self.path, u'kind'))
+
+    def test_lookup_computes_once(self):
+        func = Mock(return_value=[1, 2])
+        self.assertEqual(self.cache.lookup(self.path, u'kind', func), [1, 2])
+        self.assertEqual(self.cache.lookup(self.path, u'kind', func), [1, 2])
+        func.assert_called_once_with(self.path)
+
+    def test_values_persist(self):
+        self.cache.set(self.path, u'kind', u'value')
+        self.cache.close()
+        self.cache = ProbeCache(os.path.join(self.temp_dir, b'probe.db'))
+        self.assertEqual(self.cache.get(self.path, u'kind'), u'value')
+
 
 class PathConversionTest(_common.TestCase):
     def test_syspath_windows_format(self):